@@ -3,13 +3,12 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from config.config import Config
 from flask_cors import CORS
-from datetime import timedelta
 import os
 
 from db import db
-from connector.mysql_connectors import connect_db
+from connector.mysql_connectors import connect_db, init_db
 
-from controllers.auth_controller import auth_bp, revoked_tokens
+from controllers.auth_controller import auth_bp
 from controllers.institute_controller import institute_bp
 from controllers.enrollment_controller import enrollment_bp
 from controllers.course_controller import course_bp
@@ -17,27 +16,33 @@ from controllers.module_controller import module_bp
 from controllers.submission_controller import submission_bp
 from controllers.assessment_controller import assessment_bp
 from controllers.assessment_details_controller import assessment_details_bp
+from controllers.metrics_controller import metrics_bp
+from controllers.upload_controller import upload_bp
 from dotenv import load_dotenv
 
 
 from utils.handle_response import ResponseHandler
+from utils.request_limits import init_request_limits
+from utils.json_provider import FastJSONProvider
+from services.upload import UploadRequest
+from services.token_revocation import revocation_store
+from services.regrade import reclaim_stale_regrades
 
 
 def create_app():
     app = Flask(__name__)
+    app.request_class = UploadRequest
+    app.json = FastJSONProvider(app)
     load_dotenv()
     app.config.from_object(Config)
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=8)
-    app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(hours=8)
     jwt = JWTManager(app)
 
     CORS(app)
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload["jti"]
-        return jti in revoked_tokens
+        return revocation_store.is_revoked(jwt_payload)
 
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_data):
@@ -49,7 +54,10 @@ def create_app():
 
     db.init_app(app)
     Migrate(app, db)
+    init_db(app)
+    init_request_limits(app)
     connect_db()
+    reclaim_stale_regrades()
 
     register_blueprints(app)
 
@@ -69,6 +77,8 @@ def register_blueprints(app):
     app.register_blueprint(submission_bp)
     app.register_blueprint(assessment_bp)
     app.register_blueprint(assessment_details_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(upload_bp)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+"""
+Serialization cost per response with Flask's default JSON provider vs. FastJSONProvider.
+
+Serializes realistic payloads the way ResponseHandler does: a page of modules with large
+lesson `content`, and a page of submissions with their JSON `answer`, REPEAT times each.
+Run from the repository root:
+
+    python benchmarks/bench_json.py
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.json_provider import FastJSONProvider, orjson  # noqa: E402
+
+REPEAT = int(os.getenv("REPEAT", "50"))
+ROWS = int(os.getenv("ROWS", "200"))
+CONTENT_KB = int(os.getenv("CONTENT_KB", "20"))
+QUESTIONS = int(os.getenv("QUESTIONS", "50"))
+
+NOW = datetime(2024, 5, 17, 9, 30)
+
+
+def modules_payload():
+    content = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (CONTENT_KB * 18))[: CONTENT_KB * 1024]
+    modules = [
+        {
+            "id": i,
+            "course_id": 1,
+            "title": f"Module {i}",
+            "content": content,
+            "module_file": f"https://media.example.com/MEDIA-{i:064x}.pdf",
+            "created_at": NOW,
+            "updated_at": NOW,
+        }
+        for i in range(ROWS)
+    ]
+    return {"message": "Modules retrieved successfully", "modules": modules, "page": {"limit": ROWS, "next_cursor": None}}
+
+
+def submissions_payload():
+    submissions = [
+        {
+            "submission_id": i,
+            "role_id": i,
+            "user_name": f"Student {i}",
+            "file_url": None,
+            "score": 72.5,
+            "answer": {str(q): "abcd"[(i + q) % 4] for q in range(1, QUESTIONS + 1)},
+            "submitted_at": NOW,
+        }
+        for i in range(ROWS)
+    ]
+    return {
+        "message": "Submissions retrieved successfully",
+        "submissions": submissions,
+        "page": {"limit": ROWS, "next_cursor": None},
+    }
+
+
+def run(label, app, payload):
+    with app.app_context():
+        size = len(app.json.response(payload).get_data())
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            app.json.response(payload).get_data()
+        elapsed = time.perf_counter() - start
+    print(f"{label:<32} {size / 1024:8.0f} KB  {elapsed / REPEAT * 1000:7.2f} ms/response")
+
+
+if __name__ == "__main__":
+    default_app = Flask("default")
+    default_app.json = DefaultJSONProvider(default_app)
+    fast_app = Flask("fast")
+    fast_app.json = FastJSONProvider(fast_app)
+
+    print(f"{ROWS} rows per response, orjson {'installed' if orjson else 'not installed'}")
+    for name, payload in (("modules", modules_payload()), ("submissions", submissions_payload())):
+        run(f"{name} / default", default_app, payload)
+        run(f"{name} / FastJSONProvider", fast_app, payload)
@@ -0,0 +1,50 @@
+"""
+Login throughput per core with bcrypt inline vs. in the PasswordHasher process pool.
+
+Simulates a login storm: THREADS request threads (a gthread gunicorn worker) each verify
+LOGINS passwords, and reports logins per second and per core. Run from the repository root:
+
+    DB_HOST=localhost python benchmarks/bench_password_hashing.py
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.password_hasher import PasswordHasher  # noqa: E402
+
+ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+THREADS = int(os.getenv("THREADS", "8"))
+LOGINS = int(os.getenv("LOGINS", "64"))
+CORES = os.cpu_count() or 1
+
+PASSWORD = "correct horse battery staple"
+HASHED = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(ROUNDS)).decode("utf-8")
+
+
+def inline_verify(_):
+    return bcrypt.checkpw(PASSWORD.encode("utf-8"), HASHED.encode("utf-8"))
+
+
+def run(label, verify):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(verify, range(LOGINS)))
+    elapsed = time.perf_counter() - start
+
+    assert all(results)
+    rate = LOGINS / elapsed
+    print(f"{label:<12} {LOGINS} logins in {elapsed:6.2f}s  {rate:7.1f} logins/s  {rate / CORES:6.1f} logins/s/core")
+
+
+if __name__ == "__main__":
+    print(f"bcrypt cost {ROUNDS}, {THREADS} request threads, {CORES} cores")
+    run("inline", inline_verify)
+
+    hasher = PasswordHasher(workers=CORES, max_pending=LOGINS, rounds=str(ROUNDS), target_ms=250)
+    hasher.verify(PASSWORD, HASHED)  # Start the pool outside the measurement
+    run("process pool", lambda _: hasher.verify(PASSWORD, HASHED))
@@ -0,0 +1,119 @@
+"""
+Upload throughput of StreamingUpload, the path form uploads take to storage.
+
+Starts a local moto S3 server as a stand-in for R2, then feeds UPLOADS small files from
+THREADS request threads through StreamingUpload with a new S3 client per upload, with the
+shared client in services.storage and with the local filesystem backend, and one LARGE_MB
+file with its multipart parts sent one by one and through the part upload pool. Every file
+has new content, so none is deduplicated. Needs the dev packages (pipenv install --dev).
+Run from the repository root:
+
+    DB_HOST=localhost python benchmarks/bench_uploads.py
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from moto.server import ThreadedMotoServer
+
+PORT = int(os.getenv("MOTO_PORT", "5055"))
+os.environ.update(
+    R2_ENDPOINT_URL=f"http://127.0.0.1:{PORT}",
+    R2_ACCESS_KEY_ID="bench",
+    R2_SECRET_ACCESS_KEY="bench",
+    R2_BUCKET_NAME="bench",
+    R2_DOMAINS="https://media.example.com",
+    AWS_DEFAULT_REGION="us-east-1",
+    STORAGE_BACKEND="r2",
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config  # noqa: E402
+
+# The content digest index lives in the database, a throwaway SQLite file is enough here
+Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tempfile.mkdtemp(prefix='bench-uploads-')}/bench.db"
+
+from connector.mysql_connectors import get_engine  # noqa: E402
+from models import StoredFileModel  # noqa: E402
+from services.storage import TRANSFER_CONFIG, LocalStorageBackend, S3StorageBackend, get_s3_client  # noqa: E402
+from services.upload import StreamingUpload  # noqa: E402
+
+THREADS = int(os.getenv("THREADS", "8"))
+UPLOADS = int(os.getenv("UPLOADS", "200"))
+SMALL_KB = int(os.getenv("SMALL_KB", "64"))
+LARGE_MB = int(os.getenv("LARGE_MB", "64"))
+READ_SIZE = 64 * 1024  # What werkzeug hands to the container per write
+
+
+def pdf(size):
+    return b"%PDF-" + os.urandom(size - 5)
+
+
+def mp4(size):
+    return b"\x00\x00\x00\x18ftypisom" + os.urandom(size - 12)
+
+
+def new_client_storage():
+    # What every upload did before: a fresh client with its own connection pool
+    client = boto3.client(
+        "s3",
+        endpoint_url=os.environ["R2_ENDPOINT_URL"],
+        aws_access_key_id="bench",
+        aws_secret_access_key="bench",
+    )
+    return S3StorageBackend("bench", os.environ["R2_DOMAINS"], client=client)
+
+
+def stream(data, content_type, ext_name, storage=None, max_concurrency=None):
+    upload = StreamingUpload(
+        len(data), TRANSFER_CONFIG.multipart_chunksize, storage=storage, max_concurrency=max_concurrency
+    )
+    for offset in range(0, len(data), READ_SIZE):
+        upload.write(data[offset : offset + READ_SIZE])
+    return upload.finish(content_type, ext_name).get("success")
+
+
+def run(label, storage_factory):
+    files = [pdf(SMALL_KB * 1024) for _ in range(UPLOADS)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda data: stream(data, "application/pdf", ".pdf", storage_factory()), files))
+    elapsed = time.perf_counter() - start
+
+    assert all(results)
+    print(f"{label:<22} {UPLOADS} uploads in {elapsed:6.2f}s  {UPLOADS / elapsed:7.1f} uploads/s")
+
+
+def run_large(label, max_concurrency):
+    data = mp4(LARGE_MB * 1024 * 1024)
+    start = time.perf_counter()
+    assert stream(data, "video/mp4", ".mp4", max_concurrency=max_concurrency)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {LARGE_MB} MB in {elapsed:6.2f}s  {LARGE_MB / elapsed:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    StoredFileModel.__table__.create(get_engine())
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    try:
+        get_s3_client().create_bucket(Bucket="bench")
+        print(f"{THREADS} request threads, {SMALL_KB} KB files, {TRANSFER_CONFIG.multipart_chunksize // 1024 // 1024} MB parts")
+
+        run("client per upload", new_client_storage)
+        run("shared client", lambda: None)
+
+        with tempfile.TemporaryDirectory() as root:
+            local = LocalStorageBackend(root, "http://localhost:5000/api/v1/files", "bench")
+            run("local filesystem", lambda: local)
+
+        run_large("parts one by one", 1)
+        run_large(f"{TRANSFER_CONFIG.max_concurrency} parts in flight", TRANSFER_CONFIG.max_concurrency)
+    finally:
+        server.stop()
@@ -16,3 +16,105 @@ class Config:
     f"@{host}:{port}/{os.getenv('DB_DATABASE')}?ssl_ca=ca_certificate.pem"
 )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(hours=8)
+    # Embed the user's roles in access tokens so role checks can skip the database
+    JWT_ROLE_CLAIMS = os.getenv('JWT_ROLE_CLAIMS', 'true').lower() == 'true'
+
+    # Connection pool shared by every request handled in a worker process
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+    # Read replicas used by routes marked read-only, e.g. "mysql+mysqlconnector://...,sqlite:///replica.db"
+    DB_REPLICA_URIS = [uri.strip() for uri in os.getenv('DB_REPLICA_URIS', '').split(',') if uri.strip()]
+    # After a user writes, their reads stay on the primary for this many seconds
+    DB_READ_YOUR_WRITES_SECONDS = int(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+    # Where those windows are kept so every worker sees them, same choices as REVOCATION_BACKEND
+    DB_READ_YOUR_WRITES_BACKEND = os.getenv('DB_READ_YOUR_WRITES_BACKEND', os.getenv('REVOCATION_BACKEND', 'sqlite'))
+    # How long a replica that failed to connect is skipped before being tried again
+    DB_REPLICA_RETRY_SECONDS = int(os.getenv('DB_REPLICA_RETRY_SECONDS', '30'))
+
+    # Token required in the X-Metrics-Token header of the internal metrics endpoint
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Where logged-out tokens are kept: "sqlite" (shared by workers on one host), "database" or "memory"
+    REVOCATION_BACKEND = os.getenv('REVOCATION_BACKEND', 'sqlite')
+    REVOCATION_SQLITE_PATH = os.getenv('REVOCATION_SQLITE_PATH', 'revoked_tokens.db')
+    # How often each worker picks up tokens revoked by other workers
+    REVOCATION_SYNC_SECONDS = int(os.getenv('REVOCATION_SYNC_SECONDS', '2'))
+
+    # bcrypt runs in a process pool; requests beyond PASSWORD_HASH_MAX_PENDING get a 503
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+    # A fixed bcrypt cost, or "auto" to pick the highest cost hashing within BCRYPT_TARGET_MS
+    BCRYPT_ROUNDS = os.getenv('BCRYPT_ROUNDS', '12')
+    BCRYPT_TARGET_MS = int(os.getenv('BCRYPT_TARGET_MS', '250'))
+
+    # Roles loaded from the database are reused across requests for up to this long
+    AUTHZ_CACHE_SIZE = int(os.getenv('AUTHZ_CACHE_SIZE', '10000'))
+    AUTHZ_CACHE_TTL_SECONDS = int(os.getenv('AUTHZ_CACHE_TTL_SECONDS', '60'))
+
+    # List endpoints return pages of PAGE_SIZE_DEFAULT rows, clients may ask for up to PAGE_SIZE_MAX
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '50'))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '200'))
+    # Rows fetched per round trip from the server-side cursor of streamed exports
+    STREAM_YIELD_PER = int(os.getenv('STREAM_YIELD_PER', '1000'))
+
+    # Compiled answer keys of choices assessments, reused until the assessment details change
+    ANSWER_KEY_CACHE_SIZE = int(os.getenv('ANSWER_KEY_CACHE_SIZE', '1024'))
+    ANSWER_KEY_CACHE_TTL_SECONDS = int(os.getenv('ANSWER_KEY_CACHE_TTL_SECONDS', '3600'))
+    # Submissions are re-scored in background threads, this many per read/UPDATE round trip
+    REGRADE_WORKERS = int(os.getenv('REGRADE_WORKERS', '1'))
+    REGRADE_CHUNK_SIZE = int(os.getenv('REGRADE_CHUNK_SIZE', '5000'))
+    # Jobs left queued or running this long by a worker that went away are restarted when a worker starts
+    REGRADE_STALE_MINUTES = int(os.getenv('REGRADE_STALE_MINUTES', '15'))
+
+    # "batched" queues submissions and inserts them in group commits of up to SUBMISSION_BATCH_SIZE rows,
+    # waiting at most SUBMISSION_BATCH_MS for a batch to fill; "direct" commits each submission in its request
+    SUBMISSION_INGEST_MODE = os.getenv('SUBMISSION_INGEST_MODE', 'direct')
+    SUBMISSION_BATCH_SIZE = int(os.getenv('SUBMISSION_BATCH_SIZE', '200'))
+    SUBMISSION_BATCH_MS = int(os.getenv('SUBMISSION_BATCH_MS', '50'))
+    SUBMISSION_MAX_PENDING = int(os.getenv('SUBMISSION_MAX_PENDING', '5000'))
+    # Longest wait between attempts to write a batch the database failed to take
+    SUBMISSION_RETRY_MAX_SECONDS = int(os.getenv('SUBMISSION_RETRY_MAX_SECONDS', '30'))
+    # Receipts younger than this are reported as pending even when this worker doesn't know them
+    SUBMISSION_RECEIPT_PENDING_SECONDS = int(os.getenv('SUBMISSION_RECEIPT_PENDING_SECONDS', '30'))
+
+    # Shared S3/R2 client: connection pool size and multipart settings for large uploads
+    S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', '20'))
+    S3_MULTIPART_THRESHOLD_MB = int(os.getenv('S3_MULTIPART_THRESHOLD_MB', '8'))
+    S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv('S3_MULTIPART_CHUNKSIZE_MB', '8'))
+    S3_MAX_CONCURRENCY = int(os.getenv('S3_MAX_CONCURRENCY', '4'))
+
+    # How long a presigned direct-upload URL stays valid
+    UPLOAD_URL_EXPIRES_SECONDS = int(os.getenv('UPLOAD_URL_EXPIRES_SECONDS', '900'))
+
+    # Larger request bodies are rejected with 413 from their Content-Length, before being read
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', str(11 * 1024 * 1024)))
+    USER_IMPORT_MAX_BYTES = int(os.getenv('USER_IMPORT_MAX_BYTES', str(100 * 1024 * 1024)))
+    SUBMISSION_IMPORT_MAX_BYTES = int(os.getenv('SUBMISSION_IMPORT_MAX_BYTES', str(100 * 1024 * 1024)))
+
+    # Process pool resizing uploaded images into small WebP/JPEG variants in the background
+    IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', '2'))
+    IMAGE_VARIANT_MAX_PENDING = int(os.getenv('IMAGE_VARIANT_MAX_PENDING', '64'))
+
+    # Where uploaded files are stored: "r2" (the R2_* bucket) or "local" (a directory served by this app)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'r2')
+    R2_ACCESS_KEY_ID = os.getenv('R2_ACCESS_KEY_ID')
+    R2_SECRET_ACCESS_KEY = os.getenv('R2_SECRET_ACCESS_KEY')
+    R2_BUCKET_NAME = os.getenv('R2_BUCKET_NAME')
+    R2_ENDPOINT_URL = os.getenv('R2_ENDPOINT_URL')
+    R2_DOMAINS = os.getenv('R2_DOMAINS')
+    STORAGE_LOCAL_PATH = os.getenv('STORAGE_LOCAL_PATH', 'uploads')
+    STORAGE_LOCAL_URL = os.getenv('STORAGE_LOCAL_URL', 'http://localhost:5000/api/v1/files')
+    # Signs presigned PUT URLs of the local backend
+    STORAGE_LOCAL_SECRET = os.getenv('STORAGE_LOCAL_SECRET', os.getenv('JWT_SECRET_KEY'))
+
+    # Resumable chunked uploads (large course videos): chunk size (5 MB minimum for S3), file size cap and lifetime
+    UPLOAD_CHUNK_SIZE_MB = int(os.getenv('UPLOAD_CHUNK_SIZE_MB', '8'))
+    MAX_CHUNKED_UPLOAD_MB = int(os.getenv('MAX_CHUNKED_UPLOAD_MB', '1024'))
+    UPLOAD_SESSION_HOURS = int(os.getenv('UPLOAD_SESSION_HOURS', '24'))
@@ -0,0 +1,72 @@
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from utils.metrics import metrics
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long callers wait for a connection and why checkouts fail."""
+
+    def connect(self):
+        name = self.logging_name or "primary"
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.inc(f"db.{name}.checkout_timeouts")
+            raise
+        except Exception:
+            metrics.inc(f"db.{name}.connect_failures")
+            raise
+
+        metrics.observe(f"db.{name}.checkout_wait_ms", (time.perf_counter() - start) * 1000)
+        return connection
+
+
+def pool_status(engine):
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+    }
+
+
+def instrument_engine(engine, name):
+    metrics.register_gauge(f"db.{name}.pool", lambda: pool_status(engine))
+
+    @event.listens_for(engine, "connect")
+    def count_new_connection(dbapi_connection, connection_record):
+        metrics.inc(f"db.{name}.connections_opened")
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info["query_start"]) * 1000
+        if has_request_context():
+            g.db_time_ms = g.get("db_time_ms", 0) + elapsed
+            g.db_queries = g.get("db_queries", 0) + 1
+
+
+def record_route_db_time(exception=None):
+    if "db_queries" not in g:
+        return
+
+    route = request.endpoint or "unknown"
+    metrics.inc(f"route.{route}.db_queries", g.pop("db_queries"))
+    metrics.observe(f"route.{route}.db_time_ms", g.pop("db_time_ms"))
+
+
+def init_db_metrics(app):
+    app.teardown_request(record_route_db_time)
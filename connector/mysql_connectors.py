@@ -1,12 +1,205 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from functools import wraps
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 from config.config import Config
+from connector.db_metrics import InstrumentedQueuePool, instrument_engine, init_db_metrics
+from services.recent_writes import recent_writes
+
+_engine = None
+_replicas = []
+_Session = None
+
+_replica_down_until = {}
+_next_replica = 0
+_lock = threading.Lock()
+
+
+def _create_engine(uri, name):
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite uses a single-connection pool that takes no sizing options
+        engine = create_engine(url)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_logging_name=name,
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE,
+            pool_pre_ping=Config.DB_POOL_PRE_PING,
+        )
+
+    instrument_engine(engine, name)
+    return engine
+
+
+def mark_replica_down(replica):
+    _replica_down_until[replica] = time.monotonic() + Config.DB_REPLICA_RETRY_SECONDS
+
+
+def _watch_replica(replica):
+    @event.listens_for(replica, "handle_error")
+    def on_replica_error(context):
+        if context.is_disconnect or context.connection is None:
+            mark_replica_down(replica)
+
+
+def get_engine():
+    """Return the process-wide pooled engine, creating it on first use."""
+    global _engine, _replicas, _Session
+
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                replicas = [_create_engine(uri, f"replica{i}") for i, uri in enumerate(Config.DB_REPLICA_URIS)]
+                for replica in replicas:
+                    _watch_replica(replica)
+
+                _replicas = replicas
+                _Session = sessionmaker(class_=RoutingSession)
+                _engine = _create_engine(Config.SQLALCHEMY_DATABASE_URI, "primary")
+
+    return _engine
+
+
+def get_replica():
+    """Return the next healthy replica engine, or None to use the primary."""
+    global _next_replica
+
+    now = time.monotonic()
+    for _ in range(len(_replicas)):
+        replica = _replicas[_next_replica % len(_replicas)]
+        _next_replica += 1
+        if _replica_down_until.get(replica, 0) <= now:
+            return replica
+
+    return None
+
+
+def _reset_pool_after_fork():
+    # Connections inherited from a preloading gunicorn master must not be shared
+    for engine in [_engine, *_replicas]:
+        if engine is not None:
+            engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+class RoutingSession(Session):
+    """
+    Session sending reads of read-only requests to a replica, everything else to the primary.
+
+    A read the replica fails is run again on the primary, the replica is skipped by the
+    following requests for DB_REPLICA_RETRY_SECONDS.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("read_only") and not self._flushing:
+            if "replica" not in self.info:
+                self.info["replica"] = get_replica()
+            if self.info["replica"] is not None:
+                return self.info["replica"]
+
+        return _engine
+
+    def execute(self, *args, **kwargs):
+        return self._read_with_fallback(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._read_with_fallback(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._read_with_fallback(super().scalars, *args, **kwargs)
+
+    def _read_with_fallback(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except (OperationalError, InterfaceError):
+            replica = self.info.get("replica")
+            if replica is None or self.info.get("wrote"):
+                raise
+
+            mark_replica_down(replica)
+            # Releases the failed replica connection, the session has nothing to lose as it never wrote
+            self.rollback()
+            self.info["replica"] = None
+            return method(*args, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _remember_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session):
+    if session.info.pop("wrote", False):
+        user_id = _current_user_id()
+        if user_id is not None:
+            recent_writes.mark(user_id)
+
+
+def _current_user_id():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def read_only(fn):
+    """Mark a route as read-only so its queries may be served by a replica."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def get_session():
+    """Return the session of the current request, opening it lazily."""
+    if "db_session" not in g:
+        get_engine()
+        s = _Session()
+
+        if g.get("db_read_only") and _replicas:
+            user_id = _current_user_id()
+            s.info["read_only"] = user_id is None or not recent_writes.wrote_recently(user_id)
+
+        g.db_session = s
+
+    return g.db_session
+
+
+def close_session(exception=None):
+    s = g.pop("db_session", None)
+    if s is not None:
+        if exception is not None:
+            s.rollback()
+        s.close()
+
+
+def init_db(app):
+    app.teardown_appcontext(close_session)
+    init_db_metrics(app)
 
 
 def connect_db():
     print("Connecting to MySQL Database")
-    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+    engine = get_engine()
 
-    connection = engine.connect()
-    print("Success connecting to Milestone 2 App Database")
+    with engine.connect():
+        print("Success connecting to Milestone 2 App Database")
 
-    return connection
+    return engine
@@ -1,18 +1,29 @@
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from services.upload import UploadFiles
+from services.upload import UploadFiles, streamed_upload
+from services.grading import AnswerKeyError, get_answer_key
+from services.submission_ingest import IngestQueueFull, submission_ingestor
+from services.submission_import import import_submissions
+from utils.bulk_import import read_rows
 from werkzeug.datastructures import FileStorage
+from sqlalchemy.exc import IntegrityError
 import json
 
-from models import AssessmentModel, RoleModel, SubmissionModel, AssessmentDetailModel, UserModel
-from connector.mysql_connectors import connect_db
-from sqlalchemy.orm import sessionmaker
+from models import AssessmentModel, RoleModel, SubmissionModel, AssessmentDetailModel, UserModel, ModuleModel, CourseModel
+from models.submission import gmt_plus_7_now
+from config.config import Config
+from connector.mysql_connectors import get_session, read_only
 
 from enums.enum import UserRoleEnum, AssesmentTypeEnum, RoleStatusEnum
 
 from utils.handle_response import ResponseHandler
+from utils.pagination import paginate, PaginationError
+from utils.fieldsets import requested_fields, load_fields, field_options, to_fields, FieldsError
+from utils.conditional import list_validators, record_validators, is_not_modified, validator_headers
+from utils.authorization import find_role, require_role
 from utils.validate_submission import validate_submission
+from utils.request_limits import max_content_length
 
 from cerberus import Validator
 from schemas.assessment_schema import create_assessment_schema, update_assessment_schema
@@ -24,10 +35,9 @@ assessment_bp = Blueprint("assessment", __name__)
 
 @assessment_bp.route("/api/v1/assessments", methods=["POST"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def create_assessment():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -38,14 +48,6 @@ def create_assessment():
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
         
-        # Check if user is instructor
-        instructor_role = s.query(RoleModel).filter(
-            RoleModel.user_id == user_id,
-            RoleModel.role == UserRoleEnum.instructor
-        ).first()
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
 
         # Create new assessment
         new_assessment = AssessmentModel(
@@ -62,55 +64,67 @@ def create_assessment():
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @assessment_bp.route("/api/v1/assessments/module/<int:module_id>", methods=["GET"])
 @jwt_required()
 def get_all_assessments_in_module(module_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
-        assessments = s.query(AssessmentModel).filter(AssessmentModel.module_id == module_id).all()
+        fields = requested_fields(AssessmentModel)
+        assessments_query = s.query(AssessmentModel).filter(AssessmentModel.module_id == module_id)
+
+        validators = list_validators(assessments_query, AssessmentModel.updated_at)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        assessments, page = paginate(
+            load_fields(assessments_query, AssessmentModel, fields),
+            AssessmentModel.id,
+            filters={"type": AssessmentModel.type},
+            date_column=AssessmentModel.created_at,
+        )
         return ResponseHandler.success(
-            {"assessments": [assessment.to_dictionaries() for assessment in assessments]},
-            "Assessments retrieved successfully"
+            {"assessments": [to_fields(assessment, fields) for assessment in assessments], "page": page},
+            "Assessments retrieved successfully",
+            headers=validator_headers(validators),
         )
 
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
+
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @assessment_bp.route("/api/v1/assessments/<int:assessment_id>", methods=["GET"])
 @jwt_required()
 def get_assessment_by_id(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
-        assessment = s.get(AssessmentModel, assessment_id)
+        fields = requested_fields(AssessmentModel)
+        assessment = s.get(AssessmentModel, assessment_id, options=field_options(AssessmentModel, fields))
         if not assessment:
             return ResponseHandler.error("Assessment not found", 404)
 
-        return ResponseHandler.success(assessment.to_dictionaries(), "Assessment retrieved successfully")
+        validators = record_validators(assessment)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        return ResponseHandler.success(
+            to_fields(assessment, fields), "Assessment retrieved successfully", headers=validator_headers(validators)
+        )
+
+    except FieldsError as e:
+        return ResponseHandler.error(str(e), 400)
 
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @assessment_bp.route("/api/v1/assessments/<int:assessment_id>", methods=["PATCH"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def update_assessment(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -126,14 +140,6 @@ def update_assessment(assessment_id):
         if not assessment:
             return ResponseHandler.error("Assessment not found", 404)
         
-        # Check if user is instructor
-        instructor_role = s.query(RoleModel).filter(
-            RoleModel.user_id == user_id,
-            RoleModel.role == UserRoleEnum.instructor
-        ).first()
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
         
         # Update Assessment
         if "module_id" in data:
@@ -150,15 +156,10 @@ def update_assessment(assessment_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @assessment_bp.route("/api/v1/assessments/<int:assessment_id>", methods=["DELETE"])
 @jwt_required()
 def delete_assessment(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         assessment = s.get(AssessmentModel, assessment_id)
@@ -174,20 +175,22 @@ def delete_assessment(assessment_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @assessment_bp.route("/api/v1/assessments/<int:assessment_id>/submissions", methods=["GET"])
 @jwt_required()
+@read_only
 def get_submissions(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
-        submissions = s.query(SubmissionModel, UserModel.name).\
-            join(UserModel, UserModel.id == SubmissionModel.role_id).\
-            filter(SubmissionModel.assessment_id == assessment_id).all()
+        submissions, page = paginate(
+            s.query(SubmissionModel, UserModel.name)
+            .join(UserModel, UserModel.id == SubmissionModel.role_id)
+            .filter(SubmissionModel.assessment_id == assessment_id),
+            SubmissionModel.id,
+            filters={"role_id": SubmissionModel.role_id},
+            date_column=SubmissionModel.submitted_at,
+            row_id=lambda row: row.SubmissionModel.id,
+        )
 
         if not submissions:
             return ResponseHandler.error("Submission not found", 404)
@@ -203,21 +206,79 @@ def get_submissions(assessment_id):
         } for submission in submissions]
 
         return ResponseHandler.success(
-            {"submissions": submission_list}, "Submissions retrieved successfully"
+            {"submissions": submission_list, "page": page}, "Submissions retrieved successfully"
         )
 
+    except PaginationError as e:
+        return ResponseHandler.error(str(e), 400)
+
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
+@assessment_bp.route("/api/v1/assessments/<int:assessment_id>/submissions/export", methods=["GET"])
+@jwt_required()
+@read_only
+@require_role(UserRoleEnum.instructor)
+def export_submissions(assessment_id):
+    s = get_session()
+
+    try:
+        user_id = get_jwt_identity()
+
+        institute_id = (
+            s.query(CourseModel.institute_id)
+            .join(ModuleModel, ModuleModel.course_id == CourseModel.id)
+            .join(AssessmentModel, AssessmentModel.module_id == ModuleModel.id)
+            .filter(AssessmentModel.id == assessment_id)
+            .scalar()
+        )
+        if institute_id is None:
+            return ResponseHandler.error("Assessment not found", 404)
+
+        # Only instructors of the institute teaching the course may read its submissions
+        if not find_role(s, user_id, UserRoleEnum.instructor, institute_id=institute_id):
+            return ResponseHandler.error("Unauthorized user", 403)
+
+        # Plain rows read from a server-side cursor, only STREAM_YIELD_PER of them in memory at a time
+        rows = (
+            s.query(
+                SubmissionModel.id,
+                SubmissionModel.role_id,
+                UserModel.name,
+                SubmissionModel.file,
+                SubmissionModel.score,
+                SubmissionModel.answer,
+                SubmissionModel.submitted_at,
+            )
+            .join(RoleModel, RoleModel.id == SubmissionModel.role_id)
+            .join(UserModel, UserModel.id == RoleModel.user_id)
+            .filter(SubmissionModel.assessment_id == assessment_id)
+            .order_by(SubmissionModel.id)
+            .yield_per(Config.STREAM_YIELD_PER)
+        )
+
+        submissions = (
+            {
+                'submission_id': row.id,
+                'role_id': row.role_id,
+                'user_name': row.name,
+                'file_url': row.file,
+                'score': row.score,
+                'answer': row.answer,
+                'submitted_at': row.submitted_at
+            }
+            for row in rows
+        )
+        return ResponseHandler.stream(submissions, "submissions", "Submissions retrieved successfully")
+
+    except Exception as e:
+        return ResponseHandler.error(str(e), 500)
 
 @assessment_bp.route("/api/v1/submissions/<int:submission_id>/grade", methods=["PATCH"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def update_submission_grade(submission_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -233,18 +294,11 @@ def update_submission_grade(submission_id):
         if not submission:
             return ResponseHandler.error("Submission not found", 404)
         
-        # Check if user is instructor
-        instructor_role = s.query(RoleModel).filter(
-            RoleModel.user_id == user_id,
-            RoleModel.role == UserRoleEnum.instructor
-        ).first()
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
         
         # Update Assessment
         if "score" in data:
             submission.score = data["score"]
+            submission.score_overridden = True
 
         s.commit()
 
@@ -254,16 +308,12 @@ def update_submission_grade(submission_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @assessment_bp.route("/api/v1/assessments/<int:assessment_id>/submissions", methods=["POST"])
 @jwt_required()
+@streamed_upload("file")
 def submit_assessment(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -271,26 +321,38 @@ def submit_assessment(assessment_id):
         submission_file = request.files.get('file')
 
         # Check user role for submission eligibility
-        role = s.query(RoleModel).filter_by(
-            id=data["role_id"], user_id=user_id, role=UserRoleEnum.student
-        ).first()
+        role = find_role(s, user_id, UserRoleEnum.student, role_id=data["role_id"])
         if not role:
             return ResponseHandler.error("Role not found or unauthorized", 403)
         if role.status != RoleStatusEnum.active: 
             return ResponseHandler.error("Role is inactive", 403)
         
+        # Assessment type, deadline, answer key version and whether the student already
+        # submitted, in one round trip
+        already_submitted = (
+            s.query(SubmissionModel.id)
+            .filter(SubmissionModel.assessment_id == assessment_id, SubmissionModel.role_id == role.id)
+            .exists()
+        )
+        assessment = (
+            s.query(
+                AssessmentModel.type,
+                AssessmentDetailModel.id.label("detail_id"),
+                AssessmentDetailModel.updated_at,
+                AssessmentDetailModel.deadline,
+                already_submitted.label("already_submitted"),
+            )
+            .outerjoin(AssessmentDetailModel, AssessmentDetailModel.assessment_id == AssessmentModel.id)
+            .filter(AssessmentModel.id == assessment_id)
+            .first()
+        )
+        if not assessment:
+            return ResponseHandler.error("Assessment not found", 404)
+
         # Check if the student has already submitted for this assessment
-        existing_submission = s.query(SubmissionModel).filter_by(
-            assessment_id=assessment_id, role_id=role.id
-        ).first()
-        if existing_submission:
+        if assessment.already_submitted:
             return ResponseHandler.error("You have already submitted for this assessment", 400)
 
-        # Check if the assessment exists
-        assessment = s.query(AssessmentModel).filter_by(id=assessment_id).first()
-        if not assessment:
-            return ResponseHandler.error("Assessment not found", 404)
-        
         assessment_type = assessment.type
 
         validation_error = validate_submission(data, assessment_type)
@@ -317,35 +379,39 @@ def submit_assessment(assessment_id):
                 return ResponseHandler.error("Invalid answer format: Must be valid JSON", 400)
         
         # Check if the deadline has passed
-        assessment_detail = s.query(AssessmentDetailModel).filter_by(
-            assessment_id=assessment_id
-        ).first()
-        if assessment_detail and datetime.utcnow() > assessment_detail.deadline:    
+        if assessment.detail_id and datetime.utcnow() > assessment.deadline:    
             return ResponseHandler.error("Submission deadline has passed", 400)
 
         # calculate score for multiple choice assessment
         score = None
         if assessment_type == AssesmentTypeEnum.choices and user_answers:
-            if not assessment_detail:
+            if not assessment.detail_id:
                 return ResponseHandler.error("Assessment detail not found", 404)
 
-            correct_answers = assessment_detail.answer
-            correct_answers_count = 0
-            total_questions = len(assessment_detail.question) 
+            # The answer key is compiled once per version of the assessment details
+            try:
+                answer_key = get_answer_key(s, assessment_id, assessment.updated_at)
+            except AnswerKeyError as e:
+                return ResponseHandler.error(str(e), 500)
 
-            for question_number, options in assessment_detail.question.items():
-                # Validate that question exists in both answers
-                if question_number not in correct_answers:
-                    return ResponseHandler.error(f"Question {question_number} not found in answer key", 500)
-        
-                if question_number not in user_answers:
-                    continue  # Skip unanswered questions, counting them as incorrect
-            
-                # Compare answers only if both exist
-                if user_answers[question_number] == correct_answers[question_number]:
-                    correct_answers_count += 1
+            score = answer_key.score(user_answers)
 
-            score = (correct_answers_count / total_questions) * 100
+        # During deadline bursts submissions are written in group commits, the client gets a receipt
+        if Config.SUBMISSION_INGEST_MODE == "batched":
+            now = gmt_plus_7_now()
+            try:
+                receipt = submission_ingestor.submit({
+                    "assessment_id": assessment_id,
+                    "role_id": role.id,
+                    "file": file_url,
+                    "score": score,
+                    "answer": user_answers,
+                    "submitted_at": now,
+                    "updated_at": now,
+                })
+                return ResponseHandler.success({"receipt": receipt, "status": "pending"}, "Submission queued", 202)
+            except IngestQueueFull:
+                pass  # Written directly below
 
         submission = SubmissionModel(
             assessment_id=assessment_id,
@@ -359,9 +425,68 @@ def submit_assessment(assessment_id):
 
         return ResponseHandler.success(submission.to_dictionaries(), "Submission created", 201)
 
+    except IntegrityError:
+        # A concurrent request of the same student won the unique (assessment_id, role_id) constraint
+        s.rollback()
+        return ResponseHandler.error("You have already submitted for this assessment", 400)
+
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
\ No newline at end of file
+
+@assessment_bp.route("/api/v1/assessments/<int:assessment_id>/submissions/bulk", methods=["POST"])
+@max_content_length(Config.SUBMISSION_IMPORT_MAX_BYTES)
+@jwt_required()
+@require_role(UserRoleEnum.instructor)
+def bulk_submit_assessment(assessment_id):
+    s = get_session()
+
+    try:
+        user_id = get_jwt_identity()
+
+        content_type = request.content_type or ""
+        if not content_type.startswith(("application/x-ndjson", "application/jsonl")):
+            return ResponseHandler.error("Upload submissions as application/x-ndjson", 415)
+
+        assessment = (
+            s.query(
+                AssessmentModel.id,
+                AssessmentModel.type,
+                CourseModel.institute_id,
+                AssessmentDetailModel.updated_at,
+                AssessmentDetailModel.deadline,
+            )
+            .join(ModuleModel, ModuleModel.id == AssessmentModel.module_id)
+            .join(CourseModel, CourseModel.id == ModuleModel.course_id)
+            .outerjoin(AssessmentDetailModel, AssessmentDetailModel.assessment_id == AssessmentModel.id)
+            .filter(AssessmentModel.id == assessment_id)
+            .first()
+        )
+        if not assessment:
+            return ResponseHandler.error("Assessment not found", 404)
+
+        if not find_role(s, user_id, UserRoleEnum.instructor, institute_id=assessment.institute_id):
+            return ResponseHandler.error("Unauthorized user", 403)
+
+        answer_key = None
+        if assessment.type == AssesmentTypeEnum.choices:
+            if not assessment.updated_at:
+                return ResponseHandler.error("Assessment detail not found", 404)
+            try:
+                answer_key = get_answer_key(s, assessment_id, assessment.updated_at)
+            except AnswerKeyError as e:
+                return ResponseHandler.error(str(e), 500)
+
+        # Answer sheets are read from the request stream chunk by chunk instead of buffering the whole batch
+        report = import_submissions(s, read_rows(request.stream, content_type), assessment, answer_key)
+
+        summary = {
+            status: sum(1 for result in report if result["status"] == status)
+            for status in ("created", "skipped", "error")
+        }
+        return ResponseHandler.success({"summary": summary, "results": report}, "Submissions imported")
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
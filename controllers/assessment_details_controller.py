@@ -1,13 +1,16 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from models import AssessmentModel, AssessmentDetailModel, RoleModel
-from connector.mysql_connectors import connect_db
-from sqlalchemy.orm import sessionmaker
+from models import AssessmentModel, AssessmentDetailModel, RoleModel, RegradeJobModel
+from connector.mysql_connectors import get_session, read_only
+from services.regrade import start_regrade
 
 from enums.enum import UserRoleEnum, AssesmentTypeEnum
 
 from utils.handle_response import ResponseHandler
+from utils.authorization import require_role
+from utils.fieldsets import requested_fields, load_fields, to_fields, FieldsError
+from utils.conditional import record_validators, is_not_modified, validator_headers
 
 from cerberus import Validator
 from schemas.assessment_details_schema import create_assessment_details_schema, update_assessment_details_schema
@@ -18,10 +21,9 @@ assessment_details_bp = Blueprint("assessment_details", __name__)
 
 @assessment_details_bp.route("/api/v1/assessments_details/<int:assessment_id>", methods=["POST"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def create_assessment_details(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -49,15 +51,6 @@ def create_assessment_details(assessment_id):
         if assessment_type == AssesmentTypeEnum.choices and 'answer' not in data:
             return ResponseHandler.error('Answer is required for choices assessment type', 400)
         
-        # Check if user is instructor
-        instructor_role = s.query(RoleModel).filter(
-            RoleModel.user_id == user_id,
-            RoleModel.role == UserRoleEnum.instructor
-        ).first()
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
 
         assessment_detail = AssessmentDetailModel(
             assessment_id=data['assessment_id'],
@@ -76,36 +69,41 @@ def create_assessment_details(assessment_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @assessment_details_bp.route("/api/v1/assessments_details/<int:assessment_id>", methods=["GET"])
 @jwt_required()
 def get_assessment_details_by_asssesment_id(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
-        assessment_details = s.query(AssessmentDetailModel).filter_by(assessment_id=assessment_id).first()
+        fields = requested_fields(AssessmentDetailModel)
+        assessment_details = load_fields(
+            s.query(AssessmentDetailModel).filter_by(assessment_id=assessment_id), AssessmentDetailModel, fields
+        ).first()
         if not assessment_details:
             return ResponseHandler.error("Create the assesment details first!", 404)
 
-        return ResponseHandler.success(assessment_details.to_dictionaries(), "Assessment retrieved successfully")
+        validators = record_validators(assessment_details)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        return ResponseHandler.success(
+            to_fields(assessment_details, fields),
+            "Assessment retrieved successfully",
+            headers=validator_headers(validators),
+        )
+
+    except FieldsError as e:
+        return ResponseHandler.error(str(e), 400)
 
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @assessment_details_bp.route("/api/v1/assessment_details/<int:assessment_id>", methods=["PATCH"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def update_assessment_details_by_assessment(assessment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -126,28 +124,46 @@ def update_assessment_details_by_assessment(assessment_id):
         if not assessment_details:
             return ResponseHandler.error("Assestment details not found", 404)
         
-        # Check if user is instructor
-        instructor_role = s.query(RoleModel).filter(
-            RoleModel.user_id == user_id,
-            RoleModel.role == UserRoleEnum.instructor
-        ).first()
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-        
         if not assessment_details:
             return ResponseHandler.error('Assessment detail not found', 404 )
 
         for key, value in data.items():
             setattr(assessment_details, key, value)
 
+        # Scores of existing submissions are recomputed against the corrected answer key
+        regrade_job = None
+        assessment = s.get(AssessmentModel, assessment_id)
+        if assessment.type == AssesmentTypeEnum.choices and ("answer" in data or "question" in data):
+            regrade_job = RegradeJobModel(assessment_id=assessment_id, role_id=g.current_role.id)
+            s.add(regrade_job)
+
         s.commit()
 
-        return ResponseHandler.success(assessment_details.to_dictionaries(), "Assessment updated successfully")
+        response = assessment_details.to_dictionaries()
+        if regrade_job:
+            start_regrade(regrade_job.id, assessment_id)
+            response["regrade_job"] = regrade_job.to_dictionaries()
+
+        return ResponseHandler.success(response, "Assessment updated successfully")
         
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
\ No newline at end of file
+
+@assessment_details_bp.route("/api/v1/assessment_details/<int:assessment_id>/regrade_jobs/<int:job_id>", methods=["GET"])
+@jwt_required()
+@read_only
+@require_role(UserRoleEnum.instructor)
+def get_regrade_job(assessment_id, job_id):
+    s = get_session()
+
+    try:
+        regrade_job = s.query(RegradeJobModel).filter_by(id=job_id, assessment_id=assessment_id).first()
+        if not regrade_job:
+            return ResponseHandler.error("Re-grade job not found", 404)
+
+        return ResponseHandler.success(regrade_job.to_dictionaries(), "Re-grade job retrieved successfully")
+
+    except Exception as e:
+        return ResponseHandler.error(str(e), 500)
@@ -1,15 +1,23 @@
 from flask import Blueprint, request
-from services.upload import UploadFiles
+from services.upload import UploadFiles, streamed_upload
+from services.token_revocation import revocation_store
+from services.claims_versions import claims_versions
+from services.password_hasher import HasherBusyError, password_hasher
+from services.user_import import read_user_rows, import_users
 from werkzeug.datastructures import FileStorage
 import json
 
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required, get_jwt
 
 from models import UserModel, DisabledUserModel, InstituteModel, RoleModel
-from connector.mysql_connectors import connect_db
-from sqlalchemy.orm import sessionmaker
+from connector.mysql_connectors import get_session
 
 from utils.handle_response import ResponseHandler
+from utils.authorization import role_claims, require_role
+from utils.fieldsets import to_dictionary
+from utils.request_limits import max_content_length
+from config.config import Config
+from enums.enum import UserRoleEnum
 
 from schemas.user_schema import register_schema, login_email_schema, update_profile_schema
 from cerberus import Validator
@@ -17,14 +25,11 @@ from cerberus import Validator
 from flask_cors import cross_origin
 
 auth_bp = Blueprint("auth", __name__)
-revoked_tokens = set()
 
 
 @auth_bp.route("/api/v1/auth/register", methods=["POST"])
 def register():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.form.to_dict()  # Change to form data to handle file upload
@@ -51,8 +56,12 @@ def register():
             profile_pict_url = result["file_url"]
 
         # Create new user
-        new_user = UserModel(name=data["name"], email=data["email"], profile_pict=profile_pict_url)
-        new_user.set_password(data["password"])
+        new_user = UserModel(
+            name=data["name"],
+            email=data["email"],
+            password=password_hasher.hash(data["password"]),
+            profile_pict=profile_pict_url,
+        )
 
         # Add disability info if provided
         if "disability_info" in data:
@@ -65,21 +74,20 @@ def register():
         s.add(new_user)
         s.commit()
 
-        return ResponseHandler.success(new_user.to_dictionaries(), "User registered successfully", 201)
+        return ResponseHandler.success(to_dictionary(new_user), "User registered successfully", 201)
+
+    except HasherBusyError as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 503)
 
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @auth_bp.route("/api/v1/auth/login", methods=["POST"])
 def login():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -90,9 +98,20 @@ def login():
 
         user = s.query(UserModel).filter(UserModel.email == data["email"]).first()
 
-        if not user or not user.check_password(data["password"]):
+        if not user or not password_hasher.verify(data["password"], user.password):
             return ResponseHandler.error("Email or password is incorrect", 401)
 
+        # Upgrade the stored hash when the configured bcrypt cost has changed
+        if password_hasher.needs_rehash(user.password):
+            try:
+                user.password = password_hasher.hash(data["password"])
+                s.commit()
+            except HasherBusyError:
+                s.rollback()  # Retried on the next login
+
+        # Read before the roles, so a role change committed in between outdates the token's claims
+        claims_version = claims_versions.fresh(user.id)
+
         # Query user's roles and institutes
         roles_with_institutes = (
             s.query(RoleModel, InstituteModel).join(InstituteModel).filter(RoleModel.user_id == user.id).all()
@@ -109,24 +128,25 @@ def login():
                 }
             )
 
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(
+            identity=str(user.id), additional_claims=role_claims([role for role, _ in roles_with_institutes], claims_version)
+        )
         return ResponseHandler.success(
-            {"token": access_token, "user": user.to_dictionaries(), "roles": roles_data}, "Login successful"
+            {"token": access_token, "user": to_dictionary(user), "roles": roles_data}, "Login successful"
         )
 
+    except HasherBusyError as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 503)
+
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @auth_bp.route("/api/v1/users/profile", methods=["GET"])
 @jwt_required()
 def get_profile():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -135,21 +155,17 @@ def get_profile():
         if not user:
             return ResponseHandler.error("User not found", 404)
 
-        return ResponseHandler.success(user.to_dictionaries(), "Profile retrieved successfully")
+        return ResponseHandler.success(to_dictionary(user), "Profile retrieved successfully")
 
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @auth_bp.route("/api/v1/users/profile", methods=["PATCH"])
 @jwt_required()
+@streamed_upload("profile_pict")
 def update_profile():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -194,7 +210,7 @@ def update_profile():
 
         # Update password if provided
         if "password" in data:
-            user.set_password(data["password"])
+            user.password = password_hasher.hash(data["password"])
 
         # Update disability info if provided
         if "disability_info" in data:
@@ -214,24 +230,50 @@ def update_profile():
 
         s.commit()
 
-        return ResponseHandler.success(user.to_dictionaries(), "Profile updated successfully")
+        return ResponseHandler.success(to_dictionary(user), "Profile updated successfully")
+
+    except HasherBusyError as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 503)
 
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @auth_bp.route("/api/v1/users/logout", methods=["POST"])
 @jwt_required()
 def logout():
     try:
-        jti = get_jwt()["jti"]  # Get the unique identifier of the JWT token
-        revoked_tokens.add(jti)  # Add the token to the revoked set
+        revocation_store.revoke(get_jwt())  # Revoke the token until it expires
 
         return ResponseHandler.success(message="Logged out successfully")
 
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
+
+
+@auth_bp.route("/api/v1/institutes/<int:institute_id>/users/import", methods=["POST"])
+@max_content_length(Config.USER_IMPORT_MAX_BYTES)
+@jwt_required()
+@require_role(UserRoleEnum.admin, institute_arg="institute_id")
+def import_institute_users(institute_id):
+    s = get_session()
+
+    try:
+        content_type = request.content_type or ""
+        if not content_type.startswith(("text/csv", "application/x-ndjson", "application/jsonl")):
+            return ResponseHandler.error("Upload users as text/csv or application/x-ndjson", 415)
+
+        # Rows are read from the request stream chunk by chunk instead of buffering the whole file
+        report = import_users(s, read_user_rows(request.stream, content_type), institute_id)
+
+        summary = {
+            status: sum(1 for result in report if result["status"] == status)
+            for status in ("created", "skipped", "error")
+        }
+        return ResponseHandler.success({"summary": summary, "results": report}, "Users imported")
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
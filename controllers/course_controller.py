@@ -1,15 +1,18 @@
 from flask import Blueprint
-from sqlalchemy.orm import sessionmaker
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from connector.mysql_connectors import connect_db
+from connector.mysql_connectors import get_session, read_only
 from models import RoleModel, EnrollmentModel, ModuleModel, CourseModel
 from enums.enum import RoleStatusEnum, UserRoleEnum
 from utils.handle_response import ResponseHandler
-from flask import Blueprint, request
+from utils.pagination import paginate, PaginationError
+from utils.fieldsets import requested_fields, load_fields, field_options, to_fields, to_dictionary, FieldsError
+from utils.conditional import list_validators, record_validators, is_not_modified, validator_headers
+from utils.authorization import find_role, find_roles, require_role
+from flask import Blueprint, request, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from cerberus import Validator
 from schemas.course_schema import create_course_schema, update_course_schema
-from services.upload import UploadFiles
+from services.upload import UploadFiles, streamed_upload
 from werkzeug.datastructures import FileStorage
 from flask_cors import cross_origin
 
@@ -18,22 +21,15 @@ course_bp = Blueprint("course", __name__)
 
 @course_bp.route("/api/v1/student-courses/<int:course_id>/modules", methods=["GET"])
 @jwt_required()
+@read_only
 def get_course_modules(course_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
 
         # Verify user enrollment in the course
-        roles = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.user_id == user_id, RoleModel.role == "student", RoleModel.status == RoleStatusEnum.active
-            )
-            .all()
-        )
+        roles = find_roles(s, user_id, UserRoleEnum.student, status=RoleStatusEnum.active)
 
         enrolled = (
             s.query(EnrollmentModel)
@@ -48,26 +44,43 @@ def get_course_modules(course_id):
             return ResponseHandler.error("Student is not enrolled in this course or the student is inactive.", 403)
 
         # Fetch modules for the course
-        modules = s.query(ModuleModel).filter(ModuleModel.course_id == course_id).all()
+        fields = requested_fields(ModuleModel)
+        modules_query = s.query(ModuleModel).filter(ModuleModel.course_id == course_id)
+
+        validators = list_validators(modules_query, ModuleModel.updated_at)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        modules, page = paginate(
+            load_fields(modules_query, ModuleModel, fields),
+            ModuleModel.id,
+            date_column=ModuleModel.created_at,
+        )
 
         if not modules:
-            return ResponseHandler.success({"modules": []}, "No modules found for this course.")
+            return ResponseHandler.success(
+                {"modules": [], "page": page},
+                "No modules found for this course.",
+                headers=validator_headers(validators),
+            )
 
         return ResponseHandler.success(
-            {"modules": [module.to_dictionaries() for module in modules]}, "Modules retrieved successfully"
+            {"modules": [to_fields(module, fields) for module in modules], "page": page},
+            "Modules retrieved successfully",
+            headers=validator_headers(validators),
         )
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
-    finally:
-        s.close()
 
 
 @course_bp.route("/api/v1/courses", methods=["POST"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
+@streamed_upload("media")
 def create_course():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.form.to_dict()
@@ -81,14 +94,6 @@ def create_course():
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
 
-        # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.instructor).first()
-        )
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
         # Handle media files upload if provided
         media_url = None
         if media and isinstance(media, FileStorage):
@@ -112,82 +117,84 @@ def create_course():
         s.add(new_course)
         s.commit()
 
-        return ResponseHandler.success(new_course.to_dictionaries(), "Course created successfully", 201)
+        return ResponseHandler.success(to_dictionary(new_course), "Course created successfully", 201)
 
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @course_bp.route("/api/v1/courses", methods=["GET"])
 @jwt_required()
+@read_only
+@require_role(UserRoleEnum.instructor)
 def get_all_courses():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
 
-        # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.instructor).first()
-        )
+        instructor_role = g.current_role
 
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
+        fields = requested_fields(CourseModel)
+        courses_query = s.query(CourseModel).filter(CourseModel.institute_id == instructor_role.institute_id)
+
+        validators = list_validators(courses_query, CourseModel.updated_at)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
 
-        courses = s.query(CourseModel).filter(CourseModel.institute_id == instructor_role.institute_id).all()
+        courses, page = paginate(
+            load_fields(courses_query, CourseModel, fields),
+            CourseModel.id,
+            filters={"category": CourseModel.category},
+            date_column=CourseModel.created_at,
+        )
         return ResponseHandler.success(
-            {"Courses": [course.to_dictionaries() for course in courses]}, "Courses retrieved successfully"
+            {"Courses": [to_fields(course, fields) for course in courses], "page": page},
+            "Courses retrieved successfully",
+            headers=validator_headers(validators),
         )
 
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
+
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @course_bp.route("/api/v1/courses/<int:course_id>", methods=["GET"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def get_course_by_id(course_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
-        course = s.get(CourseModel, course_id)
+        fields = requested_fields(CourseModel)
+        course = s.get(CourseModel, course_id, options=field_options(CourseModel, fields))
         if not course:
             return ResponseHandler.error("Course not found", 404)
 
-        # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.instructor).first()
-        )
+        validators = record_validators(course)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
 
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
+        return ResponseHandler.success(
+            to_fields(course, fields), "Course retrieved successfully", headers=validator_headers(validators)
+        )
 
-        return ResponseHandler.success(course.to_dictionaries(), "Course retrieved successfully")
+    except FieldsError as e:
+        return ResponseHandler.error(str(e), 400)
 
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @course_bp.route("/api/v1/courses/<int:course_id>", methods=["PATCH"])
 @jwt_required()
+@streamed_upload("media")
 def update_course(course_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.form.to_dict()
@@ -205,15 +212,7 @@ def update_course(course_id):
             return ResponseHandler.error("Course not found", 404)
 
         # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.user_id == user_id,
-                RoleModel.role == UserRoleEnum.instructor,
-                RoleModel.institute_id == course.institute_id,
-            )
-            .first()
-        )
+        instructor_role = find_role(s, user_id, UserRoleEnum.instructor, institute_id=course.institute_id)
 
         if not instructor_role:
             return ResponseHandler.error("Unauthorized user", 403)
@@ -242,22 +241,17 @@ def update_course(course_id):
 
         s.commit()
 
-        return ResponseHandler.success(course.to_dictionaries(), "Course updated successfully")
+        return ResponseHandler.success(to_dictionary(course), "Course updated successfully")
 
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @course_bp.route("/api/v1/courses/<int:course_id>", methods=["DELETE"])
 @jwt_required()
 def delete_course(course_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -267,15 +261,7 @@ def delete_course(course_id):
             return ResponseHandler.error("Course not found", 404)
 
         # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.user_id == user_id,
-                RoleModel.role == UserRoleEnum.instructor,
-                RoleModel.institute_id == course.institute_id,
-            )
-            .first()
-        )
+        instructor_role = find_role(s, user_id, UserRoleEnum.instructor, institute_id=course.institute_id)
 
         if not instructor_role:
             return ResponseHandler.error("Unauthorized user", 403)
@@ -289,16 +275,12 @@ def delete_course(course_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @course_bp.route("/api/v1/institute-courses/<int:institute_id>", methods=["GET"])
 @jwt_required()
+@read_only
 def show_all_courses(institute_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -311,13 +293,27 @@ def show_all_courses(institute_id):
         # if not instructor_role:
         #     return ResponseHandler.error("Unauthorized user", 403)
 
-        courses = s.query(CourseModel).filter(CourseModel.institute_id == institute_id).all()
+        fields = requested_fields(CourseModel)
+        courses_query = s.query(CourseModel).filter(CourseModel.institute_id == institute_id)
+
+        validators = list_validators(courses_query, CourseModel.updated_at)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        courses, page = paginate(
+            load_fields(courses_query, CourseModel, fields),
+            CourseModel.id,
+            filters={"category": CourseModel.category},
+            date_column=CourseModel.created_at,
+        )
         return ResponseHandler.success(
-            {"Courses": [course.to_dictionaries() for course in courses]}, "Courses retrieved successfully"
+            {"Courses": [to_fields(course, fields) for course in courses], "page": page},
+            "Courses retrieved successfully",
+            headers=validator_headers(validators),
         )
 
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
+
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
-
-    finally:
-        s.close()
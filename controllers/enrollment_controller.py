@@ -2,12 +2,14 @@ from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from models import RoleModel, EnrollmentModel
-from connector.mysql_connectors import connect_db
-from sqlalchemy.orm import sessionmaker
+from connector.mysql_connectors import get_session, read_only
 
 from enums.enum import UserRoleEnum, RoleStatusEnum, EnrollStatusEnum
 
 from utils.handle_response import ResponseHandler
+from utils.pagination import paginate, PaginationError
+from utils.fieldsets import requested_fields, load_fields, field_options, to_fields, FieldsError
+from utils.authorization import find_roles, require_role, invalidate_user_roles
 from datetime import datetime, timedelta
 
 from cerberus import Validator
@@ -21,10 +23,9 @@ enrollment_bp = Blueprint("enrollment", __name__)
 
 @enrollment_bp.route("/api/v1/institutes/<int:institute_id>/roles", methods=["POST"])
 @jwt_required()
+@require_role(UserRoleEnum.admin, institute_arg="institute_id")
 def assign_role(institute_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -48,20 +49,6 @@ def assign_role(institute_id):
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
 
-        # Check if assigner is admin
-        admin_role = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.institute_id == institute_id,
-                RoleModel.user_id == user_id,
-                RoleModel.role == UserRoleEnum.admin,
-            )
-            .first()
-        )
-
-        if not admin_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
         # Create new role
         new_role = RoleModel(
             institute_id=institute_id,
@@ -72,22 +59,19 @@ def assign_role(institute_id):
 
         s.add(new_role)
         s.commit()
+        invalidate_user_roles(new_role.user_id)
 
         return ResponseHandler.success(new_role.to_dictionaries(), "Role assigned successfully", 201)
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @enrollment_bp.route("/api/v1/institutes/<int:institute_id>/roles/<int:role_id>", methods=["PATCH"])
 @jwt_required()
+@require_role(UserRoleEnum.admin, institute_arg="institute_id")
 def update_role_status(institute_id, role_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -98,61 +82,47 @@ def update_role_status(institute_id, role_id):
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
 
-        # Check if user is admin
-        admin_role = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.institute_id == institute_id,
-                RoleModel.user_id == user_id,
-                RoleModel.role == UserRoleEnum.admin,
-            )
-            .first()
-        )
-
-        if not admin_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
         role = s.get(RoleModel, role_id)
         if not role:
             return ResponseHandler.error("Role not found", 404)
 
         role.status = RoleStatusEnum[data["status"].lower()]
         s.commit()
+        invalidate_user_roles(role.user_id)
 
         return ResponseHandler.success(role.to_dictionaries(), "Role status updated successfully")
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @enrollment_bp.route("/api/v1/institutes/<int:institute_id>/roles", methods=["GET"])
 @jwt_required()
 def get_institute_roles(institute_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
-        roles = s.query(RoleModel).filter(RoleModel.institute_id == institute_id).all()
+        fields = requested_fields(RoleModel)
+        roles, page = paginate(
+            load_fields(s.query(RoleModel).filter(RoleModel.institute_id == institute_id), RoleModel, fields),
+            RoleModel.id,
+            filters={"status": RoleModel.status, "role": RoleModel.role},
+            date_column=RoleModel.created_at,
+        )
         return ResponseHandler.success(
-            {"roles": [role.to_dictionaries() for role in roles]}, "Roles retrieved successfully"
+            {"roles": [to_fields(role, fields) for role in roles], "page": page}, "Roles retrieved successfully"
         )
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @enrollment_bp.route("/api/v1/enrollments", methods=["POST"])
 @jwt_required()
+@require_role(UserRoleEnum.admin)
 def create_enrollment():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -163,14 +133,6 @@ def create_enrollment():
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
 
-        # Verify admin role
-        admin_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.admin).first()
-        )
-
-        if not admin_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
         new_enrollment = EnrollmentModel(
             role_id=data["role_id"],
             course_id=data["course_id"],
@@ -186,55 +148,55 @@ def create_enrollment():
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @enrollment_bp.route("/api/v1/enrollments", methods=["GET"])
 @jwt_required()
 def get_all_enrollments():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
-        enrollments = s.query(EnrollmentModel).all()
+        fields = requested_fields(EnrollmentModel)
+        enrollments, page = paginate(
+            load_fields(s.query(EnrollmentModel), EnrollmentModel, fields),
+            EnrollmentModel.id,
+            filters={
+                "status": EnrollmentModel.status,
+                "course_id": EnrollmentModel.course_id,
+                "role_id": EnrollmentModel.role_id,
+            },
+            date_column=EnrollmentModel.created_at,
+        )
         return ResponseHandler.success(
-            {"enrollments": [enrollment.to_dictionaries() for enrollment in enrollments]},
+            {"enrollments": [to_fields(enrollment, fields) for enrollment in enrollments], "page": page},
             "Enrollments retrieved successfully",
         )
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @enrollment_bp.route("/api/v1/enrollments/<int:enrollment_id>", methods=["GET"])
 @jwt_required()
 def get_enrollment_by_id(enrollment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
-        enrollment = s.get(EnrollmentModel, enrollment_id)
+        fields = requested_fields(EnrollmentModel)
+        enrollment = s.get(EnrollmentModel, enrollment_id, options=field_options(EnrollmentModel, fields))
         if not enrollment:
             return ResponseHandler.error("Enrollment not found", 404)
 
-        return ResponseHandler.success(enrollment.to_dictionaries(), "Enrollment retrieved successfully")
+        return ResponseHandler.success(to_fields(enrollment, fields), "Enrollment retrieved successfully")
+    except FieldsError as e:
+        return ResponseHandler.error(str(e), 400)
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @enrollment_bp.route("/api/v1/enrollments/<int:enrollment_id>", methods=["GET"])
 @jwt_required()
 def get_user_role_on_institute(institute_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -252,16 +214,12 @@ def get_user_role_on_institute(institute_id):
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @enrollment_bp.route("/api/v1/enrollments/<int:enrollment_id>", methods=["PATCH"])
 @jwt_required()
+@require_role(UserRoleEnum.admin)
 def update_enrollment(enrollment_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -272,13 +230,6 @@ def update_enrollment(enrollment_id):
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
 
-        # Verify admin role
-        admin_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.admin).first()
-        )
-        if not admin_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
         enrollment = s.get(EnrollmentModel, enrollment_id)
         if not enrollment:
             return ResponseHandler.error("Enrollment not found", 404)
@@ -293,48 +244,46 @@ def update_enrollment(enrollment_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @enrollment_bp.route("/api/v1/enrollments/me", methods=["GET"])
 @jwt_required()
+@read_only
 def get_my_enrollments():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
 
         # Fetch roles associated with the current user
-        roles = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.user_id == user_id, RoleModel.role == "student", RoleModel.status == RoleStatusEnum.active
-            )
-            .all()
-        )
+        roles = find_roles(s, user_id, UserRoleEnum.student, status=RoleStatusEnum.active)
         print(f"{roles}")
 
         # Fetch enrollments for these roles
-        active_enrollments = (
-            s.query(EnrollmentModel).filter(EnrollmentModel.role_id.in_([role.id for role in roles])).all()
+        fields = requested_fields(EnrollmentModel)
+        active_enrollments, page = paginate(
+            load_fields(
+                s.query(EnrollmentModel).filter(EnrollmentModel.role_id.in_([role.id for role in roles])),
+                EnrollmentModel,
+                fields,
+            ),
+            EnrollmentModel.id,
+            filters={"status": EnrollmentModel.status, "course_id": EnrollmentModel.course_id},
+            date_column=EnrollmentModel.created_at,
         )
         print(f"{active_enrollments}")
 
         if not active_enrollments:
-            return ResponseHandler.success({"enrollments": []}, "No active enrollments found")
+            return ResponseHandler.success({"enrollments": [], "page": page}, "No active enrollments found")
 
         # Return the active enrollments
         return ResponseHandler.success(
-            {"enrollments": [enrollment.to_dictionaries() for enrollment in active_enrollments]},
+            {"enrollments": [to_fields(enrollment, fields) for enrollment in active_enrollments], "page": page},
             "Active enrollments retrieved successfully",
         )
 
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
+
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
-
-    finally:
-        s.close()
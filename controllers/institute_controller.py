@@ -2,11 +2,11 @@ from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from models import InstituteModel, RoleModel
-from connector.mysql_connectors import connect_db
-from sqlalchemy.orm import sessionmaker
+from connector.mysql_connectors import get_session
 
 from enums.enum import UserRoleEnum, RoleStatusEnum
 from utils.handle_response import ResponseHandler
+from utils.authorization import require_role, invalidate_user_roles
 
 from cerberus import Validator
 from schemas.institute_schema import create_institute_schema, update_institute_schema
@@ -18,9 +18,7 @@ institute_bp = Blueprint("institute", __name__)
 @institute_bp.route("/api/v1/institutes", methods=["POST"])
 @jwt_required()
 def create_institute():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -42,6 +40,7 @@ def create_institute():
         )
         s.add(admin_role)
         s.commit()
+        invalidate_user_roles(user_id)
 
         return ResponseHandler.success(new_institute.to_dictionaries(), "Institute created successfully", 201)
 
@@ -49,16 +48,11 @@ def create_institute():
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @institute_bp.route("/api/v1/institutes", methods=["GET"])
 @jwt_required()
 def get_all_institutes():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -78,16 +72,11 @@ def get_all_institutes():
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @institute_bp.route("/api/v1/institutes/<int:institute_id>", methods=["GET"])
 @jwt_required()
 def get_institute_by_id(institute_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -109,16 +98,12 @@ def get_institute_by_id(institute_id):
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @institute_bp.route("/api/v1/institutes/<int:institute_id>", methods=["PATCH"])
 @jwt_required()
+@require_role(UserRoleEnum.admin, institute_arg="institute_id")
 def update_institute(institute_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.get_json()
@@ -134,20 +119,6 @@ def update_institute(institute_id):
         if not institute:
             return ResponseHandler.error("Institute not found", 404)
 
-        # Check if user is admin
-        admin_role = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.institute_id == institute_id,
-                RoleModel.user_id == user_id,
-                RoleModel.role == UserRoleEnum.admin,
-            )
-            .first()
-        )
-
-        if not admin_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
         institute.name = data.get("name", institute.name)
         s.commit()
 
@@ -156,16 +127,12 @@ def update_institute(institute_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @institute_bp.route("/api/v1/institutes/<int:institute_id>", methods=["DELETE"])
 @jwt_required()
+@require_role(UserRoleEnum.admin, institute_arg="institute_id")
 def delete_institute(institute_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
@@ -174,32 +141,17 @@ def delete_institute(institute_id):
         if not institute:
             return ResponseHandler.error("Institute not found", 404)
 
-        # Check if user is admin
-        admin_role = (
-            s.query(RoleModel)
-            .filter(
-                RoleModel.institute_id == institute_id,
-                RoleModel.user_id == user_id,
-                RoleModel.role == UserRoleEnum.admin,
-            )
-            .first()
-        )
-
-        if not admin_role:
-            return ResponseHandler.error("Unauthorized user", 403)
-
         # For now, delete manually all the role instead of using cascade delete
         roles = s.query(RoleModel).filter(RoleModel.institute_id == institute_id).all()
+        affected_user_ids = {role.user_id for role in roles}
         for role in roles:
             s.delete(role)
 
         s.delete(institute)
         s.commit()
+        invalidate_user_roles(*affected_user_ids)
 
         return ResponseHandler.success(message="Institute deleted successfully")
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
-
-    finally:
-        s.close()
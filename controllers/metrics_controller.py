@@ -0,0 +1,20 @@
+import hmac
+from flask import Blueprint, request
+
+from config.config import Config
+from utils.handle_response import ResponseHandler
+from utils.metrics import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/api/v1/internal/metrics", methods=["GET"])
+def get_metrics():
+    if not Config.METRICS_TOKEN:
+        return ResponseHandler.error("Metrics endpoint is disabled", 404)
+
+    token = request.headers.get("X-Metrics-Token", "")
+    if not hmac.compare_digest(token, Config.METRICS_TOKEN):
+        return ResponseHandler.error("Unauthorized user", 403)
+
+    return ResponseHandler.success(metrics.snapshot(), "Metrics retrieved successfully")
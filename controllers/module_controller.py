@@ -1,15 +1,18 @@
 from flask import Blueprint
 from flask_jwt_extended import jwt_required
-from connector.mysql_connectors import connect_db
-from sqlalchemy.orm import sessionmaker
+from connector.mysql_connectors import get_session
 from models import ModuleModel, AssessmentModel, RoleModel, CourseModel
 from utils.handle_response import ResponseHandler
-from flask import Blueprint, request
+from utils.pagination import paginate, PaginationError
+from utils.fieldsets import requested_fields, load_fields, field_options, to_fields, FieldsError
+from utils.conditional import list_validators, record_validators, is_not_modified, validator_headers
+from utils.authorization import require_role
+from flask import Blueprint, request, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from enums.enum import UserRoleEnum
 from cerberus import Validator
 from schemas.module_schema import create_module_schema, update_module_schema
-from services.upload import UploadFiles
+from services.upload import UploadFiles, streamed_upload
 from werkzeug.datastructures import FileStorage
 from flask_cors import cross_origin
 
@@ -19,8 +22,7 @@ module_bp = Blueprint("module", __name__)
 @module_bp.route("/api/v1/modules/<int:module_id>/assessments", methods=["GET"])
 @jwt_required()
 def get_module_assessments(module_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
+    s = get_session()
 
     try:
         module = s.get(ModuleModel, module_id)
@@ -29,23 +31,39 @@ def get_module_assessments(module_id):
             return ResponseHandler.error("Module not found", 404)
 
         # Retrieve assessments for the given module
-        assessments = s.query(AssessmentModel).filter_by(module_id=module_id).all()
+        fields = requested_fields(AssessmentModel)
+        assessments_query = s.query(AssessmentModel).filter_by(module_id=module_id)
+
+        validators = list_validators(assessments_query, AssessmentModel.updated_at)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        assessments, page = paginate(
+            load_fields(assessments_query, AssessmentModel, fields),
+            AssessmentModel.id,
+            filters={"type": AssessmentModel.type},
+            date_column=AssessmentModel.created_at,
+        )
 
-        assessments_data = [assessment.to_dictionaries() for assessment in assessments]
+        assessments_data = [to_fields(assessment, fields) for assessment in assessments]
 
-        return ResponseHandler.success({"assessments": assessments_data}, "Assessments retrieved successfully")
+        return ResponseHandler.success(
+            {"assessments": assessments_data, "page": page},
+            "Assessments retrieved successfully",
+            headers=validator_headers(validators),
+        )
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
-    finally:
-        s.close()
 
 
 @module_bp.route("/api/v1/courses/<int:course_id>/modules", methods=["POST"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
+@streamed_upload("module_file")
 def create_module(course_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.form.to_dict()  # Change to form data to handle file upload
@@ -57,12 +75,7 @@ def create_module(course_id):
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
 
-        # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.instructor).first()
-        )
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
+        instructor_role = g.current_role
 
         # Check if course is available and belongs to the instructor
         course = (
@@ -95,26 +108,17 @@ def create_module(course_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @module_bp.route("/api/v1/courses/<int:course_id>/modules", methods=["GET"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def get_all_modules(course_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
 
-        # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.instructor).first()
-        )
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
+        instructor_role = g.current_role
 
         # Check if course is available and belongs to the instructor
         course = (
@@ -123,25 +127,36 @@ def get_all_modules(course_id):
         if not course:
             return ResponseHandler.error("Course not found or belongs to other instructor", 403)
 
-        modules = s.query(ModuleModel).filter(ModuleModel.course_id == course.id).all()
+        fields = requested_fields(ModuleModel)
+        modules_query = s.query(ModuleModel).filter(ModuleModel.course_id == course.id)
+
+        validators = list_validators(modules_query, ModuleModel.updated_at)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        modules, page = paginate(
+            load_fields(modules_query, ModuleModel, fields),
+            ModuleModel.id,
+            date_column=ModuleModel.created_at,
+        )
 
         return ResponseHandler.success(
-            {"modules": [module.to_dictionaries() for module in modules]}, "Modules retrieved successfully"
+            {"modules": [to_fields(module, fields) for module in modules], "page": page},
+            "Modules retrieved successfully",
+            headers=validator_headers(validators),
         )
 
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
+
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @module_bp.route("/api/v1/courses/<int:course_id>/modules/<int:module_id>", methods=["GET"])
 @jwt_required()
 def get_module_by_id(course_id, module_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         # Check if course is available and belongs to the instructor
@@ -149,25 +164,36 @@ def get_module_by_id(course_id, module_id):
         if not course:
             return ResponseHandler.error("Course not found", 404)
 
-        module = s.query(ModuleModel).filter(ModuleModel.id == module_id, ModuleModel.course_id == course.id).first()
+        fields = requested_fields(ModuleModel)
+        module = load_fields(
+            s.query(ModuleModel).filter(ModuleModel.id == module_id, ModuleModel.course_id == course.id),
+            ModuleModel,
+            fields,
+        ).first()
         if not module:
             return ResponseHandler.error("Module not found", 404)
 
-        return ResponseHandler.success(module.to_dictionaries(), "Module retrieved successfully")
+        validators = record_validators(module)
+        if is_not_modified(validators):
+            return ResponseHandler.not_modified(validator_headers(validators))
+
+        return ResponseHandler.success(
+            to_fields(module, fields), "Module retrieved successfully", headers=validator_headers(validators)
+        )
+
+    except FieldsError as e:
+        return ResponseHandler.error(str(e), 400)
 
     except Exception as e:
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @module_bp.route("/api/v1/courses/<int:course_id>/modules/<int:module_id>", methods=["PATCH"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
+@streamed_upload("module_file")
 def update_module(course_id, module_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         data = request.form.to_dict()
@@ -180,13 +206,7 @@ def update_module(course_id, module_id):
         if not validator.validate(data):
             return ResponseHandler.error("Validation error", 400, validator.errors)
 
-        # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.instructor).first()
-        )
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
+        instructor_role = g.current_role
 
         # Check if course is available and belongs to the instructor
         course = (
@@ -224,26 +244,16 @@ def update_module(course_id, module_id):
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 
 @module_bp.route("/api/v1/courses/<int:course_id>/modules/<int:module_id>", methods=["DELETE"])
 @jwt_required()
+@require_role(UserRoleEnum.instructor)
 def delete_module(course_id, module_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
-        # Check if user is instructor
-        instructor_role = (
-            s.query(RoleModel).filter(RoleModel.user_id == user_id, RoleModel.role == UserRoleEnum.instructor).first()
-        )
-
-        if not instructor_role:
-            return ResponseHandler.error("Unauthorized user", 403)
+        instructor_role = g.current_role
 
         # Check if course is available and belongs to the instructor
         course = (
@@ -264,6 +274,3 @@ def delete_module(course_id, module_id):
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
-
-    finally:
-        s.close()
@@ -1,93 +1,93 @@
 from flask import Blueprint, request
-from sqlalchemy.orm import sessionmaker
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from connector.mysql_connectors import connect_db
+from connector.mysql_connectors import get_session, read_only
 from models import RoleModel, SubmissionModel
 from enums.enum import RoleStatusEnum, UserRoleEnum
 from utils.handle_response import ResponseHandler
+from utils.authorization import find_role, find_roles, require_role
+from utils.pagination import paginate, PaginationError
+from utils.fieldsets import requested_fields, load_fields, field_options, to_fields, FieldsError
+from services.submission_ingest import submission_ingestor, receipt_age
+from config.config import Config
 
 submission_bp = Blueprint("submission", __name__)
 
 @submission_bp.route("/api/v1/submissions/me", methods=["GET"])
 @jwt_required()
+@read_only
 def get_my_submmissions():
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
 
         # Fetch roles associated with the current user
-        roles = s.query(RoleModel).filter(
-                    RoleModel.user_id == user_id,
-                    RoleModel.role == UserRoleEnum.student,
-                    RoleModel.status == RoleStatusEnum.active
-                ).all()
+        roles = find_roles(s, user_id, UserRoleEnum.student, status=RoleStatusEnum.active)
 
         # Fetch submissions for these roles
-        submissions = s.query(SubmissionModel).filter(
-            SubmissionModel.role_id.in_([role.id for role in roles])
-        ).all()
+        fields = requested_fields(SubmissionModel)
+        submissions, page = paginate(
+            load_fields(
+                s.query(SubmissionModel).filter(SubmissionModel.role_id.in_([role.id for role in roles])),
+                SubmissionModel,
+                fields,
+            ),
+            SubmissionModel.id,
+            filters={"assessment_id": SubmissionModel.assessment_id},
+            date_column=SubmissionModel.submitted_at,
+        )
 
         if not submissions:
             return ResponseHandler.success(
-                {"submissions": []}, "No submissions found"
+                {"submissions": [], "page": page}, "No submissions found"
             )
 
-        # Return all the submissions
+        # Return the page of submissions
         return ResponseHandler.success(
-            {"submissions": [submission.to_dictionaries() for submission in submissions]},
+            {"submissions": [to_fields(submission, fields) for submission in submissions], "page": page},
             "Student's submissions retrieved successfully",
         )
 
+    except (PaginationError, FieldsError) as e:
+        return ResponseHandler.error(str(e), 400)
+
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @submission_bp.route("/api/v1/submissions/<int:submission_id>", methods=["GET"])
 @jwt_required()
 def get_submission_by_id(submission_id):
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         # Fetch submissions by id
-        submission = s.get(SubmissionModel, submission_id)
+        fields = requested_fields(SubmissionModel)
+        submission = s.get(SubmissionModel, submission_id, options=field_options(SubmissionModel, fields))
 
         if not submission:
             return ResponseHandler.success(
                 {"submissions": []}, "No submissions found"
             )
-        return ResponseHandler.success(submission.to_dictionaries(), "Submission retrieved successfully")
+        return ResponseHandler.success(to_fields(submission, fields), "Submission retrieved successfully")
+
+    except FieldsError as e:
+        return ResponseHandler.error(str(e), 400)
 
     except Exception as e:
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
-
 @submission_bp.route("/api/v1/submissions/me/assessment/<int:assessment_id>", methods=["GET"])
 @jwt_required()
 def get_my_submission_by_assessment_id(assessment_id):  # Fixed parameter name
-    Session = sessionmaker(bind=connect_db())
-    s = Session()
-    s.begin()
+    s = get_session()
 
     try:
         user_id = get_jwt_identity()
 
         # Fetch roles associated with the current user
-        roles = s.query(RoleModel).filter(
-            RoleModel.user_id == user_id,
-            RoleModel.role == UserRoleEnum.student,
-            RoleModel.status == RoleStatusEnum.active
-        ).all()  # Fixed unclosed parenthesis
+        roles = find_roles(s, user_id, UserRoleEnum.student, status=RoleStatusEnum.active)
 
         # Fetch submission by id
         submission = s.query(SubmissionModel).filter(
@@ -110,5 +110,47 @@ def get_my_submission_by_assessment_id(assessment_id):  # Fixed parameter name
         s.rollback()
         return ResponseHandler.error(str(e), 500)
 
-    finally:
-        s.close()
\ No newline at end of file
+
+@submission_bp.route("/api/v1/submissions/receipts/<receipt>", methods=["GET"])
+@jwt_required()
+@require_role(UserRoleEnum.student)
+def get_submission_by_receipt(receipt):
+    s = get_session()
+
+    try:
+        user_id = get_jwt_identity()
+
+        # Queued in this worker
+        role_id = submission_ingestor.pending.get(receipt)
+        if role_id is not None:
+            if not find_role(s, user_id, UserRoleEnum.student, role_id=role_id):
+                return ResponseHandler.error("Receipt not found", 404)
+            return ResponseHandler.success({"receipt": receipt, "status": "pending"}, "Submission is queued")
+
+        # Looked up before failures, a batch retried after an unclear commit may report committed rows as duplicates
+        submission = s.query(SubmissionModel).filter_by(receipt=receipt).first()
+        if submission:
+            if not find_role(s, user_id, UserRoleEnum.student, role_id=submission.role_id):
+                return ResponseHandler.error("Receipt not found", 404)
+            return ResponseHandler.success(
+                {"receipt": receipt, "status": "committed", "submission": submission.to_dictionaries()},
+                "Submission committed",
+            )
+
+        failure = submission_ingestor.failed.get(receipt)
+        if failure is not None:
+            role_id, error = failure
+            if not find_role(s, user_id, UserRoleEnum.student, role_id=role_id):
+                return ResponseHandler.error("Receipt not found", 404)
+            return ResponseHandler.success({"receipt": receipt, "status": "failed", "error": error}, "Submission failed")
+
+        # Possibly still queued in another worker
+        age = receipt_age(receipt)
+        if age is not None and 0 <= age < Config.SUBMISSION_RECEIPT_PENDING_SECONDS:
+            return ResponseHandler.success({"receipt": receipt, "status": "pending"}, "Submission is queued")
+
+        return ResponseHandler.error("Receipt not found", 404)
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
@@ -0,0 +1,403 @@
+import hashlib
+from datetime import timedelta
+
+from flask import Blueprint, request, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from cerberus import Validator
+
+from config.config import Config
+from connector.mysql_connectors import get_session
+from enums.enum import UserRoleEnum, UploadStatusEnum
+from models import CourseModel, ModuleModel, UserModel, SubmissionModel, UploadSessionModel, UploadChunkModel
+from models.upload_session import gmt_plus_7_now
+from schemas.upload_schema import presign_upload_schema, complete_upload_schema, init_chunked_upload_schema
+from services.upload import UploadFiles, SNIFF_BYTES, sniff_content_type
+from services.image_variants import image_variants
+from services.storage import storage, LocalStorageBackend, MB
+from sqlalchemy.exc import IntegrityError
+from utils.authorization import find_role, find_roles
+from utils.fieldsets import to_dictionary
+from utils.handle_response import ResponseHandler
+from utils.request_limits import max_content_length
+
+upload_bp = Blueprint("upload", __name__)
+
+# Upload target -> (model, column receiving the file URL)
+UPLOAD_TARGETS = {
+    "course_media": (CourseModel, "media"),
+    "module_file": (ModuleModel, "module_file"),
+    "profile_pict": (UserModel, "profile_pict"),
+    "submission_file": (SubmissionModel, "file"),
+}
+
+# Targets whose videos may be uploaded in chunks up to MAX_CHUNKED_UPLOAD_MB
+CHUNKED_VIDEO_TARGETS = {"course_media", "module_file"}
+
+
+def find_upload_target(s, user_id, target, target_id):
+    """Return the record the file will be attached to, or an error response when the user may not change it."""
+    if target == "profile_pict":
+        user = s.get(UserModel, user_id)
+        return (user, None) if user else (None, ResponseHandler.error("User not found", 404))
+
+    if target_id is None:
+        return None, ResponseHandler.error("Validation error", 400, {"target_id": ["required field"]})
+
+    model, _ = UPLOAD_TARGETS[target]
+    record = s.get(model, target_id)
+    if not record:
+        return None, ResponseHandler.error("Upload target not found", 404)
+
+    # Same ownership rules as the endpoints that update these records
+    if target == "course_media":
+        allowed = find_role(s, user_id, UserRoleEnum.instructor, institute_id=record.institute_id)
+    elif target == "module_file":
+        instructor_role_ids = {role.id for role in find_roles(s, user_id, UserRoleEnum.instructor)}
+        allowed = s.get(CourseModel, record.course_id).role_id in instructor_role_ids
+    else:
+        allowed = find_role(s, user_id, UserRoleEnum.student, role_id=record.role_id)
+
+    if not allowed:
+        return None, ResponseHandler.error("Unauthorized user", 403)
+    return record, None
+
+
+def upload_prefix(user_id, target, target_id):
+    return f"uploads/{target}/{user_id if target == 'profile_pict' else target_id}"
+
+
+def chunked_upload_limit(target, filename):
+    """Largest file a chunked upload may carry, every other file keeps the form upload limit."""
+    if target in CHUNKED_VIDEO_TARGETS and UploadFiles().content_type(filename) == "video/mp4":
+        return Config.MAX_CHUNKED_UPLOAD_MB * MB
+    return UploadFiles.MAX_FILE_SIZE
+
+
+def attach_upload(s, record, target, key, max_size, upload=None):
+    """
+    Check the stored object and save its URL on the target record.
+
+    A chunked `upload` is marked completed in the same commit, so it can be completed again
+    when the file could not be attached.
+    """
+    upload_files = UploadFiles()
+    head = storage.head(key)
+    if head is None:
+        return ResponseHandler.error("File has not been uploaded", 404)
+    if head["size"] > max_size:
+        return ResponseHandler.error("File size exceeds limit", 400)
+    if not upload_files.allowed_file(key) or head["content_type"] != upload_files.content_type(key):
+        return ResponseHandler.error("File type not allowed", 400)
+    # The declared type is chosen by the client, check the bytes as well
+    if sniff_content_type(storage.read_prefix(key, SNIFF_BYTES)) != head["content_type"]:
+        return ResponseHandler.error("File content does not match its extension", 400)
+
+    _, column = UPLOAD_TARGETS[target]
+    setattr(record, column, storage.url(key))
+    if upload is not None:
+        upload.status = UploadStatusEnum.completed
+    s.commit()
+
+    if head["content_type"].startswith("image/"):
+        image_variants.submit(key)
+
+    return ResponseHandler.success(to_dictionary(record), "Upload completed successfully")
+
+
+@upload_bp.route("/api/v1/uploads", methods=["POST"])
+@jwt_required()
+def create_upload():
+    s = get_session()
+
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        validator = Validator(presign_upload_schema)
+        if not validator.validate(data):
+            return ResponseHandler.error("Validation error", 400, validator.errors)
+
+        upload_files = UploadFiles()
+        if not upload_files.allowed_file(data["filename"]):
+            return ResponseHandler.error("File type not allowed", 400)
+        if data["size"] > upload_files.MAX_FILE_SIZE:
+            return ResponseHandler.error("File size exceeds limit", 400)
+
+        _, error = find_upload_target(s, user_id, data["target"], data.get("target_id"))
+        if error:
+            return error
+
+        # The file goes straight from the client to storage, the worker only signs the request
+        content_type = upload_files.content_type(data["filename"])
+        key = upload_files.direct_upload_key(
+            upload_prefix(user_id, data["target"], data.get("target_id")), data["filename"]
+        )
+        url = storage.presign_put(key, content_type, data["size"], Config.UPLOAD_URL_EXPIRES_SECONDS)
+
+        return ResponseHandler.success(
+            {
+                "key": key,
+                "url": url,
+                "method": "PUT",
+                "headers": {"Content-Type": content_type, "Content-Length": str(data["size"])},
+                "expires_in": Config.UPLOAD_URL_EXPIRES_SECONDS,
+            },
+            "Upload URL created successfully",
+            201,
+        )
+
+    except Exception as e:
+        return ResponseHandler.error(str(e), 500)
+
+
+@upload_bp.route("/api/v1/uploads/complete", methods=["POST"])
+@jwt_required()
+def complete_upload():
+    s = get_session()
+
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        validator = Validator(complete_upload_schema)
+        if not validator.validate(data):
+            return ResponseHandler.error("Validation error", 400, validator.errors)
+
+        record, error = find_upload_target(s, user_id, data["target"], data.get("target_id"))
+        if error:
+            return error
+
+        # Only keys issued for this user and record can be attached
+        key = data["key"]
+        if not key.startswith(upload_prefix(user_id, data["target"], data.get("target_id")) + "/"):
+            return ResponseHandler.error("Upload key does not belong to this target", 403)
+
+        return attach_upload(s, record, data["target"], key, UploadFiles.MAX_FILE_SIZE)
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
+
+
+def find_upload_session(s, user_id, upload_id):
+    upload = s.get(UploadSessionModel, upload_id)
+    if not upload or upload.user_id != int(user_id):
+        return None, ResponseHandler.error("Upload not found", 404)
+    if upload.status != UploadStatusEnum.in_progress:
+        return None, ResponseHandler.error(f"Upload is {upload.status.name}", 409)
+    if upload.expires_at < gmt_plus_7_now():
+        return None, ResponseHandler.error("Upload has expired", 410)
+    return upload, None
+
+
+@upload_bp.route("/api/v1/uploads/chunked", methods=["POST"])
+@jwt_required()
+def create_chunked_upload():
+    s = get_session()
+
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        validator = Validator(init_chunked_upload_schema)
+        if not validator.validate(data):
+            return ResponseHandler.error("Validation error", 400, validator.errors)
+
+        upload_files = UploadFiles()
+        if not upload_files.allowed_file(data["filename"]):
+            return ResponseHandler.error("File type not allowed", 400)
+        if data["size"] > chunked_upload_limit(data["target"], data["filename"]):
+            return ResponseHandler.error("File size exceeds limit", 400)
+
+        _, error = find_upload_target(s, user_id, data["target"], data.get("target_id"))
+        if error:
+            return error
+
+        content_type = upload_files.content_type(data["filename"])
+        key = upload_files.direct_upload_key(
+            upload_prefix(user_id, data["target"], data.get("target_id")), data["filename"]
+        )
+
+        # Chunks become the parts of a storage multipart upload, nothing is assembled by the worker
+        upload = UploadSessionModel(
+            user_id=user_id,
+            target=data["target"],
+            target_id=data.get("target_id"),
+            filename=data["filename"],
+            content_type=content_type,
+            size=data["size"],
+            chunk_size=Config.UPLOAD_CHUNK_SIZE_MB * MB,
+            key=key,
+            storage_upload_id=storage.start_multipart(key, content_type),
+            expires_at=gmt_plus_7_now() + timedelta(hours=Config.UPLOAD_SESSION_HOURS),
+        )
+        s.add(upload)
+        s.commit()
+
+        return ResponseHandler.success(upload.to_dictionaries(), "Upload started successfully", 201)
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
+
+
+@upload_bp.route("/api/v1/uploads/chunked/<int:upload_id>", methods=["GET"])
+@jwt_required()
+def get_chunked_upload(upload_id):
+    s = get_session()
+
+    try:
+        # Lets a client resume after a disconnect by sending only the missing chunks
+        upload = s.get(UploadSessionModel, upload_id)
+        if not upload or upload.user_id != int(get_jwt_identity()):
+            return ResponseHandler.error("Upload not found", 404)
+
+        return ResponseHandler.success(upload.to_dictionaries(), "Upload retrieved successfully")
+
+    except Exception as e:
+        return ResponseHandler.error(str(e), 500)
+
+
+@upload_bp.route("/api/v1/uploads/chunked/<int:upload_id>/chunks/<int:number>", methods=["PUT"])
+@max_content_length(Config.UPLOAD_CHUNK_SIZE_MB * MB)
+@jwt_required()
+def put_upload_chunk(upload_id, number):
+    s = get_session()
+
+    try:
+        upload, error = find_upload_session(s, get_jwt_identity(), upload_id)
+        if error:
+            return error
+
+        if not 1 <= number <= upload.total_chunks:
+            return ResponseHandler.error("Chunk number out of range", 400)
+
+        checksum = request.headers.get("X-Chunk-SHA256", "").lower()
+        if not checksum:
+            return ResponseHandler.error("X-Chunk-SHA256 header is required", 400)
+
+        # At most one chunk is held in memory, read in small pieces while hashing
+        data = bytearray()
+        sha256 = hashlib.sha256()
+        for piece in iter(lambda: request.stream.read(64 * 1024), b""):
+            sha256.update(piece)
+            data += piece
+
+        if len(data) != upload.chunk_length(number):
+            return ResponseHandler.error(f"Chunk {number} must be {upload.chunk_length(number)} bytes", 400)
+        if sha256.hexdigest() != checksum:
+            return ResponseHandler.error("Chunk checksum mismatch", 400)
+        if number == 1 and sniff_content_type(bytes(data[:SNIFF_BYTES])) != upload.content_type:
+            return ResponseHandler.error("File content does not match its extension", 400)
+
+        part = storage.upload_part(upload.key, upload.storage_upload_id, number, bytes(data))
+
+        # A retried chunk replaces the previous attempt
+        chunk = s.query(UploadChunkModel).filter_by(upload_session_id=upload.id, number=number).first()
+        if not chunk:
+            chunk = UploadChunkModel(upload_session_id=upload.id, number=number)
+            s.add(chunk)
+        chunk.size = len(data)
+        chunk.checksum = checksum
+        chunk.etag = part.get("ETag")
+        s.commit()
+
+        return ResponseHandler.success({"number": number, "size": chunk.size}, "Chunk uploaded successfully")
+
+    except IntegrityError:
+        s.rollback()
+        return ResponseHandler.error("Chunk is being uploaded by another request", 409)
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
+
+
+@upload_bp.route("/api/v1/uploads/chunked/<int:upload_id>/complete", methods=["POST"])
+@jwt_required()
+def complete_chunked_upload(upload_id):
+    s = get_session()
+
+    try:
+        user_id = get_jwt_identity()
+        upload, error = find_upload_session(s, user_id, upload_id)
+        if error:
+            return error
+
+        received = {chunk.number for chunk in upload.chunks}
+        missing = [number for number in range(1, upload.total_chunks + 1) if number not in received]
+        if missing:
+            return ResponseHandler.error("Upload is missing chunks", 400, {"missing_chunks": missing})
+
+        record, error = find_upload_target(s, user_id, upload.target, upload.target_id)
+        if error:
+            return error
+
+        # Already assembled when an earlier attempt failed to attach the file
+        if storage.head(upload.key) is None:
+            storage.complete_multipart(
+                upload.key,
+                upload.storage_upload_id,
+                [{"ETag": chunk.etag, "PartNumber": chunk.number} for chunk in upload.chunks],
+            )
+
+        return attach_upload(
+            s, record, upload.target, upload.key, chunked_upload_limit(upload.target, upload.filename), upload
+        )
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
+
+
+@upload_bp.route("/api/v1/uploads/chunked/<int:upload_id>", methods=["DELETE"])
+@jwt_required()
+def abort_chunked_upload(upload_id):
+    s = get_session()
+
+    try:
+        upload, error = find_upload_session(s, get_jwt_identity(), upload_id)
+        if error:
+            return error
+
+        storage.abort_multipart(upload.key, upload.storage_upload_id)
+        upload.status = UploadStatusEnum.aborted
+        s.commit()
+
+        return ResponseHandler.success(None, "Upload aborted successfully")
+
+    except Exception as e:
+        s.rollback()
+        return ResponseHandler.error(str(e), 500)
+
+
+@upload_bp.route("/api/v1/files/<path:key>", methods=["GET"])
+def get_local_file(key):
+    # Only used with the local storage backend, R2 files are served from the bucket's domain
+    if not isinstance(storage, LocalStorageBackend):
+        return ResponseHandler.error("File not found", 404)
+
+    try:
+        return send_file(storage.path(key), max_age=31536000, conditional=True)
+    except (FileNotFoundError, ValueError):
+        return ResponseHandler.error("File not found", 404)
+
+
+@upload_bp.route("/api/v1/files/<path:key>", methods=["PUT"])
+def put_local_file(key):
+    if not isinstance(storage, LocalStorageBackend):
+        return ResponseHandler.error("File not found", 404)
+
+    try:
+        content_type = request.content_type or ""
+        size = request.content_length or 0
+        if not storage.verify_put(
+            key, content_type, size, request.args.get("expires", 0), request.args.get("signature", "")
+        ):
+            return ResponseHandler.error("Invalid or expired upload URL", 403)
+
+        storage.put_stream(key, request.stream, content_type)
+        return ResponseHandler.success(None, "File uploaded successfully")
+
+    except ValueError as e:
+        return ResponseHandler.error(str(e), 400)
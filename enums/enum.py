@@ -22,3 +22,17 @@ class EnrollStatusEnum(Enum):
     passed = 1
     pending = 2
     accepted = 3
+
+
+class UploadStatusEnum(Enum):
+    in_progress = 1
+    completed = 2
+    aborted = 3
+
+
+class RegradeStatusEnum(Enum):
+    queued = 1
+    running = 2
+    completed = 3
+    failed = 4
+    superseded = 5
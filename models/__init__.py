@@ -8,3 +8,9 @@ from models.assessment import AssessmentModel
 from models.assessment_detail import AssessmentDetailModel
 from models.enrollment import EnrollmentModel
 from models.submission import SubmissionModel
+from models.revoked_token import RevokedTokenModel
+from models.recent_write import RecentWriteModel
+from models.claims_version import ClaimsVersionModel
+from models.stored_file import StoredFileModel
+from models.upload_session import UploadSessionModel, UploadChunkModel
+from models.regrade_job import RegradeJobModel
@@ -1,6 +1,7 @@
 from db import db
 from sqlalchemy.orm import mapped_column, relationship
 from sqlalchemy import Integer, DateTime, ForeignKey, Enum
+from sqlalchemy.dialects import mysql
 from datetime import datetime, timedelta
 from enums.enum import AssesmentTypeEnum
 
@@ -15,7 +16,13 @@ class AssessmentModel(db.Model):
     module_id = mapped_column(Integer, ForeignKey("modules.id"), unique=False, nullable=False)
     type = mapped_column(Enum(AssesmentTypeEnum), default=AssesmentTypeEnum.choices, unique=False, nullable=False)
     created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
-    updated_at = mapped_column(DateTime, default=gmt_plus_7_now, onupdate=gmt_plus_7_now, nullable=False)
+    # Microseconds on MySQL too, max(updated_at) tells edits made within the same second apart for list ETags
+    updated_at = mapped_column(
+        DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+        default=gmt_plus_7_now,
+        onupdate=gmt_plus_7_now,
+        nullable=False,
+    )
 
     assessment_detail = relationship("AssessmentDetailModel", backref="assessment", lazy=True, uselist=False)
     submission = relationship("SubmissionModel", backref="assessment", lazy=True)
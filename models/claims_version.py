@@ -0,0 +1,13 @@
+from db import db
+from sqlalchemy.orm import mapped_column
+from sqlalchemy import Integer
+
+
+class ClaimsVersionModel(db.Model):
+    __tablename__ = "claims_versions"
+
+    user_id = mapped_column(Integer, primary_key=True, autoincrement=False)
+    version = mapped_column(Integer, nullable=False)  # bumped on every role change, compared to the token's `ver` claim
+
+    def __repr__(self):
+        return f"<Claims Version {self.user_id}>"
@@ -1,6 +1,7 @@
 from db import db
 from sqlalchemy.orm import mapped_column, relationship
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, JSON, event
+from sqlalchemy.dialects import mysql
 from datetime import datetime, timedelta
 
 
@@ -18,8 +19,15 @@ class CourseModel(db.Model):
     description = mapped_column(Text, unique=False, nullable=False)
     category = mapped_column(String(255), unique=False, nullable=False)
     media = mapped_column(String(255), unique=False, nullable=False)  # this column is to store url of the media
+    media_variants = mapped_column(JSON, unique=False, nullable=True)  # resized copies, filled in once generated
     created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
-    updated_at = mapped_column(DateTime, default=gmt_plus_7_now, onupdate=gmt_plus_7_now, nullable=False)
+    # Microseconds on MySQL too, max(updated_at) tells edits made within the same second apart for list ETags
+    updated_at = mapped_column(
+        DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+        default=gmt_plus_7_now,
+        onupdate=gmt_plus_7_now,
+        nullable=False,
+    )
 
     module = relationship("ModuleModel", backref="course", lazy=True)
     enrollment = relationship("EnrollmentModel", backref="course", lazy=True)
@@ -36,6 +44,14 @@ class CourseModel(db.Model):
             "description": self.description,
             "category": self.category,
             "media": self.media,
+            "media_variants": self.media_variants,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
+
+
+@event.listens_for(CourseModel.media, "set")
+def _reset_media_variants(target, value, oldvalue, initiator):
+    # Variants of the previous media; those of the new one are saved when generated
+    if value != oldvalue:
+        target.media_variants = None
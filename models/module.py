@@ -1,6 +1,7 @@
 from db import db
 from sqlalchemy.orm import mapped_column, relationship
 from sqlalchemy import String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy.dialects import mysql
 from datetime import datetime, timedelta
 
 
@@ -17,7 +18,13 @@ class ModuleModel(db.Model):
     content = mapped_column(Text, unique=False, nullable=False)
     module_file = mapped_column(String(255), unique=False, nullable=True)  # to store url file (optional)
     created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
-    updated_at = mapped_column(DateTime, default=gmt_plus_7_now, onupdate=gmt_plus_7_now, nullable=False)
+    # Microseconds on MySQL too, max(updated_at) tells edits made within the same second apart for list ETags
+    updated_at = mapped_column(
+        DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+        default=gmt_plus_7_now,
+        onupdate=gmt_plus_7_now,
+        nullable=False,
+    )
 
     assessment = relationship("AssessmentModel", backref="module", lazy=True)
 
@@ -0,0 +1,13 @@
+from db import db
+from sqlalchemy.orm import mapped_column
+from sqlalchemy import Integer, BigInteger
+
+
+class RecentWriteModel(db.Model):
+    __tablename__ = "recent_writes"
+
+    user_id = mapped_column(Integer, primary_key=True, autoincrement=False)
+    until = mapped_column(BigInteger, nullable=False)  # unix time the user's reads may go to a replica again
+
+    def __repr__(self):
+        return f"<Recent Write {self.user_id}>"
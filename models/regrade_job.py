@@ -0,0 +1,41 @@
+from db import db
+from sqlalchemy.orm import mapped_column
+from sqlalchemy import Integer, DateTime, ForeignKey, Enum, Text
+from datetime import datetime, timedelta
+from enums.enum import RegradeStatusEnum
+
+
+def gmt_plus_7_now():
+    return datetime.utcnow() + timedelta(hours=7)
+
+
+class RegradeJobModel(db.Model):
+    __tablename__ = "regrade_jobs"
+
+    id = mapped_column(Integer, primary_key=True)
+    assessment_id = mapped_column(Integer, ForeignKey("assessments.id"), unique=False, nullable=False)
+    role_id = mapped_column(Integer, ForeignKey("roles.id"), unique=False, nullable=False)  # instructor who started it
+    status = mapped_column(Enum(RegradeStatusEnum), default=RegradeStatusEnum.queued, unique=False, nullable=False)
+    total = mapped_column(Integer, default=0, unique=False, nullable=False)  # submissions to re-grade
+    processed = mapped_column(Integer, default=0, unique=False, nullable=False)
+    error = mapped_column(Text, unique=False, nullable=True)
+    created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
+    updated_at = mapped_column(DateTime, default=gmt_plus_7_now, onupdate=gmt_plus_7_now, nullable=False)
+    finished_at = mapped_column(DateTime, unique=False, nullable=True)
+
+    def __repr__(self):
+        return f"<Regrade Job {self.id}>"
+
+    def to_dictionaries(self):
+        return {
+            "id": self.id,
+            "assessment_id": self.assessment_id,
+            "status": self.status.name,
+            "total": self.total,
+            "processed": self.processed,
+            "progress": round(self.processed / self.total * 100, 1) if self.total else 0,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "finished_at": self.finished_at,
+        }
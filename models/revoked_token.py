@@ -0,0 +1,14 @@
+from db import db
+from sqlalchemy.orm import mapped_column
+from sqlalchemy import String, Integer, BigInteger
+
+
+class RevokedTokenModel(db.Model):
+    __tablename__ = "revoked_tokens"
+
+    id = mapped_column(Integer, primary_key=True)
+    jti = mapped_column(String(64), unique=True, nullable=False)
+    expires_at = mapped_column(BigInteger, index=True, nullable=False)  # unix time of the token's `exp` claim
+
+    def __repr__(self):
+        return f"<Revoked Token {self.id}>"
@@ -0,0 +1,22 @@
+from db import db
+from sqlalchemy.orm import mapped_column
+from sqlalchemy import String, Integer, BigInteger, DateTime
+from datetime import datetime, timedelta
+
+
+def gmt_plus_7_now():
+    return datetime.utcnow() + timedelta(hours=7)
+
+
+class StoredFileModel(db.Model):
+    __tablename__ = "stored_files"
+
+    id = mapped_column(Integer, primary_key=True)
+    digest = mapped_column(String(64), unique=True, nullable=False)  # sha256 of the file content, hex encoded
+    key = mapped_column(String(255), unique=False, nullable=False)  # object key in the bucket
+    size = mapped_column(BigInteger, unique=False, nullable=False)
+    content_type = mapped_column(String(100), unique=False, nullable=False)
+    created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
+
+    def __repr__(self):
+        return f"<Stored File {self.id}>"
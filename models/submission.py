@@ -1,6 +1,6 @@
 from db import db
 from sqlalchemy.orm import mapped_column
-from sqlalchemy import Integer, DateTime, ForeignKey, String, JSON
+from sqlalchemy import Integer, DateTime, ForeignKey, String, JSON, Boolean, UniqueConstraint
 from datetime import datetime, timedelta
 
 
@@ -10,6 +10,10 @@ def gmt_plus_7_now():
 
 class SubmissionModel(db.Model):
     __tablename__ = "submissions"
+    __table_args__ = (
+        UniqueConstraint("assessment_id", "role_id", name="uq_submissions_assessment_role"),
+        UniqueConstraint("receipt", name="uq_submissions_receipt"),
+    )
 
     id = mapped_column(Integer, primary_key=True)
     assessment_id = mapped_column(Integer, ForeignKey("assessments.id"), unique=False, nullable=False)
@@ -17,10 +21,14 @@ class SubmissionModel(db.Model):
     score = mapped_column(
         Integer, unique=False, nullable=True
     )  # to store score, automatically generated if the assessment type is multiple choices
+    score_overridden = mapped_column(
+        Boolean, default=False, server_default="0", unique=False, nullable=False
+    )  # set by an instructor through the grade endpoint, re-grades leave the score alone
     answer = mapped_column(
         JSON, unique=False, nullable=True
     )
     file = mapped_column(String(255), unique=False, nullable=True)
+    receipt = mapped_column(String(32), unique=False, nullable=True)  # issued when the submission was queued
     submitted_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
     updated_at = mapped_column(DateTime, default=gmt_plus_7_now, onupdate=gmt_plus_7_now, nullable=False)
 
@@ -33,8 +41,10 @@ class SubmissionModel(db.Model):
             "assessment_id": self.assessment_id,
             "role_id": self.role_id,
             "score": self.score,
+            "score_overridden": self.score_overridden,
             "answer": self.answer,
             "file": self.file,
+            "receipt": self.receipt,
             "submitted_at": self.submitted_at,
             "updated_at": self.updated_at,
         }
@@ -0,0 +1,75 @@
+from db import db
+from sqlalchemy.orm import mapped_column, relationship
+from sqlalchemy import String, Integer, BigInteger, DateTime, ForeignKey, Enum, UniqueConstraint
+from datetime import datetime, timedelta
+from enums.enum import UploadStatusEnum
+
+
+def gmt_plus_7_now():
+    return datetime.utcnow() + timedelta(hours=7)
+
+
+class UploadSessionModel(db.Model):
+    __tablename__ = "upload_sessions"
+
+    id = mapped_column(Integer, primary_key=True)
+    user_id = mapped_column(Integer, ForeignKey("users.id"), unique=False, nullable=False)
+    target = mapped_column(String(32), unique=False, nullable=False)  # record the file is attached to on completion
+    target_id = mapped_column(Integer, unique=False, nullable=True)
+    filename = mapped_column(String(255), unique=False, nullable=False)
+    content_type = mapped_column(String(100), unique=False, nullable=False)
+    size = mapped_column(BigInteger, unique=False, nullable=False)  # declared total size in bytes
+    chunk_size = mapped_column(Integer, unique=False, nullable=False)
+    key = mapped_column(String(255), unique=False, nullable=False)  # object key in storage
+    storage_upload_id = mapped_column(String(255), unique=False, nullable=False)  # multipart upload in storage
+    status = mapped_column(Enum(UploadStatusEnum), default=UploadStatusEnum.in_progress, unique=False, nullable=False)
+    expires_at = mapped_column(DateTime, unique=False, nullable=False)
+    created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
+    updated_at = mapped_column(DateTime, default=gmt_plus_7_now, onupdate=gmt_plus_7_now, nullable=False)
+
+    chunks = relationship("UploadChunkModel", backref="upload_session", lazy=True, order_by="UploadChunkModel.number")
+
+    def __repr__(self):
+        return f"<Upload Session {self.id}>"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, number):
+        """Expected size of chunk `number` (1-based), only the last one may be shorter."""
+        if number < self.total_chunks:
+            return self.chunk_size
+        return self.size - (self.total_chunks - 1) * self.chunk_size
+
+    def to_dictionaries(self):
+        return {
+            "id": self.id,
+            "target": self.target,
+            "target_id": self.target_id,
+            "filename": self.filename,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": self.total_chunks,
+            "received_chunks": [chunk.number for chunk in self.chunks],
+            "status": self.status.name,
+            "expires_at": self.expires_at,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class UploadChunkModel(db.Model):
+    __tablename__ = "upload_chunks"
+    __table_args__ = (UniqueConstraint("upload_session_id", "number"),)
+
+    id = mapped_column(Integer, primary_key=True)
+    upload_session_id = mapped_column(Integer, ForeignKey("upload_sessions.id"), unique=False, nullable=False)
+    number = mapped_column(Integer, unique=False, nullable=False)  # 1-based, also the storage part number
+    size = mapped_column(Integer, unique=False, nullable=False)
+    checksum = mapped_column(String(64), unique=False, nullable=False)  # sha256 of the chunk, hex encoded
+    etag = mapped_column(String(255), unique=False, nullable=True)  # returned by storage for the part
+    created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
+
+    def __repr__(self):
+        return f"<Upload Chunk {self.id}>"
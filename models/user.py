@@ -1,8 +1,7 @@
 from db import db
 from sqlalchemy.orm import mapped_column, relationship
-from sqlalchemy import String, Integer, DateTime
+from sqlalchemy import String, Integer, DateTime, JSON, event
 from datetime import datetime, timedelta
-import bcrypt
 from flask_login import UserMixin
 
 
@@ -18,6 +17,7 @@ class UserModel(db.Model, UserMixin):
     email = mapped_column(String(255), unique=True, nullable=False)
     password = mapped_column(String(255), unique=False, nullable=False)
     profile_pict = mapped_column(String(255), unique=False, nullable=True)
+    profile_pict_variants = mapped_column(JSON, unique=False, nullable=True)  # resized copies, filled in once generated
     created_at = mapped_column(DateTime, default=gmt_plus_7_now, nullable=False)
     updated_at = mapped_column(DateTime, default=gmt_plus_7_now, onupdate=gmt_plus_7_now, nullable=False)
 
@@ -33,12 +33,14 @@ class UserModel(db.Model, UserMixin):
             "email": self.email,
             "name": self.name,
             "profile_pict": self.profile_pict,
+            "profile_pict_variants": self.profile_pict_variants,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
 
-    def set_password(self, password):
-        self.password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
-    def check_password(self, password):
-        return bcrypt.checkpw(password.encode("utf-8"), self.password.encode("utf-8"))
+@event.listens_for(UserModel.profile_pict, "set")
+def _reset_profile_pict_variants(target, value, oldvalue, initiator):
+    # Variants of the previous picture; those of the new one are saved when generated
+    if value != oldvalue:
+        target.profile_pict_variants = None
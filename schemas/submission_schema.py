@@ -1,6 +1,14 @@
 from cerberus import Validator
+from datetime import datetime, timezone
 import json
 
+def to_naive_utc(value):
+    # Deadlines are naive UTC, values with an offset (e.g. "Z" or "+07:00") are converted to match
+    value = datetime.fromisoformat(value) if isinstance(value, str) else value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 def validate_answer_as_dict(field, value, error):
     # Try to parse the `answer` as JSON
     if value:
@@ -46,3 +54,29 @@ update_submission_schema = {
         "maxlength": 255
     }
 }
+
+# One answer sheet of an offline exam, as a line of the bulk submission NDJSON body
+bulk_submission_schema = {
+    "role_id": {
+        "type": "integer",
+        "required": True,
+        "min": 1
+    },
+    "answer": {
+        "type": "dict",
+        "required": False,
+        "nullable": True
+    },
+    "file": {
+        "type": "string",
+        "required": False,
+        "nullable": True,
+        "maxlength": 255
+    },
+    "submitted_at": {
+        "type": "datetime",
+        "required": False,
+        "nullable": True,
+        "coerce": to_naive_utc
+    }
+}
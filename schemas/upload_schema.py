@@ -0,0 +1,21 @@
+UPLOAD_TARGETS = ["course_media", "module_file", "profile_pict", "submission_file"]
+
+presign_upload_schema = {
+    "target": {"type": "string", "required": True, "allowed": UPLOAD_TARGETS},
+    "target_id": {"type": "integer", "required": False, "min": 1},
+    "filename": {"type": "string", "required": True, "minlength": 3, "maxlength": 255},
+    "size": {"type": "integer", "required": True, "min": 1},
+}
+
+complete_upload_schema = {
+    "target": {"type": "string", "required": True, "allowed": UPLOAD_TARGETS},
+    "target_id": {"type": "integer", "required": False, "min": 1},
+    "key": {"type": "string", "required": True, "minlength": 3, "maxlength": 255},
+}
+
+init_chunked_upload_schema = {
+    "target": {"type": "string", "required": True, "allowed": UPLOAD_TARGETS},
+    "target_id": {"type": "integer", "required": False, "min": 1},
+    "filename": {"type": "string", "required": True, "minlength": 3, "maxlength": 255},
+    "size": {"type": "integer", "required": True, "min": 1},
+}
@@ -80,3 +80,15 @@ update_profile_schema = {
     }
 }
 
+import_user_schema = {
+    "name": register_schema["name"],
+    "email": register_schema["email"],
+    "password": register_schema["password"],
+    "role": {
+        "type": "string",
+        "required": False,
+        "nullable": True,
+        "allowed": ["instructor", "student"]
+    },
+    "disability_info": register_schema["disability_info"]
+}
@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config.config import Config
+from utils.ttl_cache import TTLCache
+
+
+class MemoryClaimsVersionBackend:
+    """Claims versions kept in this process only, for local development."""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        return self._versions.get(int(user_id), 0)
+
+    def bump(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[int(user_id)] = self._versions.get(int(user_id), 0) + 1
+
+
+class SQLiteClaimsVersionBackend:
+    """Claims versions in a SQLite file shared by all workers on the same host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, reopened in forked workers
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims_versions (user_id INTEGER PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def get(self, user_id):
+        row = self._connection().execute(
+            "SELECT version FROM claims_versions WHERE user_id = ?", (int(user_id),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, user_ids):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO claims_versions (user_id, version) VALUES (?, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+                [(int(user_id),) for user_id in user_ids],
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class DatabaseClaimsVersionBackend:
+    """Claims versions in the application database, shared by every host."""
+
+    def _table(self):
+        from models import ClaimsVersionModel
+
+        return ClaimsVersionModel.__table__
+
+    def _engine(self):
+        from connector.mysql_connectors import get_engine
+
+        return get_engine()
+
+    def get(self, user_id):
+        table = self._table()
+        with self._engine().connect() as conn:
+            return conn.execute(select(table.c.version).where(table.c.user_id == int(user_id))).scalar() or 0
+
+    def bump(self, user_ids):
+        table = self._table()
+        user_ids = {int(user_id) for user_id in user_ids}
+        with self._engine().begin() as conn:
+            conn.execute(update(table).where(table.c.user_id.in_(user_ids)).values(version=table.c.version + 1))
+            existing = set(conn.execute(select(table.c.user_id).where(table.c.user_id.in_(user_ids))).scalars())
+            for user_id in user_ids - existing:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(insert(table).values(user_id=user_id, version=1))
+                except IntegrityError:
+                    # Inserted by a concurrent role change of the same user
+                    conn.execute(
+                        update(table).where(table.c.user_id == user_id).values(version=table.c.version + 1)
+                    )
+
+
+class ClaimsVersions:
+    """
+    Per-user counter bumped whenever a user's roles change.
+
+    Access tokens carry the version they were issued at in a `ver` claim, their role claims
+    are outdated once the counter moved on. Versions are cached for cache_seconds in each
+    worker, so a change made by another worker is picked up within that time.
+    """
+
+    def __init__(self, backend, cache_seconds, cache_size=10000):
+        self.backend = backend
+        self._cache = TTLCache(cache_size, cache_seconds)
+
+    def current(self, user_id):
+        version = self._cache.get(str(user_id))
+        if version is None:
+            version = self.fresh(user_id)
+        return version
+
+    def fresh(self, user_id):
+        """Version read from the backend, to stamp on a token or roles about to be loaded."""
+        version = self.backend.get(user_id)
+        self._cache.set(str(user_id), version)
+        return version
+
+    def bump(self, user_ids):
+        """Outdate the role claims and cached roles of every user in user_ids, in one backend write."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        self.backend.bump(user_ids)
+        for user_id in user_ids:
+            self._cache.pop(str(user_id))
+
+
+def create_backend(name):
+    if name == "memory":
+        return MemoryClaimsVersionBackend()
+    if name == "sqlite":
+        return SQLiteClaimsVersionBackend(Config.REVOCATION_SQLITE_PATH)
+    if name == "database":
+        return DatabaseClaimsVersionBackend()
+    raise ValueError(f"Unknown claims version backend: {name}")
+
+
+claims_versions = ClaimsVersions(
+    create_backend(Config.REVOCATION_BACKEND),
+    cache_seconds=Config.REVOCATION_SYNC_SECONDS,
+)
@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+
+from config.config import Config
+from models import AssessmentDetailModel
+from utils.metrics import metrics
+from utils.ttl_cache import TTLCache
+
+# Code of an unanswered question or of an option that is no question's correct answer
+NO_ANSWER = -1
+_UNANSWERED = object()
+
+
+class AnswerKeyError(Exception):
+    pass
+
+
+def _option(value):
+    # Options are usually strings, lists and objects are compared by their JSON form
+    return json.dumps(value, sort_keys=True) if isinstance(value, (list, dict)) else value
+
+
+class AnswerKey:
+    """
+    An assessment's answer key compiled to arrays: question index -> correct option code.
+
+    Submissions are encoded with the same option codes and scored with one vectorized
+    comparison instead of walking the question and answer dicts.
+    """
+
+    def __init__(self, question, answer):
+        self.questions = list(question)
+        for question_number in self.questions:
+            if question_number not in answer:
+                raise AnswerKeyError(f"Question {question_number} not found in answer key")
+
+        self.option_codes = {}
+        for question_number in self.questions:
+            self.option_codes.setdefault(_option(answer[question_number]), len(self.option_codes))
+        self.correct = np.array(
+            [self.option_codes[_option(answer[question_number])] for question_number in self.questions], dtype=np.int32
+        )
+
+    def encode(self, user_answers):
+        """Option code of every question for a submission's answers."""
+        return np.fromiter(
+            (self.option_codes.get(_option(user_answers.get(q, _UNANSWERED)), NO_ANSWER) for q in self.questions),
+            dtype=np.int32,
+            count=len(self.questions),
+        )
+
+    def score(self, user_answers):
+        """Percentage of questions answered correctly, unanswered questions count as incorrect."""
+        if not self.questions:
+            return 0.0
+        return int(np.count_nonzero(self.encode(user_answers) == self.correct)) / len(self.questions) * 100
+
+    def encode_many(self, submissions_answers):
+        """Option code matrix with one row per submission and one column per question."""
+        matrix = np.empty((len(submissions_answers), len(self.questions)), dtype=np.int32)
+        for column, question_number in enumerate(self.questions):
+            matrix[:, column] = [
+                self.option_codes.get(_option(answers.get(question_number, _UNANSWERED)), NO_ANSWER)
+                for answers in submissions_answers
+            ]
+        return matrix
+
+    def score_many(self, submissions_answers):
+        """score() of many submissions at once, as a float array."""
+        if not self.questions:
+            return np.zeros(len(submissions_answers))
+        correct = np.count_nonzero(self.encode_many(submissions_answers) == self.correct, axis=1)
+        return correct / len(self.questions) * 100
+
+
+# (assessment_id, updated_at) -> AnswerKey, editing the details changes updated_at and so the key
+answer_keys = TTLCache(Config.ANSWER_KEY_CACHE_SIZE, Config.ANSWER_KEY_CACHE_TTL_SECONDS)
+metrics.register_gauge("grading.cache_size", lambda: len(answer_keys))
+
+
+def get_answer_key(s, assessment_id, updated_at):
+    """Compiled answer key of the assessment's details last updated at updated_at."""
+    cache_key = (assessment_id, updated_at)
+    answer_key = answer_keys.get(cache_key)
+    if answer_key is not None:
+        metrics.inc("grading.cache_hits")
+        return answer_key
+
+    metrics.inc("grading.cache_misses")
+    detail = (
+        s.query(AssessmentDetailModel.question, AssessmentDetailModel.answer)
+        .filter_by(assessment_id=assessment_id)
+        .first()
+    )
+    answer_key = AnswerKey(detail.question, detail.answer or {})
+    answer_keys.set(cache_key, answer_key)
+    return answer_key
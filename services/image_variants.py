@@ -0,0 +1,157 @@
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import after_this_request, has_request_context
+from PIL import Image, ImageOps
+from sqlalchemy import update
+
+from config.config import Config
+from utils.metrics import metrics
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+# Longest side in pixels of each variant, stored next to the original as <name>-<size>.<format>
+VARIANT_SIZES = {"sm": 128, "md": 480}
+VARIANT_FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+
+
+def variant_key(key, size_name, ext):
+    return f"{os.path.splitext(key)[0]}-{size_name}.{ext}"
+
+
+def variant_urls(url):
+    """URLs of the resized copies of an uploaded image, e.g. {"sm": {"webp": ..., "jpg": ...}, "md": ...}."""
+    if not url or os.path.splitext(url)[1].lower() not in IMAGE_EXTENSIONS:
+        return None
+    return {
+        size_name: {ext: variant_key(url, size_name, ext) for ext in VARIANT_FORMATS} for size_name in VARIANT_SIZES
+    }
+
+
+def stored_variants(url, variants):
+    """
+    The variants stored for an image, or its own URL for every size and format.
+
+    Images uploaded before variants existed, or whose job failed or is still running, have
+    none stored, so clients are pointed at the original instead of URLs that don't resolve.
+    """
+    if variants:
+        return variants
+    if not url or os.path.splitext(url)[1].lower() not in IMAGE_EXTENSIONS:
+        return None
+    return {size_name: {ext: url for ext in VARIANT_FORMATS} for size_name in VARIANT_SIZES}
+
+
+def save_variants(key):
+    """Record the variants of the image stored at key on every course and user showing it."""
+    from connector.mysql_connectors import get_engine
+    from models import CourseModel, UserModel
+    from services.storage import storage
+
+    url = storage.url(key)
+    variants = variant_urls(url)
+    # Own transaction, the upload request has already committed
+    with get_engine().begin() as conn:
+        conn.execute(update(CourseModel).where(CourseModel.media == url).values(media_variants=variants))
+        conn.execute(
+            update(UserModel).where(UserModel.profile_pict == url).values(profile_pict_variants=variants)
+        )
+
+
+def render_variants(data):
+    """Resize an image into every variant; returns (size_name, ext, bytes, content_type) tuples."""
+    image = Image.open(io.BytesIO(data))
+    # JPEGs can be decoded at a reduced scale directly, much cheaper than decoding full size
+    image.draft("RGB", (2 * max(VARIANT_SIZES.values()),) * 2)
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    variants = []
+    for size_name, size in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for ext, (pil_format, content_type) in VARIANT_FORMATS.items():
+            output = io.BytesIO()
+            frame = resized.convert("RGB") if pil_format == "JPEG" else resized
+            frame.save(output, pil_format, quality=80)
+            variants.append((size_name, ext, output.getvalue(), content_type))
+    return variants
+
+
+def _generate(key, data):
+    # Runs in a pool process, which has its own storage client
+    from services.storage import storage
+
+    if data is None:
+        # Content already stored under its digest may have had its variants made by an earlier upload
+        last_size, last_ext = list(VARIANT_SIZES)[-1], list(VARIANT_FORMATS)[-1]
+        if storage.head(variant_key(key, last_size, last_ext)) is not None:
+            return key
+        data = storage.read(key)
+
+    for size_name, ext, variant, content_type in render_variants(data):
+        storage.put_bytes(variant_key(key, size_name, ext), variant, content_type)
+    return key
+
+
+class ImageVariantPipeline:
+    """Generates image variants in a process pool after the upload request has returned."""
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Process pools do not survive a fork, each gunicorn worker starts its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, key, data=None):
+        """Queue variants of the image stored at key; data is its content when already in memory."""
+        if not self._slots.acquire(blocking=False):
+            # Variants are an optimisation, clients fall back to the original
+            metrics.inc("images.variants_dropped")
+            return None
+
+        future = self._get_executor().submit(_generate, key, data)
+        future.add_done_callback(self._done)
+        return future
+
+    def submit_after_request(self, key, data=None):
+        """Like submit, once the current request has committed the record pointing at the image."""
+        if not has_request_context():
+            return self.submit(key, data)
+
+        @after_this_request
+        def submit_variants(response):
+            self.submit(key, data)
+            return response
+
+    def _done(self, future):
+        self._slots.release()
+        if future.exception() is not None:
+            metrics.inc("images.variants_failed")
+            print(f"Failed to generate image variants : {future.exception()}")
+            return
+
+        try:
+            save_variants(future.result())
+            metrics.inc("images.variants_generated")
+        except Exception as e:
+            metrics.inc("images.variants_failed")
+            print(f"Failed to save image variants : {e}")
+
+
+image_variants = ImageVariantPipeline(
+    workers=Config.IMAGE_VARIANT_WORKERS,
+    max_pending=Config.IMAGE_VARIANT_MAX_PENDING,
+)
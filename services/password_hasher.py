@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+from config.config import Config
+
+
+class HasherBusyError(Exception):
+    """Raised when too many hashing jobs are already waiting, so the caller can fail fast."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _verify(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def calibrate_rounds(target_ms, min_rounds=10, max_rounds=16):
+    """Return the highest bcrypt cost whose hash time on this machine stays within target_ms."""
+    rounds = min_rounds
+    for candidate in range(min_rounds, max_rounds + 1):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(candidate))
+        if (time.perf_counter() - start) * 1000 > target_ms:
+            break
+        rounds = candidate
+    return rounds
+
+
+def get_rounds(hashed):
+    # bcrypt hashes look like $2b$12$<salt+hash>
+    return int(hashed.split("$")[2])
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool instead of the request thread."""
+
+    def __init__(self, workers, max_pending, rounds, target_ms):
+        self.workers = workers
+        self.explicit_rounds = rounds != "auto"
+        self._rounds = int(rounds) if self.explicit_rounds else None
+        self.target_ms = target_ms
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def rounds(self):
+        # "auto" is calibrated on first use, in a pool process so the request thread isn't held by it
+        if self._rounds is None:
+            executor = self._get_executor()
+            with self._lock:
+                if self._rounds is None:
+                    self._rounds = executor.submit(calibrate_rounds, self.target_ms).result()
+        return self._rounds
+
+    def _get_executor(self):
+        # Process pools do not survive a fork, each gunicorn worker starts its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError("Too many password operations in progress, please retry")
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password.encode("utf-8"), self.rounds)
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch of passwords across the whole pool, for bulk imports.
+
+        At most one job per pool process is in flight at a time, each holding a slot, so an
+        import waits its turn instead of queueing the whole batch ahead of logins.
+        """
+        rounds = self.rounds
+        executor = self._get_executor()
+        hashes = []
+        for start in range(0, len(passwords), self.workers):
+            futures = []
+            for password in passwords[start : start + self.workers]:
+                self._slots.acquire()
+                try:
+                    future = executor.submit(_hash, password.encode("utf-8"), rounds)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                future.add_done_callback(lambda _: self._slots.release())
+                futures.append(future)
+            hashes.extend(future.result() for future in futures)
+        return hashes
+
+    def verify(self, password, hashed):
+        return self._run(_verify, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_rehash(self, hashed):
+        # Auto-calibrated costs only ever move up, so workers with slightly different timings don't flip-flop
+        if self.explicit_rounds:
+            return get_rounds(hashed) != self.rounds
+        return get_rounds(hashed) < self.rounds
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    rounds=Config.BCRYPT_ROUNDS,
+    target_ms=Config.BCRYPT_TARGET_MS,
+)
@@ -0,0 +1,124 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config.config import Config
+
+
+class MemoryRecentWritesBackend:
+    """Read-your-writes windows kept in this process only, for local development."""
+
+    def __init__(self):
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def set(self, user_id, until):
+        now = time.time()
+        with self._lock:
+            if len(self._until) > 10000:
+                for key, expires_at in list(self._until.items()):
+                    if expires_at <= now:
+                        del self._until[key]
+            self._until[int(user_id)] = until
+
+    def get(self, user_id):
+        return self._until.get(int(user_id), 0)
+
+
+class SQLiteRecentWritesBackend:
+    """Read-your-writes windows in a SQLite file shared by all workers on the same host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, reopened in forked workers
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS recent_writes (user_id INTEGER PRIMARY KEY, until INTEGER NOT NULL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def set(self, user_id, until):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO recent_writes (user_id, until) VALUES (?, ?)", (int(user_id), until)
+        )
+
+    def get(self, user_id):
+        row = self._connection().execute(
+            "SELECT until FROM recent_writes WHERE user_id = ?", (int(user_id),)
+        ).fetchone()
+        return row[0] if row else 0
+
+
+class DatabaseRecentWritesBackend:
+    """Read-your-writes windows in the application database, shared by every host."""
+
+    def _table(self):
+        from models import RecentWriteModel
+
+        return RecentWriteModel.__table__
+
+    def _engine(self):
+        from connector.mysql_connectors import get_engine
+
+        return get_engine()
+
+    def set(self, user_id, until):
+        table = self._table()
+        with self._engine().begin() as conn:
+            if conn.execute(update(table).where(table.c.user_id == int(user_id)).values(until=until)).rowcount:
+                return
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(table).values(user_id=int(user_id), until=until))
+            except IntegrityError:
+                # Inserted by a concurrent request of the same user
+                conn.execute(update(table).where(table.c.user_id == int(user_id)).values(until=until))
+
+    def get(self, user_id):
+        table = self._table()
+        with self._engine().connect() as conn:
+            return conn.execute(select(table.c.until).where(table.c.user_id == int(user_id))).scalar() or 0
+
+
+class RecentWrites:
+    """
+    Users who wrote within the last DB_READ_YOUR_WRITES_SECONDS, whose reads stay on the primary.
+
+    Kept in a backend shared by the workers, as the request following a write is often
+    handled by another worker than the one that committed it.
+    """
+
+    def __init__(self, backend, window_seconds):
+        self.backend = backend
+        self.window_seconds = window_seconds
+
+    def mark(self, user_id):
+        self.backend.set(user_id, math.ceil(time.time() + self.window_seconds))
+
+    def wrote_recently(self, user_id):
+        return self.backend.get(user_id) > time.time()
+
+
+def create_backend(name):
+    if name == "memory":
+        return MemoryRecentWritesBackend()
+    if name == "sqlite":
+        return SQLiteRecentWritesBackend(Config.REVOCATION_SQLITE_PATH)
+    if name == "database":
+        return DatabaseRecentWritesBackend()
+    raise ValueError(f"Unknown read-your-writes backend: {name}")
+
+
+recent_writes = RecentWrites(
+    create_backend(Config.DB_READ_YOUR_WRITES_BACKEND),
+    window_seconds=Config.DB_READ_YOUR_WRITES_SECONDS,
+)
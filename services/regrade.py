@@ -0,0 +1,147 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from datetime import timedelta
+
+from sqlalchemy import bindparam, func, select, update
+
+from config.config import Config
+from connector.mysql_connectors import get_engine
+from enums.enum import RegradeStatusEnum
+from models import AssessmentDetailModel, RegradeJobModel, SubmissionModel
+from models.regrade_job import gmt_plus_7_now
+from services.grading import AnswerKey
+from utils.metrics import metrics
+
+details = AssessmentDetailModel.__table__
+submissions = SubmissionModel.__table__
+jobs = RegradeJobModel.__table__
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Threads do not survive a fork, each gunicorn worker starts its own
+    global _executor, _executor_pid
+
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=Config.REGRADE_WORKERS, thread_name_prefix="regrade")
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _update_job(conn, job_id, **values):
+    conn.execute(update(jobs).where(jobs.c.id == job_id).values(**values))
+
+
+def _superseded(conn, job_id, assessment_id):
+    # A later edit of the answer key queued its own job, which owns the scores from now on
+    newer = select(jobs.c.id).where(jobs.c.assessment_id == assessment_id, jobs.c.id > job_id).limit(1)
+    return conn.execute(newer).first() is not None
+
+
+def regrade_submissions(job_id, assessment_id):
+    """
+    Score every submission of the assessment again against its current answer key.
+
+    Submissions are read in chunks of REGRADE_CHUNK_SIZE by id, scored together as one
+    matrix and written back with a single executemany UPDATE per chunk, each chunk in its
+    own transaction so the job's progress is visible while it runs.
+    """
+    engine = get_engine()
+    scores_update = (
+        update(submissions).where(submissions.c.id == bindparam("submission_id")).values(score=bindparam("new_score"))
+    )
+
+    try:
+        with engine.begin() as conn:
+            detail = conn.execute(
+                select(details.c.question, details.c.answer).where(details.c.assessment_id == assessment_id)
+            ).first()
+            answer_key = AnswerKey(detail.question, detail.answer or {})
+            total = conn.execute(
+                select(func.count()).select_from(submissions).where(submissions.c.assessment_id == assessment_id)
+            ).scalar()
+            _update_job(conn, job_id, status=RegradeStatusEnum.running, total=total)
+
+        processed = 0
+        last_id = 0
+        while True:
+            with engine.begin() as conn:
+                if _superseded(conn, job_id, assessment_id):
+                    _update_job(conn, job_id, status=RegradeStatusEnum.superseded, finished_at=gmt_plus_7_now())
+                    return
+
+                rows = conn.execute(
+                    select(submissions.c.id, submissions.c.answer, submissions.c.score_overridden)
+                    .where(submissions.c.assessment_id == assessment_id, submissions.c.id > last_id)
+                    .order_by(submissions.c.id)
+                    .limit(Config.REGRADE_CHUNK_SIZE)
+                ).all()
+                if not rows:
+                    break
+
+                # Submissions without answers were never scored automatically and scores set by an
+                # instructor are deliberate, both are left as they are
+                graded = [
+                    row for row in rows if isinstance(row.answer, dict) and row.answer and not row.score_overridden
+                ]
+                if graded:
+                    scores = answer_key.score_many([row.answer for row in graded]).tolist()
+                    conn.execute(
+                        scores_update.where(submissions.c.score_overridden.is_(False)),
+                        [{"submission_id": row.id, "new_score": score} for row, score in zip(graded, scores)],
+                    )
+
+                last_id = rows[-1].id
+                processed += len(rows)
+                _update_job(conn, job_id, processed=processed)
+
+        with engine.begin() as conn:
+            _update_job(conn, job_id, status=RegradeStatusEnum.completed, finished_at=gmt_plus_7_now())
+        metrics.inc("grading.regraded_submissions", processed)
+
+    except Exception as e:
+        metrics.inc("grading.regrades_failed")
+        print(f"Failed to re-grade assessment {assessment_id} : {e}")
+        with engine.begin() as conn:
+            _update_job(conn, job_id, status=RegradeStatusEnum.failed, error=str(e), finished_at=gmt_plus_7_now())
+
+
+def start_regrade(job_id, assessment_id):
+    """Run the re-grade job in the background of this worker, after the request has returned."""
+    return _get_executor().submit(regrade_submissions, job_id, assessment_id)
+
+
+def reclaim_stale_regrades():
+    """
+    Restart the jobs left queued or running by a worker that was stopped or crashed.
+
+    A running job touches updated_at after every chunk, so one idle for REGRADE_STALE_MINUTES
+    has no thread left. Each job is claimed with a conditional UPDATE, so when several
+    workers start together only one of them restarts it.
+    """
+    engine = get_engine()
+    cutoff = gmt_plus_7_now() - timedelta(minutes=Config.REGRADE_STALE_MINUTES)
+    stale = jobs.c.status.in_([RegradeStatusEnum.queued, RegradeStatusEnum.running]) & (jobs.c.updated_at < cutoff)
+
+    with engine.connect() as conn:
+        candidates = conn.execute(select(jobs.c.id, jobs.c.assessment_id).where(stale)).all()
+
+    reclaimed = []
+    for job_id, assessment_id in candidates:
+        with engine.begin() as conn:
+            claimed = conn.execute(
+                update(jobs)
+                .where(jobs.c.id == job_id, stale)
+                .values(status=RegradeStatusEnum.queued, processed=0, error=None)
+            ).rowcount
+        if claimed:
+            metrics.inc("grading.regrades_reclaimed")
+            reclaimed.append(start_regrade(job_id, assessment_id))
+    return reclaimed
@@ -0,0 +1,271 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+
+from config.config import Config
+
+MB = 1024 * 1024
+S3_MIN_PART_MB = 5
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Large files (mp4) are sent as parallel multipart parts instead of one long PUT
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=Config.S3_MULTIPART_THRESHOLD_MB * MB,
+    multipart_chunksize=Config.S3_MULTIPART_CHUNKSIZE_MB * MB,
+    max_concurrency=Config.S3_MAX_CONCURRENCY,
+)
+
+mimetypes.add_type("image/webp", ".webp")
+
+_s3_client = None
+_s3_client_pid = None
+_s3_client_lock = threading.Lock()
+_part_executor = None
+_part_executor_pid = None
+
+
+def get_s3_client():
+    """Return the process-wide S3 client, so uploads reuse its keep-alive connections to R2."""
+    global _s3_client, _s3_client_pid
+
+    # Clients are not safe to share across a fork, each gunicorn worker creates its own
+    if _s3_client_pid != os.getpid():
+        with _s3_client_lock:
+            if _s3_client_pid != os.getpid():
+                _s3_client = boto3.session.Session().client(
+                    "s3",
+                    endpoint_url=Config.R2_ENDPOINT_URL,
+                    aws_access_key_id=Config.R2_ACCESS_KEY_ID,
+                    aws_secret_access_key=Config.R2_SECRET_ACCESS_KEY,
+                    config=BotoConfig(
+                        signature_version="s3v4",
+                        max_pool_connections=Config.S3_MAX_POOL_CONNECTIONS,
+                        retries={"max_attempts": 3, "mode": "standard"},
+                    ),
+                )
+                _s3_client_pid = os.getpid()
+
+    return _s3_client
+
+
+def get_part_executor():
+    """Return the process-wide pool that sends the multipart parts of streamed uploads."""
+    global _part_executor, _part_executor_pid
+
+    # Threads don't survive a fork, each gunicorn worker starts its own pool on first use
+    if _part_executor_pid != os.getpid():
+        with _s3_client_lock:
+            if _part_executor_pid != os.getpid():
+                _part_executor = ThreadPoolExecutor(
+                    Config.S3_MAX_POOL_CONNECTIONS, thread_name_prefix="upload-part"
+                )
+                _part_executor_pid = os.getpid()
+
+    return _part_executor
+
+
+class S3StorageBackend:
+    """Objects in an R2 (or any S3 compatible) bucket, served from the bucket's public domain."""
+
+    def __init__(self, bucket, public_url, client=None):
+        self.bucket = bucket
+        self.public_url = public_url
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client or get_s3_client()
+
+    def url(self, key):
+        return f"{self.public_url}/{key}"
+
+    def put_stream(self, key, stream, content_type):
+        self.client.upload_fileobj(
+            stream, self.bucket, key, ExtraArgs={"ContentType": content_type}, Config=TRANSFER_CONFIG
+        )
+
+    def put_bytes(self, key, data, content_type):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+
+    def start_multipart(self, key, content_type):
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=key, ContentType=content_type)["UploadId"]
+
+    def upload_part(self, key, upload_id, part_number, data):
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def complete_multipart(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+
+    def abort_multipart(self, key, upload_id):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def move(self, source_key, key):
+        # Server-side copy, the bytes don't pass through the worker again
+        self.client.copy_object(Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": source_key})
+        self.delete(source_key)
+
+    def read(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def read_prefix(self, key, length):
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{length - 1}")
+        return response["Body"].read()
+
+    def head(self, key):
+        """Return {"size", "content_type"} of the object, or None when it was never uploaded."""
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": response["ContentLength"], "content_type": response.get("ContentType")}
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def presign_put(self, key, content_type, size, expires_in):
+        """URL the client can PUT the file to directly; type and length are part of the signature."""
+        return self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type, "ContentLength": size},
+            ExpiresIn=expires_in,
+        )
+
+
+class LocalStorageBackend:
+    """
+    Objects as files under a local directory, for development, CI and offline load tests.
+
+    Files and presigned PUTs are served by the /api/v1/files routes of this app, so the
+    upload flows behave the same as with a bucket.
+    """
+
+    def __init__(self, root, public_url, secret):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url
+        self.secret = (secret or "").encode("utf-8")
+
+    def path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def _write(self, key, chunks):
+        # Written under a temporary name first, so readers never see a partial file
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temp_path, path)
+
+    def url(self, key):
+        return f"{self.public_url}/{key}"
+
+    def put_stream(self, key, stream, content_type):
+        self._write(key, iter(lambda: stream.read(COPY_BUFFER_SIZE), b""))
+
+    def put_bytes(self, key, data, content_type):
+        self._write(key, [data])
+
+    def _parts_dir(self, upload_id):
+        return self.path(f".multipart/{upload_id}")
+
+    def start_multipart(self, key, content_type):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts_dir(upload_id))
+        return upload_id
+
+    def upload_part(self, key, upload_id, part_number, data):
+        with open(os.path.join(self._parts_dir(upload_id), f"{part_number:05d}"), "wb") as f:
+            f.write(data)
+        return {"PartNumber": part_number}
+
+    def complete_multipart(self, key, upload_id, parts):
+        parts_dir = self._parts_dir(upload_id)
+
+        def chunks():
+            for part in sorted(parts, key=lambda part: part["PartNumber"]):
+                with open(os.path.join(parts_dir, f"{part['PartNumber']:05d}"), "rb") as f:
+                    yield from iter(lambda: f.read(COPY_BUFFER_SIZE), b"")
+
+        self._write(key, chunks())
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    def abort_multipart(self, key, upload_id):
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+    def move(self, source_key, key):
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        os.replace(self.path(source_key), self.path(key))
+
+    def read(self, key):
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def read_prefix(self, key, length):
+        with open(self.path(key), "rb") as f:
+            return f.read(length)
+
+    def head(self, key):
+        try:
+            size = os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+        return {"size": size, "content_type": mimetypes.guess_type(key)[0]}
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def _signature(self, key, content_type, size, expires):
+        message = f"{key}\n{content_type}\n{size}\n{expires}".encode("utf-8")
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def presign_put(self, key, content_type, size, expires_in):
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "signature": self._signature(key, content_type, size, expires)})
+        return f"{self.url(key)}?{query}"
+
+    def verify_put(self, key, content_type, size, expires, signature):
+        """Check a PUT request against the URL issued by presign_put."""
+        if int(expires) < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(key, content_type, size, int(expires)))
+
+
+def create_storage(name):
+    if name == "r2":
+        # S3 rejects every part but the last one below 5 MB
+        for setting in ("UPLOAD_CHUNK_SIZE_MB", "S3_MULTIPART_CHUNKSIZE_MB"):
+            if getattr(Config, setting) < S3_MIN_PART_MB:
+                raise ValueError(f"{setting} must be at least {S3_MIN_PART_MB} with the r2 storage backend")
+        return S3StorageBackend(Config.R2_BUCKET_NAME, Config.R2_DOMAINS)
+    if name == "local":
+        return LocalStorageBackend(Config.STORAGE_LOCAL_PATH, Config.STORAGE_LOCAL_URL, Config.STORAGE_LOCAL_SECRET)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+storage = create_storage(Config.STORAGE_BACKEND)
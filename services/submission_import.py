@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+
+from cerberus import Validator
+from sqlalchemy import and_, insert, select
+
+from enums.enum import AssesmentTypeEnum, RoleStatusEnum, UserRoleEnum
+from models import RoleModel, SubmissionModel
+from models.submission import gmt_plus_7_now
+from schemas.submission_schema import bulk_submission_schema
+from utils.bulk_import import chunks
+
+
+def _local_time(submitted_at):
+    # submitted_at is validated as naive UTC, stored like every other timestamp as GMT+7 wall-clock time
+    return submitted_at + timedelta(hours=7) if submitted_at else None
+
+
+def _load_roles(s, role_ids, assessment):
+    """role_id -> (status, already submitted) of the student roles in the assessment's institute, in one query."""
+    rows = s.execute(
+        select(RoleModel.id, RoleModel.status, SubmissionModel.id)
+        .outerjoin(
+            SubmissionModel,
+            and_(SubmissionModel.role_id == RoleModel.id, SubmissionModel.assessment_id == assessment.id),
+        )
+        .where(
+            RoleModel.id.in_(role_ids),
+            RoleModel.role == UserRoleEnum.student,
+            RoleModel.institute_id == assessment.institute_id,
+        )
+    )
+    return {role_id: (status, submission_id is not None) for role_id, status, submission_id in rows}
+
+
+def _import_chunk(s, chunk, first_row, assessment, answer_key, seen_roles):
+    report = []
+    accepted = []
+    validator = Validator(bulk_submission_schema)
+
+    for row_number, row in enumerate(chunk, start=first_row):
+        if not isinstance(row, dict) or not validator.validate(row):
+            errors = validator.errors if isinstance(row, dict) else "Invalid JSON line"
+            report.append({"row": row_number, "status": "error", "message": errors})
+        elif validator.document["role_id"] in seen_roles:
+            report.append(
+                {"row": row_number, "role_id": row["role_id"], "status": "skipped", "message": "Duplicate role in file"}
+            )
+        else:
+            seen_roles.add(validator.document["role_id"])
+            accepted.append((row_number, validator.document))
+
+    roles = _load_roles(s, [row["role_id"] for _, row in accepted], assessment) if accepted else {}
+
+    # Rows without submitted_at are stamped on insert, they are checked against the deadline as of now
+    checked_at = datetime.utcnow()
+    new_rows = []
+    for row_number, row in accepted:
+        role_id = row["role_id"]
+        message = None
+        if role_id not in roles:
+            message = "Role not found or unauthorized"
+        elif roles[role_id][0] != RoleStatusEnum.active:
+            message = "Role is inactive"
+        elif roles[role_id][1]:
+            report.append(
+                {"row": row_number, "role_id": role_id, "status": "skipped", "message": "Already submitted"}
+            )
+            continue
+        elif assessment.deadline and (row.get("submitted_at") or checked_at) > assessment.deadline:
+            message = "Submitted after the deadline"
+        elif assessment.type == AssesmentTypeEnum.choices and row.get("answer") is None:
+            message = "`answer` is required for choices type assessments."
+        elif assessment.type == AssesmentTypeEnum.essay and not row.get("file"):
+            message = "`file` is required for essay type assessments."
+
+        if message:
+            report.append({"row": row_number, "role_id": role_id, "status": "error", "message": message})
+        else:
+            new_rows.append((row_number, row))
+
+    if not new_rows:
+        return report
+
+    # Every answer sheet of the chunk is scored in one vectorized pass
+    scores = {}
+    if answer_key is not None:
+        answered = [(row_number, row) for row_number, row in new_rows if row["answer"]]
+        if answered:
+            scores = dict(
+                zip(
+                    [row_number for row_number, _ in answered],
+                    answer_key.score_many([row["answer"] for _, row in answered]).tolist(),
+                )
+            )
+
+    now = gmt_plus_7_now()
+    s.execute(
+        insert(SubmissionModel),
+        [
+            {
+                "assessment_id": assessment.id,
+                "role_id": row["role_id"],
+                "answer": row.get("answer"),
+                "file": row.get("file"),
+                "score": scores.get(row_number),
+                "submitted_at": _local_time(row.get("submitted_at")) or now,
+                "updated_at": now,
+            }
+            for row_number, row in new_rows
+        ],
+    )
+    submission_ids = dict(
+        s.execute(
+            select(SubmissionModel.role_id, SubmissionModel.id).where(
+                SubmissionModel.assessment_id == assessment.id,
+                SubmissionModel.role_id.in_([row["role_id"] for _, row in new_rows]),
+            )
+        ).all()
+    )
+    s.commit()
+
+    for row_number, row in new_rows:
+        report.append(
+            {
+                "row": row_number,
+                "role_id": row["role_id"],
+                "status": "created",
+                "submission_id": submission_ids[row["role_id"]],
+                "score": scores.get(row_number),
+            }
+        )
+    return report
+
+
+def import_submissions(s, rows, assessment, answer_key=None, chunk_size=1000):
+    """
+    Create the submissions of one assessment chunk by chunk, returning one result per row.
+
+    `assessment` has the id, type, institute_id and deadline of the assessment; answer_key
+    scores choices answer sheets.
+    """
+    report = []
+    seen_roles = set()
+    first_row = 1
+
+    for chunk in chunks(rows, chunk_size):
+        try:
+            chunk_report = _import_chunk(s, chunk, first_row, assessment, answer_key, seen_roles)
+        except Exception as e:
+            s.rollback()
+            chunk_report = [
+                {"row": row_number, "status": "error", "message": str(e)}
+                for row_number in range(first_row, first_row + len(chunk))
+            ]
+
+        report.extend(sorted(chunk_report, key=lambda result: result["row"]))
+        first_row += len(chunk)
+
+    return report
@@ -0,0 +1,171 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from config.config import Config
+from connector.mysql_connectors import get_engine
+from models import SubmissionModel
+from utils.metrics import metrics
+from utils.ttl_cache import TTLCache
+
+submissions = SubmissionModel.__table__
+
+_STOP = object()
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+def new_receipt():
+    # Starts with the creation time in milliseconds, so any worker can tell a young receipt from an unknown one
+    return f"{int(time.time() * 1000):011x}{uuid.uuid4().hex[:21]}"
+
+
+def receipt_age(receipt):
+    """Seconds since the receipt was issued, or None when it is not a receipt."""
+    try:
+        return time.time() - int(receipt[:11], 16) / 1000
+    except ValueError:
+        return None
+
+
+class SubmissionIngestor:
+    """
+    Inserts submissions in group commits from a background thread of the worker.
+
+    Requests enqueue validated rows and return a receipt right away; the thread writes
+    whatever is queued, up to SUBMISSION_BATCH_SIZE rows or after SUBMISSION_BATCH_MS,
+    in one transaction, so a deadline burst pays for one commit per batch instead of per
+    submission. Queued rows live in memory only until their batch is committed.
+
+    Rows are acknowledged before they are written, so a batch the database fails to take is
+    written again with backoff, up to retry_max_seconds apart, instead of being dropped. New
+    submissions are refused with IngestQueueFull once the queue fills up meanwhile. Only
+    duplicates, and rows still unwritten when the worker shuts down, end up failed.
+    """
+
+    def __init__(self, batch_size, batch_ms, max_pending, retry_seconds=0.5, retry_max_seconds=30):
+        self.batch_size = batch_size
+        self.batch_ms = batch_ms
+        self.retry_seconds = retry_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._queue = queue.Queue(maxsize=max_pending)
+        # receipt -> role_id of rows not committed yet, and receipt -> (role_id, error) of rows that failed
+        self.pending = {}
+        self.failed = TTLCache(10000, 3600)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, each gunicorn worker starts its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                    self.pending = {}
+                    self._stopping = threading.Event()
+                    self._thread = threading.Thread(target=self._run, name="submission-ingest", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def submit(self, values):
+        """Queue a submission row; returns its receipt, raises IngestQueueFull when the queue is full."""
+        self._ensure_thread()
+        receipt = new_receipt()
+        self.pending[receipt] = values["role_id"]
+        try:
+            self._queue.put_nowait(dict(values, receipt=receipt))
+        except queue.Full:
+            self.pending.pop(receipt, None)
+            metrics.inc("submissions.ingest_rejected")
+            raise IngestQueueFull("Submission queue is full")
+        return receipt
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        flush_at = time.monotonic() + self.batch_ms / 1000
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            timeout = flush_at - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            rows = [row for row in batch if row is not _STOP]
+            if rows:
+                self._write(rows)
+            if len(rows) < len(batch):
+                return
+
+    def _write(self, rows):
+        start = time.perf_counter()
+        remaining = list(rows)
+        failed = []
+        delay = self.retry_seconds
+        while remaining:
+            try:
+                self._insert(remaining, failed)
+            except Exception as e:
+                metrics.inc("submissions.ingest_retries")
+                if self._stopping.is_set():
+                    failed.extend((row, str(e)) for row in remaining)
+                    break
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+
+        for row, error in failed:
+            self.failed.set(row["receipt"], (row["role_id"], error))
+        for row in rows:
+            self.pending.pop(row["receipt"], None)
+
+        metrics.inc("submissions.group_commits")
+        metrics.inc("submissions.ingested", len(rows) - len(failed))
+        metrics.observe("submissions.group_commit_ms", (time.perf_counter() - start) * 1000)
+
+    def _insert(self, rows, failed):
+        """Insert rows, taking each off `rows` once it is written or rejected as a duplicate."""
+        try:
+            with get_engine().begin() as conn:
+                conn.execute(insert(submissions), rows)
+            rows.clear()
+        except IntegrityError:
+            # A duplicate in the batch; insert row by row so only that row is rejected
+            while rows:
+                try:
+                    with get_engine().begin() as conn:
+                        conn.execute(insert(submissions), [rows[0]])
+                except IntegrityError:
+                    failed.append((rows[0], "You have already submitted for this assessment"))
+                rows.pop(0)
+
+    def stop(self):
+        """Write everything still queued, at worker shutdown."""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            # A batch waiting to be retried gets one last attempt
+            self._stopping.set()
+            self._queue.put(_STOP)
+            self._thread.join(timeout=10)
+
+
+submission_ingestor = SubmissionIngestor(
+    batch_size=Config.SUBMISSION_BATCH_SIZE,
+    batch_ms=Config.SUBMISSION_BATCH_MS,
+    max_pending=Config.SUBMISSION_MAX_PENDING,
+    retry_max_seconds=Config.SUBMISSION_RETRY_MAX_SECONDS,
+)
+atexit.register(submission_ingestor.stop)
@@ -0,0 +1,235 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from config.config import Config
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        # Standard sizing: m = -n ln(p) / ln(2)^2 bits, k = m/n ln(2) hashes
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class MemoryRevocationBackend:
+    """Revoked tokens kept in this process only, for local development."""
+
+    def __init__(self):
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._tokens[jti] = expires_at
+
+    def contains(self, jti):
+        return self._tokens.get(jti, 0) > time.time()
+
+    def changes_since(self, cursor):
+        with self._lock:
+            tokens = list(self._tokens.items())
+        now = time.time()
+        return [jti for jti, expires_at in tokens[cursor:] if expires_at > now], len(tokens)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for jti in [jti for jti, expires_at in self._tokens.items() if expires_at <= now]:
+                del self._tokens[jti]
+
+
+class SQLiteRevocationBackend:
+    """Revoked tokens in a SQLite file shared by all workers on the same host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, reopened in forked workers
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS revoked_tokens ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, jti TEXT NOT NULL UNIQUE, expires_at INTEGER NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def add(self, jti, expires_at):
+        self._connection().execute(
+            "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", (jti, int(expires_at))
+        )
+
+    def contains(self, jti):
+        row = self._connection().execute(
+            "SELECT 1 FROM revoked_tokens WHERE jti = ? AND expires_at > ?", (jti, int(time.time()))
+        ).fetchone()
+        return row is not None
+
+    def changes_since(self, cursor):
+        rows = self._connection().execute(
+            "SELECT id, jti FROM revoked_tokens WHERE id > ? AND expires_at > ? ORDER BY id",
+            (cursor, int(time.time())),
+        ).fetchall()
+        return [jti for _, jti in rows], rows[-1][0] if rows else cursor
+
+    def purge_expired(self):
+        self._connection().execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (int(time.time()),))
+
+
+class DatabaseRevocationBackend:
+    """Revoked tokens in the application database, shared by every host."""
+
+    def _table(self):
+        from models import RevokedTokenModel
+
+        return RevokedTokenModel.__table__
+
+    def _engine(self):
+        from connector.mysql_connectors import get_engine
+
+        return get_engine()
+
+    def add(self, jti, expires_at):
+        try:
+            with self._engine().begin() as conn:
+                conn.execute(insert(self._table()).values(jti=jti, expires_at=int(expires_at)))
+        except IntegrityError:
+            pass  # Already revoked
+
+    def contains(self, jti):
+        table = self._table()
+        with self._engine().connect() as conn:
+            row = conn.execute(
+                select(table.c.id).where(table.c.jti == jti, table.c.expires_at > int(time.time()))
+            ).first()
+        return row is not None
+
+    def changes_since(self, cursor):
+        table = self._table()
+        with self._engine().connect() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.jti)
+                .where(table.c.id > cursor, table.c.expires_at > int(time.time()))
+                .order_by(table.c.id)
+            ).all()
+        return [row.jti for row in rows], rows[-1].id if rows else cursor
+
+    def purge_expired(self):
+        table = self._table()
+        with self._engine().begin() as conn:
+            conn.execute(delete(table).where(table.c.expires_at <= int(time.time())))
+
+
+class RevocationStore:
+    """
+    Answers "is this token revoked?" without a backend round trip for the common case.
+
+    Revoked jtis of every worker are pulled from the shared backend into a bloom filter every
+    REVOCATION_SYNC_SECONDS, so a token absent from the filter is known not to be revoked.
+    Filter hits are confirmed against the backend and remembered in a small LRU.
+    """
+
+    def __init__(self, backend, sync_seconds=2, purge_seconds=600, capacity=100000, lru_size=1024):
+        self.backend = backend
+        self.sync_seconds = sync_seconds
+        self.purge_seconds = purge_seconds
+        self.capacity = capacity
+        self.lru_size = lru_size
+        self._lock = threading.Lock()
+        self._revoked = OrderedDict()
+        self._count = 0
+        self._reset()
+
+    def _reset(self):
+        # Leave headroom when more tokens are revoked than expected, keeping false positives rare
+        self._bloom = BloomFilter(max(self.capacity, 2 * self._count))
+        self._cursor = 0
+        self._count = 0
+        self._synced_at = 0
+        self._purged_at = time.monotonic()
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_seconds:
+            return
+
+        with self._lock:
+            if now - self._purged_at >= self.purge_seconds:
+                # Expired tokens are dropped from the backend, then the filter is rebuilt without them
+                self.backend.purge_expired()
+                self._reset()
+
+            jtis, self._cursor = self.backend.changes_since(self._cursor)
+            for jti in jtis:
+                self._bloom.add(jti)
+            self._count += len(jtis)
+            self._synced_at = now
+
+    def _remember(self, jti, expires_at):
+        self._revoked[jti] = expires_at
+        self._revoked.move_to_end(jti)
+        if len(self._revoked) > self.lru_size:
+            self._revoked.popitem(last=False)
+
+    def revoke(self, jwt_payload):
+        jti, expires_at = jwt_payload["jti"], jwt_payload["exp"]
+        self.backend.add(jti, expires_at)
+        with self._lock:
+            self._bloom.add(jti)
+            self._remember(jti, expires_at)
+
+    def is_revoked(self, jwt_payload):
+        jti = jwt_payload["jti"]
+        self._sync()
+
+        if jti in self._revoked:
+            return True
+        if jti not in self._bloom:
+            return False
+
+        if self.backend.contains(jti):
+            with self._lock:
+                self._remember(jti, jwt_payload["exp"])
+            return True
+        return False
+
+
+def create_backend(name):
+    if name == "memory":
+        return MemoryRevocationBackend()
+    if name == "sqlite":
+        return SQLiteRevocationBackend(Config.REVOCATION_SQLITE_PATH)
+    if name == "database":
+        return DatabaseRevocationBackend()
+    raise ValueError(f"Unknown revocation backend: {name}")
+
+
+revocation_store = RevocationStore(
+    create_backend(Config.REVOCATION_BACKEND),
+    sync_seconds=Config.REVOCATION_SYNC_SECONDS,
+)
@@ -1,37 +1,311 @@
-import boto3
+import hashlib
+import io
 import os
-from datetime import datetime
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import wraps
+from flask import Request, request
+from werkzeug.formparser import FormDataParser, MultiPartParser
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from typing import Dict, Union, List
 
-R2_ACCESS_KEY_ID = os.getenv("R2_ACCESS_KEY_ID")
-R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
-R2_BUCKET_NAME = os.getenv("R2_BUCKET_NAME")
-R2_ENDPOINT_URL = os.getenv("R2_ENDPOINT_URL")
-R2_DOMAINS = os.getenv("R2_DOMAINS")
+from connector.mysql_connectors import get_engine
+from models import StoredFileModel
+from services.image_variants import image_variants
+from services.storage import storage as default_storage, get_part_executor, TRANSFER_CONFIG
+from utils.metrics import metrics
 
 
-class UploadService:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            "s3",
-            endpoint_url=R2_ENDPOINT_URL,
-            aws_access_key_id=R2_ACCESS_KEY_ID,
-            aws_secret_access_key=R2_SECRET_ACCESS_KEY,
+def find_stored_file(digest):
+    """Object key of a file already uploaded with this content digest, if any."""
+    table = StoredFileModel.__table__
+    with get_engine().connect() as conn:
+        return conn.execute(
+            select(table.c.key).where(table.c.digest == digest)
+        ).scalar()
+
+
+def remember_stored_file(digest, key, size, content_type):
+    # Own transaction, so the index entry is kept even if the request later rolls back
+    try:
+        with get_engine().begin() as conn:
+            conn.execute(
+                insert(StoredFileModel.__table__).values(
+                    digest=digest, key=key, size=size, content_type=content_type
+                )
+            )
+    except IntegrityError:
+        pass  # Same content uploaded concurrently by another request
+
+
+# Major brands of the ftyp box of MP4 files, other ISO media files (MOV, HEIC, 3GP) share the box
+MP4_BRANDS = {
+    b"isom", b"iso2", b"iso3", b"iso4", b"iso5", b"iso6",
+    b"mp41", b"mp42", b"avc1", b"dash", b"M4V ",
+}
+
+# Leading bytes identifying each allowed content type
+SNIFF_BYTES = 12
+MAGIC_NUMBERS = [
+    ("image/png", lambda head: head.startswith(b"\x89PNG\r\n\x1a\n")),
+    ("image/jpeg", lambda head: head.startswith(b"\xff\xd8\xff")),
+    ("application/pdf", lambda head: head.startswith(b"%PDF-")),
+    ("video/mp4", lambda head: head[4:8] == b"ftyp" and head[8:12] in MP4_BRANDS),
+]
+
+
+def sniff_content_type(head: bytes):
+    """Content type recognised from the first bytes of a file, or None."""
+    for content_type, matches in MAGIC_NUMBERS:
+        if matches(head):
+            return content_type
+    return None
+
+
+class StreamingUpload:
+    """
+    Container werkzeug writes an uploaded file into while parsing the form.
+
+    Chunks are sniffed, size-checked and hashed as they arrive. Once a multipart part worth of
+    data is buffered it is handed to the part upload pool, which sends up to max_concurrency
+    parts of the file at a time while the parser reads on. Only those parts and the one being
+    filled are held in memory, nothing is spooled to disk. Files smaller than a part stay in
+    memory until process_single_file, which can then skip the upload when the content is
+    already stored. Only those can be read back, the parts of larger files are already in storage.
+    """
+
+    def __init__(self, max_size, part_size, storage=None, max_concurrency=None):
+        self.max_size = max_size
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency or TRANSFER_CONFIG.max_concurrency
+        self.storage = storage or default_storage
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.content_type = None
+        self.error = None
+        self._buffer = bytearray()
+        self._staging_key = None
+        self._upload_id = None
+        self._parts = []  # Futures of the parts sent so far, in part number order
+        self._position = 0
+
+    def write(self, data):
+        if self.error is None:
+            self.size += len(data)
+            if self.size > self.max_size:
+                self._reject("File size exceeds limit")
+            else:
+                self.sha256.update(data)
+                self._buffer += data
+                if self.content_type is None and len(self._buffer) >= SNIFF_BYTES:
+                    self._sniff()
+                if self.error is None and len(self._buffer) >= self.part_size:
+                    self._upload_part()
+        return len(data)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        # Called by the form parser once the file is complete, only reads use the position
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self._buffer)
+        self._position = max(offset, 0)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def readable(self):
+        return self._upload_id is None
+
+    def read(self, size=-1):
+        if self.error is not None:
+            raise ValueError(self.error)
+        if self._upload_id is not None:
+            raise io.UnsupportedOperation(
+                "File parts were already sent to storage, use UploadFiles.process_single_file"
+            )
+
+        end = len(self._buffer) if size is None or size < 0 else self._position + size
+        data = bytes(self._buffer[self._position : end])
+        self._position += len(data)
+        return data
+
+    def _sniff(self):
+        self.content_type = sniff_content_type(bytes(self._buffer[:SNIFF_BYTES]))
+        if self.content_type is None:
+            self._reject("File content not allowed")
+
+    def _reject(self, error):
+        self.error = error
+        self._buffer = bytearray()
+        self.abort()
+
+    def _upload_part(self):
+        if self._upload_id is None:
+            self._staging_key = f"staging/{uuid.uuid4().hex}"
+            self._upload_id = self.storage.start_multipart(
+                self._staging_key, self.content_type
+            )
+
+        # Wait for a free slot instead of buffering the rest of the file ahead of storage
+        in_flight = [part for part in self._parts if not part.done()]
+        if len(in_flight) >= self.max_concurrency:
+            wait(in_flight, return_when=FIRST_COMPLETED)
+        failed = next((part for part in self._parts if part.done() and part.exception()), None)
+        if failed is not None:
+            self._reject(f"File upload failed: {failed.exception()}")
+            return
+
+        self._parts.append(
+            get_part_executor().submit(
+                self.storage.upload_part,
+                self._staging_key,
+                self._upload_id,
+                len(self._parts) + 1,
+                bytes(self._buffer),
+            )
         )
+        self._buffer = bytearray()
 
-    def upload_file(self, file, filename):
-        try:
-            self.s3_client.upload_fileobj(file, R2_BUCKET_NAME, filename)
-            file_url = f"{R2_DOMAINS}/{filename}"
-            return file_url
-        except Exception as e:
-            print(f"Failed to upload file : {e}")
-            return False
+    def finish(self, expected_content_type, ext_name):
+        """Validate the whole file and store it under its content digest."""
+        if self.error is None and self.content_type is None:
+            self._sniff()
+        if self.error is None and self.content_type != expected_content_type:
+            self._reject("File content does not match its extension")
+        if self.error is not None:
+            return {"error": self.error}
+
+        digest = self.sha256.hexdigest()
+
+        existing_key = find_stored_file(digest)
+        if existing_key:
+            metrics.inc("uploads.deduplicated")
+            self.abort()
+            if self.content_type.startswith("image/"):
+                image_variants.submit_after_request(existing_key)
+            return {"success": True, "file_url": self.storage.url(existing_key)}
+
+        new_filename = f"MEDIA-{digest}{ext_name}"
+        data = None
+        if self._upload_id is None:
+            data = bytes(self._buffer)
+            self.storage.put_bytes(new_filename, data, self.content_type)
+        else:
+            if self._buffer:
+                self._upload_part()
+                if self.error is not None:
+                    return {"error": self.error}
+            parts = [part.result() for part in self._parts]
+            self.storage.complete_multipart(self._staging_key, self._upload_id, parts)
+            self._upload_id = None
+            self.storage.move(self._staging_key, new_filename)
+
+        self._buffer = bytearray()
+        remember_stored_file(digest, new_filename, self.size, self.content_type)
+        if self.content_type.startswith("image/"):
+            image_variants.submit_after_request(new_filename, data)
+        return {"success": True, "file_url": self.storage.url(new_filename)}
+
+    def abort(self):
+        # Parts of a file that is rejected or never used are discarded in storage
+        if self._upload_id is not None:
+            upload_id, self._upload_id = self._upload_id, None
+            # Parts still being sent would otherwise outlive the abort and be billed as orphans
+            for part in self._parts:
+                part.cancel()
+            wait(self._parts)
+            self.storage.abort_multipart(self._staging_key, upload_id)
+
+    def close(self):
+        self.abort()
+
+
+class _UploadMultiPartParser(MultiPartParser):
+    def __init__(self, streamed_fields, **kwargs):
+        super().__init__(**kwargs)
+        self.streamed_fields = streamed_fields
+
+    def start_file_streaming(self, event, total_content_length):
+        if event.name in self.streamed_fields:
+            return StreamingUpload(UploadFiles.MAX_FILE_SIZE, TRANSFER_CONFIG.multipart_chunksize)
+        return super().start_file_streaming(event, total_content_length)
+
+
+class UploadFormDataParser(FormDataParser):
+    def __init__(self, *args, streamed_fields=frozenset(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.streamed_fields = streamed_fields
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        parser = _UploadMultiPartParser(
+            self.streamed_fields,
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+        )
+        boundary = options.get("boundary", "").encode("ascii")
+
+        if not boundary:
+            raise ValueError("Missing boundary")
+
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+
+class UploadRequest(Request):
+    """
+    Request that streams the file fields named by @streamed_upload through StreamingUpload.
+
+    Every other file part, and any form parsed before the view runs, gets werkzeug's usual
+    temporary file, so no storage upload is started for a request that was not authenticated.
+    """
+
+    streamed_upload_fields = frozenset()
+
+    def make_form_data_parser(self):
+        return UploadFormDataParser(
+            stream_factory=self._get_file_stream,
+            max_form_memory_size=self.max_form_memory_size,
+            max_content_length=self.max_content_length,
+            max_form_parts=self.max_form_parts,
+            cls=self.parameter_storage_class,
+            streamed_fields=self.streamed_upload_fields,
+        )
+
+
+def streamed_upload(*fields):
+    """
+    Stream the uploaded files of `fields` on this route straight to storage.
+
+    Goes below @jwt_required and @require_role, so the fields are only switched on once the
+    request is authenticated.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            request.streamed_upload_fields = frozenset(fields)
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 class UploadFiles:
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "mp4", "pdf"}  # Extension limit
     MAX_FILE_SIZE = 10 * 1024 * 1024  # File size limit
+    CONTENT_TYPES = {
+        "png": "image/png",
+        "jpg": "image/jpeg",
+        "jpeg": "image/jpeg",
+        "mp4": "video/mp4",
+        "pdf": "application/pdf",
+    }
 
     def allowed_file(self, filename: str) -> bool:
         return (
@@ -39,6 +313,14 @@ class UploadFiles:
             and filename.rsplit(".", 1)[1].lower() in self.ALLOWED_EXTENSIONS
         )
 
+    def content_type(self, filename: str) -> str:
+        return self.CONTENT_TYPES[filename.rsplit(".", 1)[1].lower()]
+
+    def direct_upload_key(self, prefix: str, filename: str) -> str:
+        """Unguessable object key for a file the client uploads itself."""
+        ext_name = os.path.splitext(filename)[1].lower()
+        return f"{prefix}/{uuid.uuid4().hex}{ext_name}"
+
     def process_single_file(self, file) -> Dict[str, Union[str, List[str]]]:
         """Process a single file and return result with any errors"""
         if file.filename == "":
@@ -47,22 +329,22 @@ class UploadFiles:
         if not self.allowed_file(file.filename):
             return {"error": "File type not allowed"}
 
-        file.seek(0, os.SEEK_END)
-        file_length = file.tell()
-        file.seek(0)
+        ext_name = os.path.splitext(file.filename)[1].lower()
 
-        if file_length > self.MAX_FILE_SIZE:
-            return {"error": "File size exceeds limit"}
-
-        filename = file.filename
-        ext_name = os.path.splitext(filename)[1]
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        new_filename = f"MEDIA-{timestamp}{ext_name}"
-
-        upload_service = UploadService()
+        if isinstance(file.stream, StreamingUpload):
+            upload = file.stream
+        else:
+            upload = StreamingUpload(
+                self.MAX_FILE_SIZE, TRANSFER_CONFIG.multipart_chunksize
+            )
 
         try:
-            file_url = upload_service.upload_file(file, new_filename)
-            return {"success": True, "file_url": file_url}
+            if upload is not file.stream:
+                # Files not parsed by UploadRequest go through the same checks chunk by chunk
+                for chunk in iter(lambda: file.read(64 * 1024), b""):
+                    upload.write(chunk)
+
+            return upload.finish(self.content_type(file.filename), ext_name)
         except Exception as e:
+            upload.abort()
             return {"error": str(e)}
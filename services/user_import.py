@@ -0,0 +1,126 @@
+from cerberus import Validator
+from sqlalchemy import insert, select
+
+from enums.enum import UserRoleEnum, RoleStatusEnum
+from models import UserModel, DisabledUserModel, RoleModel
+from schemas.user_schema import import_user_schema
+from services.password_hasher import password_hasher
+from utils.bulk_import import chunks, read_rows
+
+
+def _nest_disability_info(row):
+    # The flat disability columns of a CSV row become the disability_info of a JSON row
+    if "disability_type" in row or "accessibility_preferences" in row:
+        row["disability_info"] = {
+            "disability_type": row.pop("disability_type", None),
+            "accessibility_preferences": row.pop("accessibility_preferences", None),
+        }
+    return row
+
+
+def read_user_rows(stream, content_type):
+    """Yield user rows one at a time from a CSV or NDJSON request body."""
+    return read_rows(stream, content_type, csv_row=_nest_disability_info)
+
+
+def _import_chunk(s, chunk, first_row, institute_id, seen_emails):
+    report = []
+    accepted = []
+    validator = Validator(import_user_schema)
+
+    for row_number, row in enumerate(chunk, start=first_row):
+        if not isinstance(row, dict) or not validator.validate(row):
+            errors = validator.errors if isinstance(row, dict) else "Invalid JSON line"
+            report.append({"row": row_number, "status": "error", "message": errors})
+        elif row["email"] in seen_emails:
+            report.append(
+                {"row": row_number, "email": row["email"], "status": "skipped", "message": "Duplicate email in file"}
+            )
+        else:
+            seen_emails.add(row["email"])
+            accepted.append((row_number, row))
+
+    # One set-based lookup for every email of the chunk
+    emails = [row["email"] for _, row in accepted]
+    existing = set(s.scalars(select(UserModel.email).where(UserModel.email.in_(emails)))) if emails else set()
+
+    new_rows = []
+    for row_number, row in accepted:
+        if row["email"] in existing:
+            report.append(
+                {"row": row_number, "email": row["email"], "status": "skipped", "message": "Email already registered"}
+            )
+        else:
+            new_rows.append((row_number, row))
+
+    if not new_rows:
+        return report
+
+    hashes = password_hasher.hash_many([row["password"] for _, row in new_rows])
+    s.execute(
+        insert(UserModel),
+        [
+            {"name": row["name"], "email": row["email"], "password": hashed}
+            for (_, row), hashed in zip(new_rows, hashes)
+        ],
+    )
+    user_ids = dict(
+        s.execute(
+            select(UserModel.email, UserModel.id).where(UserModel.email.in_([row["email"] for _, row in new_rows]))
+        ).all()
+    )
+
+    disabilities = [
+        {
+            "id": user_ids[row["email"]],
+            "disability_type": row["disability_info"]["disability_type"],
+            "accessibility_preferences": row["disability_info"]["accessibility_preferences"],
+        }
+        for _, row in new_rows
+        if row.get("disability_info")
+    ]
+    if disabilities:
+        s.execute(insert(DisabledUserModel), disabilities)
+
+    roles = [
+        {
+            "institute_id": institute_id,
+            "user_id": user_ids[row["email"]],
+            "role": UserRoleEnum[row["role"]],
+            "status": RoleStatusEnum.pending,
+        }
+        for _, row in new_rows
+        if row.get("role")
+    ]
+    if roles:
+        s.execute(insert(RoleModel), roles)
+
+    s.commit()
+
+    for row_number, row in new_rows:
+        report.append(
+            {"row": row_number, "email": row["email"], "status": "created", "user_id": user_ids[row["email"]]}
+        )
+    return report
+
+
+def import_users(s, rows, institute_id, chunk_size=500):
+    """Create users (and optional roles in institute_id) chunk by chunk, returning one result per row."""
+    report = []
+    seen_emails = set()
+    first_row = 1
+
+    for chunk in chunks(rows, chunk_size):
+        try:
+            chunk_report = _import_chunk(s, chunk, first_row, institute_id, seen_emails)
+        except Exception as e:
+            s.rollback()
+            chunk_report = [
+                {"row": row_number, "status": "error", "message": str(e)}
+                for row_number in range(first_row, first_row + len(chunk))
+            ]
+
+        report.extend(sorted(chunk_report, key=lambda result: result["row"]))
+        first_row += len(chunk)
+
+    return report
@@ -0,0 +1,146 @@
+"""
+Fixtures running the app against a throwaway SQLite database.
+
+Run from the repository root:
+
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix="milestone2-tests-")
+os.environ.update(
+    DB_HOST="localhost",
+    JWT_SECRET_KEY="test-secret-key-of-at-least-32-bytes",
+    REVOCATION_BACKEND="memory",
+    STORAGE_BACKEND="local",
+    STORAGE_LOCAL_PATH=os.path.join(_tmp, "uploads"),
+    PASSWORD_HASH_WORKERS="1",
+    BCRYPT_ROUNDS="4",
+    IMAGE_VARIANT_WORKERS="1",
+    JWT_ROLE_CLAIMS="false",
+)
+
+from datetime import datetime, timedelta  # noqa: E402
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from config.config import Config  # noqa: E402
+
+Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+
+from app import create_app  # noqa: E402
+from connector.mysql_connectors import get_engine  # noqa: E402
+from db import db  # noqa: E402
+from enums.enum import AssesmentTypeEnum, RoleStatusEnum, UserRoleEnum  # noqa: E402
+from models import (  # noqa: E402
+    AssessmentDetailModel,
+    AssessmentModel,
+    CourseModel,
+    InstituteModel,
+    ModuleModel,
+    RoleModel,
+    UserModel,
+)
+from services import grading  # noqa: E402
+from utils import authorization  # noqa: E402
+from utils.ttl_cache import TTLCache  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    # Workers look for interrupted re-grade jobs on startup, so the tables must exist first
+    db.metadata.create_all(get_engine())
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def s(app, monkeypatch):
+    """A session on a freshly created schema; caches keyed by row ids start empty too."""
+    engine = get_engine()
+    db.metadata.create_all(engine)
+    monkeypatch.setattr(authorization, "role_cache", TTLCache(100, 60))
+    monkeypatch.setattr(grading, "answer_keys", TTLCache(100, 60))
+
+    session = Session(engine, expire_on_commit=False)
+    yield session
+    session.close()
+    db.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def auth_headers(app):
+    def headers(user):
+        with app.app_context():
+            return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    return headers
+
+
+def add_user(s, name, role, institute, status=RoleStatusEnum.active):
+    """A user holding one role in the institute; returns (user, role)."""
+    user = UserModel(name=name, email=f"{name}@example.com", password="x")
+    s.add(user)
+    s.flush()
+    user_role = RoleModel(user_id=user.id, institute_id=institute.id, role=role, status=status)
+    s.add(user_role)
+    s.commit()
+    return user, user_role
+
+
+@pytest.fixture
+def school(s):
+    """An institute with an instructor, a course, a module and a choices assessment due tomorrow."""
+    institute = InstituteModel(name="Institute")
+    s.add(institute)
+    s.commit()
+
+    instructor, instructor_role = add_user(s, "instructor", UserRoleEnum.instructor, institute)
+    course = CourseModel(
+        institute_id=institute.id,
+        role_id=instructor_role.id,
+        title="Course",
+        description="Description",
+        category="science",
+        media="https://cdn.example.com/course.png",
+    )
+    s.add(course)
+    s.flush()
+    module = ModuleModel(course_id=course.id, title="Module", content="Content")
+    s.add(module)
+    s.flush()
+    assessment = AssessmentModel(module_id=module.id, type=AssesmentTypeEnum.choices)
+    s.add(assessment)
+    s.flush()
+    s.add(
+        AssessmentDetailModel(
+            assessment_id=assessment.id,
+            title="Quiz",
+            question={"1": "2 + 2?", "2": "3 + 3?"},
+            answer={"1": "4", "2": "6"},
+            deadline=datetime.utcnow() + timedelta(days=1),
+        )
+    )
+    s.commit()
+
+    return {
+        "institute": institute,
+        "instructor": instructor,
+        "instructor_role": instructor_role,
+        "course": course,
+        "module": module,
+        "assessment": assessment,
+    }
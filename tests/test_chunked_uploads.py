@@ -0,0 +1,72 @@
+import hashlib
+
+import pytest
+
+from controllers import upload_controller
+from enums.enum import UploadStatusEnum
+from models import CourseModel, UploadSessionModel
+from services.upload import UploadFiles
+
+MP4 = b"\x00\x00\x00\x18ftypisom" + bytes(1000)
+
+
+def start(client, headers, **data):
+    return client.post("/api/v1/uploads/chunked", json=data, headers=headers)
+
+
+@pytest.mark.parametrize(
+    "target, filename",
+    [("profile_pict", "me.png"), ("submission_file", "essay.pdf"), ("course_media", "cover.png")],
+)
+def test_only_course_videos_exceed_the_form_upload_limit(client, school, auth_headers, target, filename):
+    response = start(
+        client,
+        auth_headers(school["instructor"]),
+        target=target,
+        target_id=school["course"].id,
+        filename=filename,
+        size=UploadFiles.MAX_FILE_SIZE + 1,
+    )
+    assert response.status_code == 400
+    assert response.json["message"] == "File size exceeds limit"
+
+
+def test_course_video_may_exceed_the_form_upload_limit(client, school, auth_headers):
+    response = start(
+        client,
+        auth_headers(school["instructor"]),
+        target="course_media",
+        target_id=school["course"].id,
+        filename="lecture.mp4",
+        size=UploadFiles.MAX_FILE_SIZE + 1,
+    )
+    assert response.status_code == 201
+
+
+def test_upload_that_failed_to_attach_can_be_completed_again(client, s, school, auth_headers, monkeypatch):
+    headers = auth_headers(school["instructor"])
+    upload = start(
+        client, headers, target="course_media", target_id=school["course"].id, filename="lecture.mp4", size=len(MP4)
+    ).json
+    chunk = client.put(
+        f"/api/v1/uploads/chunked/{upload['id']}/chunks/1",
+        data=MP4,
+        headers={**headers, "X-Chunk-SHA256": hashlib.sha256(MP4).hexdigest()},
+    )
+    assert chunk.status_code == 200
+
+    def fail(key):
+        raise RuntimeError("Storage unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(upload_controller.storage, "url", fail)
+        failed = client.post(f"/api/v1/uploads/chunked/{upload['id']}/complete", headers=headers)
+    assert failed.status_code == 500
+    s.expire_all()
+    assert s.get(UploadSessionModel, upload["id"]).status == UploadStatusEnum.in_progress
+
+    completed = client.post(f"/api/v1/uploads/chunked/{upload['id']}/complete", headers=headers)
+    assert completed.status_code == 200
+    s.expire_all()
+    assert s.get(UploadSessionModel, upload["id"]).status == UploadStatusEnum.completed
+    assert s.get(CourseModel, school["course"].id).media.endswith(".mp4")
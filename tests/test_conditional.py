@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from sqlalchemy import update
+
+from enums.enum import UserRoleEnum
+from models import CourseModel
+from conftest import add_user
+
+
+def add_course(s, school, title="Another course"):
+    course = CourseModel(
+        institute_id=school["institute"].id,
+        role_id=school["instructor_role"].id,
+        title=title,
+        description="Description",
+        category="science",
+        media="https://cdn.example.com/course.png",
+    )
+    s.add(course)
+    s.commit()
+    return course
+
+
+def age(s, record, seconds=60):
+    record.updated_at -= timedelta(seconds=seconds)
+    s.commit()
+
+
+def test_unchanged_record_is_a_304(client, s, school, auth_headers):
+    age(s, school["course"])
+    headers = auth_headers(school["instructor"])
+    url = f"/api/v1/courses/{school['course'].id}"
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert not first.headers["ETag"].startswith("W/")
+
+    etag = client.get(url, headers={**headers, "If-None-Match": first.headers["ETag"]})
+    since = client.get(url, headers={**headers, "If-Modified-Since": first.headers["Last-Modified"]})
+    assert etag.status_code == since.status_code == 304
+    assert etag.data == b""
+
+
+def test_updated_record_is_sent_again(client, s, school, auth_headers):
+    headers = auth_headers(school["instructor"])
+    url = f"/api/v1/courses/{school['course'].id}"
+    etag = client.get(url, headers=headers).headers["ETag"]
+
+    school["course"].title = "Renamed"
+    s.commit()
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json["title"] == "Renamed"
+
+
+def test_edit_within_the_same_second_is_sent_again(client, s, school, auth_headers):
+    headers = auth_headers(school["instructor"])
+    url = f"/api/v1/courses/{school['course'].id}"
+    first = client.get(url, headers=headers)
+    # Changed less than a second ago, the next edit could have the same HTTP date
+    assert "Last-Modified" not in first.headers
+
+    # As stored by a database keeping whole seconds only
+    course = school["course"]
+    s.execute(
+        update(CourseModel).where(CourseModel.id == course.id).values(title="Renamed", updated_at=course.updated_at)
+    )
+    s.commit()
+
+    response = client.get(url, headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json["title"] == "Renamed"
+
+
+def test_list_etag_is_scoped_to_user_and_page(client, s, school, auth_headers):
+    add_course(s, school)
+    other, _ = add_user(s, "other", UserRoleEnum.instructor, school["institute"])
+    url = f"/api/v1/institute-courses/{school['institute'].id}"
+
+    mine = client.get(url, headers=auth_headers(school["instructor"]))
+    assert mine.headers["ETag"].startswith("W/")
+
+    # Same rows, but another user's cached copy (e.g. in a shared proxy) is not reused for them
+    theirs = client.get(url, headers={**auth_headers(other), "If-None-Match": mine.headers["ETag"]})
+    assert theirs.status_code == 200
+    assert theirs.headers["ETag"] != mine.headers["ETag"]
+
+    # Another page, or the same page with other fields, is a different representation
+    second_page = client.get(
+        url,
+        query_string={"limit": 1, "cursor": "eyJpZCI6MX0"},
+        headers={**auth_headers(school["instructor"]), "If-None-Match": mine.headers["ETag"]},
+    )
+    assert second_page.status_code == 200
+    assert second_page.headers["ETag"] != mine.headers["ETag"]
+
+
+def test_list_with_a_deleted_row_is_sent_again(client, s, school, auth_headers):
+    extra = add_course(s, school)
+    age(s, school["course"])
+    age(s, extra)
+    headers = auth_headers(school["instructor"])
+    url = f"/api/v1/institute-courses/{school['institute'].id}"
+    cached = client.get(url, headers=headers)
+    assert len(cached.json["Courses"]) == 2
+
+    # Deleting a row leaves max(updated_at) unchanged
+    s.delete(extra)
+    s.commit()
+
+    by_etag = client.get(url, headers={**headers, "If-None-Match": cached.headers["ETag"]})
+    by_date = client.get(url, headers={**headers, "If-Modified-Since": cached.headers["Last-Modified"]})
+    assert by_etag.status_code == by_date.status_code == 200
+    assert len(by_date.json["Courses"]) == 1
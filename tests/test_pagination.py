@@ -0,0 +1,72 @@
+import pytest
+
+from models import CourseModel
+from utils.pagination import PaginationError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips():
+    for last_id in (1, 50, 2**40):
+        cursor = encode_cursor(last_id)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == last_id
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor("x"), "eyJpZCI6bnVsbH0", "e30"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(PaginationError):
+        decode_cursor(cursor)
+
+
+def add_courses(s, school, count):
+    s.add_all(
+        CourseModel(
+            institute_id=school["institute"].id,
+            role_id=school["instructor_role"].id,
+            title=f"Course {i}",
+            description="Description",
+            category="math" if i % 2 else "science",
+            media="https://cdn.example.com/course.png",
+        )
+        for i in range(count)
+    )
+    s.commit()
+
+
+def test_pages_follow_the_cursor_to_the_end(client, s, school, auth_headers):
+    add_courses(s, school, 4)
+    headers = auth_headers(school["instructor"])
+
+    ids = []
+    cursor = None
+    while True:
+        query = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/courses", query_string=query, headers=headers)
+        assert response.status_code == 200
+        ids += [course["id"] for course in response.json["Courses"]]
+        cursor = response.json["page"]["next_cursor"]
+        if cursor is None:
+            break
+
+    # The school fixture's course plus the four added, each exactly once and in id order
+    assert ids == sorted(ids) and len(ids) == len(set(ids)) == 5
+
+
+def test_filters_apply_across_pages(client, s, school, auth_headers):
+    add_courses(s, school, 4)
+    headers = auth_headers(school["instructor"])
+
+    first = client.get("/api/v1/courses", query_string={"limit": 1, "category": "math"}, headers=headers).json
+    second = client.get(
+        "/api/v1/courses",
+        query_string={"limit": 1, "category": "math", "cursor": first["page"]["next_cursor"]},
+        headers=headers,
+    ).json
+
+    assert [course["category"] for course in first["Courses"] + second["Courses"]] == ["math", "math"]
+    assert second["page"]["next_cursor"] is None
+
+
+@pytest.mark.parametrize("query", [{"cursor": "garbage"}, {"limit": 0}, {"limit": "ten"}, {"created_from": "yesterday"}])
+def test_bad_page_parameters_are_a_400(client, school, auth_headers, query):
+    response = client.get("/api/v1/courses", query_string=query, headers=auth_headers(school["instructor"]))
+    assert response.status_code == 400
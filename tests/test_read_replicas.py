@@ -0,0 +1,57 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import create_engine
+
+from connector import mysql_connectors
+from connector.mysql_connectors import get_engine
+from services.recent_writes import RecentWrites, SQLiteRecentWritesBackend
+
+
+@pytest.fixture
+def replica(s, school, tmp_path, monkeypatch):
+    """A second SQLite database holding a snapshot of the primary, taken after the school was set up."""
+    path = tmp_path / "replica.db"
+    shutil.copy(get_engine().url.database, path)
+    engine = create_engine(f"sqlite:///{path}")
+    mysql_connectors._watch_replica(engine)
+    monkeypatch.setattr(mysql_connectors, "_replicas", [engine])
+    monkeypatch.setattr(
+        mysql_connectors, "recent_writes", RecentWrites(SQLiteRecentWritesBackend(str(tmp_path / "writes.db")), 5)
+    )
+    yield engine
+    mysql_connectors._replica_down_until.pop(engine, None)
+    engine.dispose()
+
+
+def course_titles(client, headers):
+    response = client.get("/api/v1/courses", headers=headers)
+    assert response.status_code == 200
+    return [course["title"] for course in response.json["Courses"]]
+
+
+def test_reads_go_to_the_replica_until_the_user_writes(client, s, school, auth_headers, replica, tmp_path):
+    headers = auth_headers(school["instructor"])
+
+    # Changed on the primary only, as if the replica were lagging
+    school["course"].title = "Renamed on the primary"
+    s.commit()
+    assert course_titles(client, headers) == ["Course"]
+
+    response = client.patch(f"/api/v1/courses/{school['course'].id}", data={"title": "Renamed"}, headers=headers)
+    assert response.status_code == 200
+    assert course_titles(client, headers) == ["Renamed"]
+
+    # The window is kept outside the worker, another worker on the host sees it too
+    other_worker = RecentWrites(SQLiteRecentWritesBackend(str(tmp_path / "writes.db")), 5)
+    assert other_worker.wrote_recently(school["instructor"].id)
+
+
+def test_failing_replica_falls_back_to_the_primary(client, s, school, auth_headers, replica):
+    os.remove(replica.url.database)
+    os.mkdir(replica.url.database)  # Cannot be opened as a database any more
+    replica.dispose()
+
+    assert course_titles(client, auth_headers(school["instructor"])) == ["Course"]
+    assert mysql_connectors.get_replica() is None
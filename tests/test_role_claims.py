@@ -0,0 +1,46 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from config.config import Config
+from enums.enum import UserRoleEnum
+from services.claims_versions import ClaimsVersions, SQLiteClaimsVersionBackend, claims_versions
+from utils import authorization
+from utils.authorization import role_claims
+
+
+@pytest.fixture
+def claims_token(app, school, monkeypatch):
+    """Headers with a token carrying the instructor's role claims, as issued at login."""
+    monkeypatch.setattr(Config, "JWT_ROLE_CLAIMS", True)
+    instructor = school["instructor"]
+    with app.app_context():
+        token = create_access_token(
+            identity=str(instructor.id),
+            additional_claims=role_claims([school["instructor_role"]], claims_versions.fresh(instructor.id)),
+        )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_role_claims_are_used_until_the_roles_change(app, client, s, school, claims_token):
+    # Roles come from the token, the database is not asked
+    school["instructor_role"].role = UserRoleEnum.student
+    s.commit()
+    assert client.get("/api/v1/courses", headers=claims_token).status_code == 200
+
+    with app.test_request_context():
+        authorization.invalidate_user_roles(school["instructor"].id)
+    assert client.get("/api/v1/courses", headers=claims_token).status_code == 403
+
+
+def test_versions_are_shared_and_bumped_in_one_write(tmp_path):
+    path = str(tmp_path / "claims.db")
+    worker, other_worker = (ClaimsVersions(SQLiteClaimsVersionBackend(path), cache_seconds=60) for _ in range(2))
+    assert other_worker.current(1) == 0
+
+    worker.bump([1, 2, 3])
+    worker.bump([1])
+
+    assert [worker.current(user_id) for user_id in (1, 2, 3, 4)] == [2, 1, 1, 0]
+    # Cached for cache_seconds in the other worker, the backend has the new version
+    assert other_worker.current(1) == 0
+    assert other_worker.fresh(1) == 2
@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from enums.enum import RoleStatusEnum, UserRoleEnum
+from models import SubmissionModel
+from conftest import add_user
+
+
+def import_rows(client, headers, assessment, rows):
+    body = "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+    response = client.post(
+        f"/api/v1/assessments/{assessment.id}/submissions/bulk",
+        data=body,
+        content_type="application/x-ndjson",
+        headers=headers,
+    )
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def test_import_reports_a_status_per_row(client, s, school, auth_headers):
+    institute = school["institute"]
+    _, first = add_user(s, "first", UserRoleEnum.student, institute)
+    _, second = add_user(s, "second", UserRoleEnum.student, institute)
+    _, inactive = add_user(s, "inactive", UserRoleEnum.student, institute, status=RoleStatusEnum.inactive)
+    _, submitted = add_user(s, "submitted", UserRoleEnum.student, institute)
+    s.add(SubmissionModel(assessment_id=school["assessment"].id, role_id=submitted.id))
+    s.commit()
+
+    result = import_rows(
+        client,
+        auth_headers(school["instructor"]),
+        school["assessment"],
+        [
+            {"role_id": first.id, "answer": {"1": "4", "2": "6"}},
+            {"role_id": first.id, "answer": {"1": "4"}},
+            {"role_id": second.id},
+            {"role_id": inactive.id, "answer": {"1": "4"}},
+            {"role_id": submitted.id, "answer": {"1": "4"}},
+            {"role_id": 999, "answer": {"1": "4"}},
+            "not json",
+        ],
+    )
+
+    statuses = [(row["row"], row["status"], row.get("message")) for row in result["results"]]
+    assert statuses == [
+        (1, "created", None),
+        (2, "skipped", "Duplicate role in file"),
+        (3, "error", "`answer` is required for choices type assessments."),
+        (4, "error", "Role is inactive"),
+        (5, "skipped", "Already submitted"),
+        (6, "error", "Role not found or unauthorized"),
+        (7, "error", "Invalid JSON line"),
+    ]
+    assert result["results"][0]["score"] == 100
+    assert result["summary"] == {"created": 1, "skipped": 2, "error": 4}
+
+
+def test_submitted_at_with_offset_is_checked_per_row(client, s, school, auth_headers):
+    institute = school["institute"]
+    _, on_time = add_user(s, "on_time", UserRoleEnum.student, institute)
+    _, late = add_user(s, "late", UserRoleEnum.student, institute)
+    _, naive = add_user(s, "naive", UserRoleEnum.student, institute)
+    now = datetime.now(timezone.utc)
+
+    result = import_rows(
+        client,
+        auth_headers(school["instructor"]),
+        school["assessment"],
+        [
+            {"role_id": on_time.id, "answer": {"1": "4"}, "submitted_at": now.isoformat().replace("+00:00", "Z")},
+            {
+                "role_id": late.id,
+                "answer": {"1": "4"},
+                "submitted_at": (now + timedelta(days=2)).astimezone(timezone(timedelta(hours=7))).isoformat(),
+            },
+            {"role_id": naive.id, "answer": {"1": "4"}, "submitted_at": now.replace(tzinfo=None).isoformat()},
+        ],
+    )
+
+    assert [row["status"] for row in result["results"]] == ["created", "error", "created"]
+    assert result["results"][1]["message"] == "Submitted after the deadline"
+    stored = s.query(SubmissionModel).filter_by(role_id=on_time.id).one()
+    # Stored as GMT+7 wall-clock time, like submissions made through the API
+    assert stored.submitted_at == now.replace(tzinfo=None) + timedelta(hours=7)
+
+
+def test_rows_without_submitted_at_are_checked_against_the_deadline(client, s, school, auth_headers):
+    _, student = add_user(s, "student", UserRoleEnum.student, school["institute"])
+    school["assessment"].assessment_detail.deadline = datetime.utcnow() - timedelta(minutes=1)
+    s.commit()
+
+    result = import_rows(
+        client, auth_headers(school["instructor"]), school["assessment"], [{"role_id": student.id, "answer": {"1": "4"}}]
+    )
+
+    assert result["results"][0]["status"] == "error"
+    assert result["results"][0]["message"] == "Submitted after the deadline"
+    assert s.query(SubmissionModel).count() == 0
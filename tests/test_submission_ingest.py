@@ -0,0 +1,51 @@
+from sqlalchemy.exc import OperationalError
+
+from enums.enum import UserRoleEnum
+from models import SubmissionModel
+from services import submission_ingest
+from services.submission_ingest import SubmissionIngestor, new_receipt
+from conftest import add_user
+
+
+def queued_row(school, role):
+    return {"assessment_id": school["assessment"].id, "role_id": role.id, "answer": {"1": "4"}, "receipt": new_receipt()}
+
+
+def test_batch_is_written_once_the_database_recovers(s, school, monkeypatch):
+    _, role = add_user(s, "student", UserRoleEnum.student, school["institute"])
+    row = queued_row(school, role)
+    engine = submission_ingest.get_engine()
+    outages = iter([True, True])
+
+    class FlakyEngine:
+        def begin(self):
+            if next(outages, False):
+                raise OperationalError("INSERT", {}, Exception("Lost connection to MySQL server"))
+            return engine.begin()
+
+    monkeypatch.setattr(submission_ingest, "get_engine", FlakyEngine)
+    ingestor = SubmissionIngestor(batch_size=10, batch_ms=1, max_pending=10, retry_seconds=0.01)
+    ingestor.pending[row["receipt"]] = role.id
+
+    ingestor._write([row])
+
+    assert s.query(SubmissionModel).filter_by(receipt=row["receipt"]).count() == 1
+    assert ingestor.failed.get(row["receipt"]) is None
+    assert row["receipt"] not in ingestor.pending
+
+
+def test_duplicate_in_batch_fails_only_that_row(s, school):
+    _, first = add_user(s, "first", UserRoleEnum.student, school["institute"])
+    _, second = add_user(s, "second", UserRoleEnum.student, school["institute"])
+    rows = [queued_row(school, first), queued_row(school, first), queued_row(school, second)]
+    ingestor = SubmissionIngestor(batch_size=10, batch_ms=1, max_pending=10)
+
+    ingestor._write(rows)
+
+    assert s.query(SubmissionModel).count() == 2
+    assert ingestor.failed.get(rows[1]["receipt"]) == (first.id, "You have already submitted for this assessment")
+
+
+def test_receipt_lookup_requires_a_student_role(client, school, auth_headers):
+    response = client.get(f"/api/v1/submissions/receipts/{new_receipt()}", headers=auth_headers(school["instructor"]))
+    assert response.status_code == 403
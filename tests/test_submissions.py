@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from enums.enum import RoleStatusEnum, UserRoleEnum
+from models import InstituteModel, SubmissionModel
+from conftest import add_user
+
+
+def submit(client, headers, assessment, role, answer):
+    return client.post(
+        f"/api/v1/assessments/{assessment.id}/submissions",
+        data={"role_id": str(role.id), "answer": json.dumps(answer)},
+        headers=headers,
+    )
+
+
+def test_submission_is_scored(client, s, school, auth_headers):
+    student, role = add_user(s, "student", UserRoleEnum.student, school["institute"])
+
+    response = submit(client, auth_headers(student), school["assessment"], role, {"1": "4", "2": "5"})
+
+    assert response.status_code == 201
+    assert response.json["score"] == 50
+
+
+def test_second_submission_is_rejected(client, s, school, auth_headers):
+    student, role = add_user(s, "student", UserRoleEnum.student, school["institute"])
+    headers = auth_headers(student)
+
+    assert submit(client, headers, school["assessment"], role, {"1": "4"}).status_code == 201
+    response = submit(client, headers, school["assessment"], role, {"1": "4", "2": "6"})
+
+    assert response.status_code == 400
+    assert response.json["message"] == "You have already submitted for this assessment"
+    assert s.query(SubmissionModel).filter_by(role_id=role.id).count() == 1
+
+
+def test_submission_of_inactive_role_is_rejected(client, s, school, auth_headers):
+    student, role = add_user(s, "student", UserRoleEnum.student, school["institute"], status=RoleStatusEnum.inactive)
+
+    response = submit(client, auth_headers(student), school["assessment"], role, {"1": "4"})
+
+    assert response.status_code == 403
+    assert s.query(SubmissionModel).count() == 0
+
+
+def test_database_rejects_duplicate_submission(s, school):
+    # Backs the "already submitted" check when two requests of a student race past it
+    _, role = add_user(s, "student", UserRoleEnum.student, school["institute"])
+    s.add(SubmissionModel(assessment_id=school["assessment"].id, role_id=role.id))
+    s.commit()
+
+    s.add(SubmissionModel(assessment_id=school["assessment"].id, role_id=role.id))
+    with pytest.raises(IntegrityError):
+        s.commit()
+    s.rollback()
+
+
+def test_export_is_limited_to_instructors_of_the_institute(client, s, school, auth_headers):
+    student, role = add_user(s, "student", UserRoleEnum.student, school["institute"])
+    assert submit(client, auth_headers(student), school["assessment"], role, {"1": "4", "2": "6"}).status_code == 201
+    other_institute = InstituteModel(name="Other institute")
+    s.add(other_institute)
+    s.commit()
+    outsider, _ = add_user(s, "outsider", UserRoleEnum.instructor, other_institute)
+    url = f"/api/v1/assessments/{school['assessment'].id}/submissions/export"
+
+    assert client.get(url, headers=auth_headers(outsider)).status_code == 403
+    response = client.get(url, headers=auth_headers(school["instructor"]))
+    assert response.status_code == 200
+    assert [row["role_id"] for row in response.json["submissions"]] == [role.id]
@@ -0,0 +1,89 @@
+import io
+import json
+
+import bcrypt
+
+from enums.enum import RoleStatusEnum, UserRoleEnum
+from models import DisabledUserModel, RoleModel, UserModel
+from services.user_import import import_users, read_user_rows
+from conftest import add_user
+
+
+def test_csv_rows_drop_empty_values_and_nest_disability_info():
+    body = (
+        "name,email,password,role,disability_type,accessibility_preferences\n"
+        "Alice,alice@example.com,password1,student,visual,screen reader\n"
+        "Bob,bob@example.com,password2,,,\n"
+    )
+
+    rows = list(read_user_rows(io.BytesIO(body.encode("utf-8")), "text/csv; charset=utf-8"))
+
+    assert rows == [
+        {
+            "name": "Alice",
+            "email": "alice@example.com",
+            "password": "password1",
+            "role": "student",
+            "disability_info": {"disability_type": "visual", "accessibility_preferences": "screen reader"},
+        },
+        {"name": "Bob", "email": "bob@example.com", "password": "password2"},
+    ]
+
+
+def test_ndjson_rows_skip_blank_lines_and_mark_invalid_json():
+    body = '{"name": "Alice"}\n\nnot json\n{"name": "Bob"}\n'
+
+    rows = list(read_user_rows(io.BytesIO(body.encode("utf-8")), "application/x-ndjson"))
+
+    assert rows == [{"name": "Alice"}, None, {"name": "Bob"}]
+
+
+def user_row(i, **extra):
+    return {"name": f"User {i}", "email": f"user{i}@example.com", "password": f"password{i}", **extra}
+
+
+def test_rows_are_inserted_chunk_by_chunk(s, school):
+    rows = [user_row(i, role="student") for i in range(5)]
+    rows[3]["disability_info"] = {"disability_type": "visual", "accessibility_preferences": "large text"}
+
+    report = import_users(s, rows, school["institute"].id, chunk_size=2)
+
+    assert [(result["row"], result["status"]) for result in report] == [(i, "created") for i in range(1, 6)]
+    users = {user.email: user for user in s.query(UserModel).filter(UserModel.email.like("user%"))}
+    assert {result["user_id"] for result in report} == {user.id for user in users.values()}
+    assert bcrypt.checkpw(b"password2", users["user2@example.com"].password.encode("utf-8"))
+    assert s.get(DisabledUserModel, users["user3@example.com"].id).accessibility_preferences == "large text"
+    roles = s.query(RoleModel).filter(RoleModel.user_id.in_([user.id for user in users.values()])).all()
+    assert {(role.role, role.status) for role in roles} == {(UserRoleEnum.student, RoleStatusEnum.pending)}
+    assert len(roles) == 5
+
+
+def test_import_reports_a_status_per_row(client, s, school, auth_headers):
+    admin, _ = add_user(s, "admin", UserRoleEnum.admin, school["institute"])
+    rows = [
+        json.dumps(user_row(1)),
+        json.dumps(user_row(1, name="Someone else")),
+        json.dumps(user_row(2, email="instructor@example.com")),
+        json.dumps(user_row(3, password="short")),
+        "not json",
+        json.dumps(user_row(4, role="admin")),
+    ]
+
+    response = client.post(
+        f"/api/v1/institutes/{school['institute'].id}/users/import",
+        data="\n".join(rows),
+        content_type="application/x-ndjson",
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200, response.json
+    statuses = [(result["row"], result["status"], result.get("message")) for result in response.json["results"]]
+    assert statuses == [
+        (1, "created", None),
+        (2, "skipped", "Duplicate email in file"),
+        (3, "skipped", "Email already registered"),
+        (4, "error", {"password": ["min length is 8"]}),
+        (5, "error", "Invalid JSON line"),
+        (6, "error", {"role": ["unallowed value admin"]}),
+    ]
+    assert response.json["summary"] == {"created": 1, "skipped": 2, "error": 3}
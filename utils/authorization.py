@@ -0,0 +1,139 @@
+from collections import namedtuple
+from functools import wraps
+
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from config.config import Config
+from connector.mysql_connectors import get_session
+from enums.enum import UserRoleEnum, RoleStatusEnum
+from models import RoleModel
+from services.claims_versions import claims_versions
+from utils.handle_response import ResponseHandler
+from utils.metrics import metrics
+from utils.ttl_cache import TTLCache
+
+# Lightweight stand-in for RoleModel rows, safe to share between requests
+RoleClaim = namedtuple("RoleClaim", ["id", "institute_id", "user_id", "role", "status"])
+
+# user_id -> (roles, claims version they were loaded at)
+role_cache = TTLCache(Config.AUTHZ_CACHE_SIZE, Config.AUTHZ_CACHE_TTL_SECONDS)
+metrics.register_gauge("authz.cache_size", lambda: len(role_cache))
+
+
+def role_claims(roles, version):
+    """
+    Compact claim set for the access token: [role_id, institute_id, role, status] per role,
+    and the claims version of the user read before the roles were queried.
+    """
+    if not Config.JWT_ROLE_CLAIMS:
+        return {}
+    return {
+        "roles": [[role.id, role.institute_id, role.role.value, role.status.value] for role in roles],
+        "ver": version,
+    }
+
+
+def get_claimed_roles():
+    """Roles of the current user from the token, or None when the token has none or they are outdated."""
+    claims = get_jwt()
+    if "roles" not in claims or claims.get("ver") != claims_versions.current(claims["sub"]):
+        return None
+
+    user_id = int(claims["sub"])
+    return [
+        RoleClaim(role_id, institute_id, user_id, UserRoleEnum(role), RoleStatusEnum(status))
+        for role_id, institute_id, role, status in claims["roles"]
+    ]
+
+
+def _load_roles(s, user_id):
+    cached = role_cache.get(str(user_id))
+    if cached is not None:
+        roles, version = cached
+        # Entries loaded before a role change seen by any worker are stale
+        if version == claims_versions.current(user_id):
+            metrics.inc("authz.cache_hits")
+            return roles
+
+    metrics.inc("authz.cache_misses")
+    version = claims_versions.fresh(user_id)
+    roles = [
+        RoleClaim(role.id, role.institute_id, role.user_id, role.role, role.status)
+        for role in s.query(RoleModel).filter(RoleModel.user_id == user_id).all()
+    ]
+    role_cache.set(str(user_id), (roles, version))
+    return roles
+
+
+def get_user_roles(s, user_id):
+    """
+    Every role of user_id, fetched at most once per request.
+
+    Looked up in order: this request, the token's role claims (current user only), the
+    cross-request cache, then the database.
+    """
+    user_roles = g.setdefault("user_roles", {})
+    key = str(user_id)
+    if key in user_roles:
+        metrics.inc("authz.request_hits")
+        return user_roles[key]
+
+    roles = get_claimed_roles() if key == get_jwt().get("sub") else None
+    if roles is not None:
+        metrics.inc("authz.claim_hits")
+    else:
+        roles = _load_roles(s, user_id)
+
+    user_roles[key] = roles
+    return roles
+
+
+def invalidate_user_roles(*user_ids):
+    """Forget cached roles and role claims of user_ids here and, through their claims versions, on every worker."""
+    for user_id in user_ids:
+        role_cache.pop(str(user_id))
+        g.get("user_roles", {}).pop(str(user_id), None)
+    claims_versions.bump(user_ids)
+
+
+def find_roles(s, user_id, role, institute_id=None, status=None, role_id=None):
+    """Roles of user_id matching the filters."""
+    role = UserRoleEnum[role] if isinstance(role, str) else role
+    role_id = int(role_id) if role_id is not None else None
+
+    return [
+        user_role
+        for user_role in get_user_roles(s, user_id)
+        if user_role.role == role
+        and (institute_id is None or user_role.institute_id == institute_id)
+        and (status is None or user_role.status == status)
+        and (role_id is None or user_role.id == role_id)
+    ]
+
+
+def find_role(s, user_id, role, institute_id=None, status=None, role_id=None):
+    roles = find_roles(s, user_id, role, institute_id, status, role_id)
+    return roles[0] if roles else None
+
+
+def require_role(role, institute_arg=None):
+    """
+    Reject the request with 403 unless the current user has `role`, in the institute given by
+    the `institute_arg` URL parameter when set. The matching role is available as g.current_role.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            institute_id = kwargs[institute_arg] if institute_arg else None
+            current_role = find_role(get_session(), get_jwt_identity(), role, institute_id=institute_id)
+            if not current_role:
+                return ResponseHandler.error("Unauthorized user", 403)
+
+            g.current_role = current_role
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,32 @@
+import csv
+import io
+import json
+from itertools import islice
+
+
+def read_rows(stream, content_type, csv_row=None):
+    """
+    Yield rows one at a time from a CSV or NDJSON request body.
+
+    A line that is not valid JSON yields None, so the importer can report it by row number.
+    `csv_row` reshapes each CSV row, whose values are all strings, into the JSON row shape.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+    if content_type.startswith("text/csv"):
+        for row in csv.DictReader(text):
+            row = {key: value for key, value in row.items() if value not in (None, "")}
+            yield csv_row(row) if csv_row else row
+    else:
+        for line in text:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
@@ -0,0 +1,78 @@
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from flask import request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func, inspect
+from werkzeug.http import http_date, quote_etag
+
+# updated_at columns hold GMT+7 wall-clock time, see gmt_plus_7_now in the models
+STORED_UTC_OFFSET = timedelta(hours=7)
+
+Validators = namedtuple("Validators", ["etag", "weak", "last_modified"])
+
+
+def _digest(*parts):
+    return hashlib.blake2b("\x1f".join(str(part) for part in parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _last_modified(updated_at):
+    """
+    Last-Modified of a row last updated at updated_at, None while it is under a second old.
+
+    HTTP dates drop the fraction of a second, so one sent now would not change with another
+    edit in the same second and If-Modified-Since would answer 304 for it (RFC 9110 8.8.2.2).
+    """
+    if updated_at is None:
+        return None
+    updated_at = (updated_at - STORED_UTC_OFFSET).replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - updated_at < timedelta(seconds=1):
+        return None
+    return updated_at.replace(microsecond=0)
+
+
+def record_validators(record):
+    """Strong ETag and Last-Modified of one record, the ETag hashes the column values loaded for it."""
+    state = inspect(record)
+    columns = sorted(set(state.mapper.column_attrs.keys()) - state.unloaded)
+    etag = _digest(record.__tablename__, request.full_path, *[f"{key}={state.dict.get(key)!r}" for key in columns])
+    return Validators(etag, False, _last_modified(record.updated_at))
+
+
+def list_validators(query, updated_at_column):
+    """
+    Weak ETag and Last-Modified of a list, from max(updated_at) and count(*) of the rows of `query`.
+
+    Any insert, update or delete of those rows changes one of the two, so the aggregate stands
+    in for the list without loading it; updated_at keeps microseconds so that holds for edits
+    made within the same second. `query` may be broader than the page served.
+    """
+    latest, count = query.with_entities(func.max(updated_at_column), func.count()).one()
+    etag = _digest(updated_at_column.table.name, latest, count, request.full_path, get_jwt_identity())
+    return Validators(etag, True, _last_modified(latest))
+
+
+def is_not_modified(validators):
+    """
+    Whether the client's cached copy, as given by If-None-Match or If-Modified-Since, is current.
+
+    If-Modified-Since is only trusted for single records: deleting a row from a list leaves its
+    max(updated_at) as it was, only the list's ETag (which includes the count) notices.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(validators.etag)
+    if request.if_modified_since and validators.last_modified and not validators.weak:
+        return validators.last_modified <= request.if_modified_since
+    return False
+
+
+def validator_headers(validators):
+    headers = {
+        "ETag": quote_etag(validators.etag, validators.weak),
+        # Clients revalidate on every use, which the ETag makes cheap
+        "Cache-Control": "private, no-cache",
+    }
+    if validators.last_modified:
+        headers["Last-Modified"] = http_date(validators.last_modified)
+    return headers
@@ -0,0 +1,68 @@
+from flask import request
+from sqlalchemy import Enum, inspect
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
+
+from services.image_variants import stored_variants
+
+
+# Keys of to_dictionaries() that also read another column
+FIELD_DEPENDENCIES = {"media_variants": "media", "profile_pict_variants": "profile_pict"}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def requested_fields(model):
+    """Fields asked for with ?fields=a,b (id is always included), or None for all of them."""
+    value = request.args.get("fields")
+    if not value:
+        return None
+
+    fields = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = fields - set(model.__table__.columns.keys())
+    if unknown:
+        raise FieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields | {"id"}
+
+
+def field_options(model, fields):
+    """Loader options selecting only the columns `fields` need, for Query.options() or Session.get()."""
+    if fields is None:
+        return []
+
+    names = set(fields) | {FIELD_DEPENDENCIES[field] for field in fields if field in FIELD_DEPENDENCIES}
+    # Enum columns are small and to_dictionaries() always reads their .name, updated_at gives the ETag
+    names |= {
+        column.key
+        for column in model.__table__.columns
+        if isinstance(column.type, Enum) or column.key == "updated_at"
+    }
+    return [load_only(*[getattr(model, name) for name in sorted(names)])]
+
+
+def load_fields(query, model, fields):
+    return query.options(*field_options(model, fields))
+
+
+def to_dictionary(record):
+    """record.to_dictionaries() with image variants not generated yet pointing at the original."""
+    data = record.to_dictionaries()
+    for field, url_field in FIELD_DEPENDENCIES.items():
+        if field in data:
+            data[field] = stored_variants(data[url_field], data[field])
+    return data
+
+
+def to_fields(record, fields):
+    """to_dictionary(record) restricted to `fields`."""
+    if fields is None:
+        return to_dictionary(record)
+
+    # Columns left out by load_only read as None here instead of being lazy loaded row by row
+    state = inspect(record)
+    for key in state.unloaded & set(state.mapper.column_attrs.keys()):
+        set_committed_value(record, key, None)
+
+    return {key: value for key, value in to_dictionary(record).items() if key in fields}
@@ -1,18 +1,62 @@
-from flask import jsonify
+from itertools import islice
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+# Rows serialized per chunk written to the client
+STREAM_CHUNK_ROWS = 200
 
 
 class ResponseHandler:
     @staticmethod
-    def success(data=None, message="Success", status=200):
+    def success(data=None, message="Success", status=200, headers=None):
         # Merge data with the message into the top-level JSON
         response = {"message": message}
         if isinstance(data, dict):  # Only merge if data is a dictionary
             response.update(data)
+        if headers:
+            return jsonify(response), status, headers
         return jsonify(response), status
 
+    @staticmethod
+    def not_modified(headers=None):
+        # The client's cached copy is current, nothing is serialized
+        return "", 304, headers or {}
+
     @staticmethod
     def error(message="Error", status=400, data=None):
         response = {"message": message}
         if data is not None:
             response["data"] = data
         return jsonify(response), status
+
+    @staticmethod
+    def stream(items, key, message="Success", status=200):
+        """
+        Stream an iterable of dicts without holding the whole response in memory.
+
+        Written as NDJSON when the client asks for it (Accept: application/x-ndjson or
+        ?format=ndjson), otherwise as the usual {"message": ..., key: [...]} object whose list
+        is written item by item.
+        """
+        dumps = current_app.json.dumps
+        ndjson = request.args.get("format") == "ndjson" or (
+            request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+            == "application/x-ndjson"
+        )
+
+        def chunks():
+            items_iter = iter(items)
+            if ndjson:
+                while batch := list(islice(items_iter, STREAM_CHUNK_ROWS)):
+                    yield "".join(dumps(item) + "\n" for item in batch)
+                return
+
+            yield f"{{{dumps('message')}: {dumps(message)}, {dumps(key)}: ["
+            separator = ""
+            while batch := list(islice(items_iter, STREAM_CHUNK_ROWS)):
+                yield separator + ", ".join(dumps(item) for item in batch)
+                separator = ", "
+            yield "]}"
+
+        mimetype = "application/x-ndjson" if ndjson else "application/json"
+        return Response(stream_with_context(chunks()), status=status, mimetype=mimetype)
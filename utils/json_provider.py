@@ -0,0 +1,60 @@
+from datetime import date
+from enum import Enum
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library json module
+    orjson = None
+
+
+def _default(o):
+    # Enums as their value, the same as orjson does natively
+    if isinstance(o, Enum):
+        return o.value
+    return DefaultJSONProvider.default(o)
+
+
+def _orjson_default(o):
+    # Datetimes are passed through to keep Flask's HTTP date format instead of orjson's ISO 8601
+    if isinstance(o, date):
+        return http_date(o)
+    return _default(o)
+
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if orjson
+    else 0
+)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider serializing with orjson when it is installed, otherwise with the json module.
+
+    The output matches Flask's default provider: sorted keys, datetimes as HTTP dates and
+    compact responses out of debug mode; enums are serialized by value.
+    """
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,55 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+
+class Histogram:
+    # Upper bounds in milliseconds, the last bucket catches everything above
+    BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dictionaries(self):
+        buckets = {f"le_{bound}": count for bound, count in zip(self.BUCKETS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {"count": self.count, "sum": round(self.total, 3), "buckets": buckets}
+
+
+class MetricsRegistry:
+    """In-process counters and latency histograms, one registry per worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.histograms = defaultdict(Histogram)
+        self.gauges = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name, value):
+        with self._lock:
+            self.histograms[name].observe(value)
+
+    def register_gauge(self, name, fn):
+        self.gauges[name] = fn
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {name: h.to_dictionaries() for name, h in self.histograms.items()},
+                "gauges": {name: fn() for name, fn in self.gauges.items()},
+            }
+
+
+metrics = MetricsRegistry()
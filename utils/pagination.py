@@ -0,0 +1,89 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import Enum
+
+from config.config import Config
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(last_id):
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return int(json.loads(payload)["id"])
+    except (ValueError, TypeError, KeyError):
+        raise PaginationError("Invalid cursor")
+
+
+def page_limit():
+    """`limit` query parameter, capped at PAGE_SIZE_MAX."""
+    try:
+        limit = int(request.args.get("limit", Config.PAGE_SIZE_DEFAULT))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, Config.PAGE_SIZE_MAX)
+
+
+def _filter_value(name, column, value):
+    if isinstance(column.type, Enum):
+        try:
+            return column.type.enum_class[value]
+        except KeyError:
+            raise PaginationError(f"{name} must be one of {', '.join(column.type.enums)}")
+    try:
+        return column.type.python_type(value)
+    except ValueError:
+        raise PaginationError(f"Invalid {name}: {value}")
+
+
+def _date_value(name, value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f"{name} must be an ISO 8601 date")
+
+
+def paginate(query, id_column, filters=None, date_column=None, row_id=None):
+    """
+    One page of `query`, ordered by id_column and continued from the `cursor` query parameter.
+
+    `filters` maps query parameters (e.g. status, role, course_id) to the columns they filter
+    on by equality, `date_column` is filtered by the created_from/created_to parameters.
+    Returns (rows, page) where page holds the limit and the cursor of the next page, None on
+    the last one. row_id extracts the id from a row when the query selects more than one entity.
+    """
+    for name, column in (filters or {}).items():
+        if request.args.get(name) is not None:
+            query = query.filter(column == _filter_value(name, column, request.args[name]))
+
+    if date_column is not None:
+        if request.args.get("created_from"):
+            query = query.filter(date_column >= _date_value("created_from", request.args["created_from"]))
+        if request.args.get("created_to"):
+            query = query.filter(date_column <= _date_value("created_to", request.args["created_to"]))
+
+    if request.args.get("cursor"):
+        query = query.filter(id_column > decode_cursor(request.args["cursor"]))
+
+    # The id index serves both the filter and the order, whatever page is asked for
+    limit = page_limit()
+    rows = query.order_by(id_column).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(row_id(rows[-1]) if row_id else rows[-1].id)
+
+    return rows, {"limit": limit, "next_cursor": next_cursor}
@@ -0,0 +1,37 @@
+from flask import current_app, request
+
+from utils.handle_response import ResponseHandler
+
+
+def max_content_length(limit):
+    """Allow request bodies of up to `limit` bytes on this route instead of MAX_CONTENT_LENGTH."""
+
+    def decorator(fn):
+        fn.max_content_length = limit
+        return fn
+
+    return decorator
+
+
+def reject_oversized_request():
+    # Answered from the Content-Length header alone, before any of the body is read
+    view = current_app.view_functions.get(request.endpoint)
+    limit = getattr(view, "max_content_length", None)
+    if limit is not None:
+        request.max_content_length = limit
+
+    if (
+        request.content_length is not None
+        and request.max_content_length is not None
+        and request.content_length > request.max_content_length
+    ):
+        return ResponseHandler.error("Request body too large", 413)
+
+
+def request_too_large(error):
+    return ResponseHandler.error("Request body too large", 413)
+
+
+def init_request_limits(app):
+    app.before_request(reject_oversized_request)
+    app.register_error_handler(413, request_too_large)